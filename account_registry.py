@@ -0,0 +1,340 @@
+"""
+Registry of many accounts that share their market data.
+
+Every account keeps its own ledgers and positions, but prices are requested for the
+union of their tickers only once: a single bulk quote request re-prices every
+portfolio, and profit reports of all accounts read their start/end closes from one
+ticker x date price matrix. Morning reporting therefore costs one fetch per distinct
+symbol instead of one per symbol per account.
+
+Accounts are persisted with account_store under one folder per account; the registry
+file next to them keeps the salted password hashes used to log in. Interactive logins go
+through AccountRegistry.open, which checks the password; batch jobs that already have
+access to the registry folder load accounts with load_unauthenticated.
+"""
+import hashlib
+import json
+import os
+import secrets
+
+import account_store
+import calculate_func
+import profit_engine
+import user
+
+REGISTRY_FILE = "registry.json"
+
+# PBKDF2 iterations for the stored password hashes
+HASH_ITERATIONS = 100_000
+
+# Characters that would let an account name leave its folder under the registry root
+NAME_FORBIDDEN_CHARS = ("/", "\\", ":", "\0")
+
+
+def hash_password(password: str, salt: str) -> str:
+    """
+    Derives the stored hash of a password.
+
+    Args:
+        password (str): The clear-text password.
+        salt (str): Hex-encoded random salt of the account.
+
+    Returns:
+        str: The hex-encoded PBKDF2-SHA256 hash.
+    """
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), HASH_ITERATIONS).hex()
+
+
+def check_account_name(name: str) -> str:
+    """
+    Checks that an account name can be used as a folder name under the registry root.
+
+    Args:
+        name (str): The account name.
+
+    Returns:
+        str: The name, unchanged.
+
+    Raises:
+        ValueError: If the name is empty, hidden ('.'-prefixed, including '..') or holds a
+            path separator, drive separator or NUL character.
+    """
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("The account name cannot be empty.")
+    if name.startswith(".") or any(char in name for char in NAME_FORBIDDEN_CHARS):
+        raise ValueError(f"Invalid account name: {name!r}. Names cannot start with '.' or contain / \\ :")
+    return name
+
+
+def slice_prices(matrix, row: dict, column: dict, tickers: list, start_date: str, end_date: str):
+    """
+    Picks the start/end closes of some tickers out of a shared price matrix.
+
+    Args:
+        matrix (np.ndarray): The shared price matrix (see AccountRegistry.plan_prices).
+        row (dict): ticker -> row of the matrix.
+        column (dict): date -> column of the matrix.
+        tickers (list): Tickers to pick, in this order.
+        start_date (str): Start date ('YYYY-MM-DD').
+        end_date (str): End date ('YYYY-MM-DD').
+
+    Returns:
+        np.ndarray: (len(tickers), 2) matrix, ready for profit_engine.batch_profit.
+    """
+    return matrix[[row[ticker] for ticker in tickers]][:, [column[start_date], column[end_date]]]
+
+
+class AccountRegistry:
+    """
+    Loads, authenticates and reports on many accounts with shared price data.
+
+    Attributes:
+        root (str): Folder holding the registry file and one storage folder per account.
+        max_workers (int): Tickers whose prices are fetched concurrently.
+        accounts (dict): name -> loaded user.Account.
+    """
+
+    def __init__(self, root: str = account_store.ACCOUNTS_DIR,
+                 max_workers: int = profit_engine.DEFAULT_MAX_WORKERS) -> None:
+        """
+        Opens (or creates) a registry folder. Accounts are loaded lazily (see open / load_all).
+
+        Args:
+            root (str, optional): Registry folder. Defaults to the Moneyer accounts folder.
+            max_workers (int, optional): Tickers whose prices are fetched concurrently.
+        """
+        self.root = root
+        self.max_workers = max_workers
+        self.accounts = {}
+
+        os.makedirs(root, exist_ok=True)
+        self._credentials = {}
+        if os.path.exists(self.registry_path):
+            with open(self.registry_path, encoding="utf-8") as f:
+                self._credentials = json.load(f)
+
+    def __repr__(self) -> str:
+        return f"AccountRegistry(root={self.root}, accounts={len(self._credentials)}, loaded={len(self.accounts)})"
+
+    def __len__(self) -> int:
+        return len(self._credentials)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._credentials
+
+    def __iter__(self):
+        return iter(self.names())
+
+    @property
+    def registry_path(self) -> str:
+        return os.path.join(self.root, REGISTRY_FILE)
+
+    def names(self) -> list:
+        """Returns the names of every registered account."""
+        return sorted(self._credentials)
+
+    def create(self, name: str, password: str) -> user.Account:
+        """
+        Registers a new persisted account.
+
+        Args:
+            name (str): The account name.
+            password (str): The account password (only its salted hash is stored).
+
+        Returns:
+            user.Account: The new, empty account.
+
+        Raises:
+            ValueError: If the name is invalid (see check_account_name) or already registered.
+        """
+        check_account_name(name)
+        if name in self._credentials:
+            raise ValueError(f"The account {name} already exists.")
+
+        salt = secrets.token_hex(16)
+        self._credentials[name] = {"salt": salt, "hash": hash_password(password, salt)}
+        self._save_credentials()
+        return self.load_unauthenticated(name, password)
+
+    def authenticate(self, name: str, password: str) -> bool:
+        """Checks a name/password pair against the stored hash."""
+        entry = self._credentials.get(name)
+        if entry is None:
+            return False
+        return secrets.compare_digest(entry["hash"], hash_password(password, entry["salt"]))
+
+    def open(self, name: str, password: str) -> user.Account:
+        """
+        Logs in to a registered account, loading it from its storage folder on first use.
+
+        Args:
+            name (str): The account name.
+            password (str): The account password, checked against the stored hash.
+
+        Returns:
+            user.Account: The loaded account.
+
+        Raises:
+            KeyError: If the name is not registered.
+            ValueError: If the password is wrong.
+        """
+        if name not in self._credentials:
+            raise KeyError(name)
+        if not self.authenticate(name, password):
+            raise ValueError(f"Invalid password for the account {name}.")
+        return self.load_unauthenticated(name, password)
+
+    def load_unauthenticated(self, name: str, password: str = "", read_only: bool = False) -> user.Account:
+        """
+        Loads a registered account WITHOUT checking its password.
+
+        Only for trusted batch jobs that already have access to the registry folder (e.g.,
+        report_runner); logins go through open().
+
+        Args:
+            name (str): The account name.
+            password (str, optional): Kept on the Account object.
+            read_only (bool, optional): Load the storage folder without writing to it (see
+                AccountStore), e.g. to plan a batch job whose workers open it again.
+
+        Returns:
+            user.Account: The loaded account.
+
+        Raises:
+            KeyError: If the name is not registered.
+            ValueError: If the registered name is not a valid folder name.
+        """
+        if name not in self._credentials:
+            raise KeyError(name)
+
+        if name not in self.accounts:
+            self.accounts[name] = user.Account(
+                name, password, max_workers=self.max_workers, storage=self.account_path(name),
+                read_only=read_only
+            )
+        return self.accounts[name]
+
+    def account_path(self, name: str) -> str:
+        """
+        Returns the storage folder of an account.
+
+        Raises:
+            ValueError: If the name is not a valid folder name (see check_account_name).
+        """
+        return os.path.join(self.root, check_account_name(name))
+
+    def add(self, account: user.Account) -> None:
+        """Adds an already built (e.g., in-memory) account to the loaded accounts."""
+        self.accounts[account.name] = account
+
+    def load_all(self) -> list:
+        """Loads every registered account WITHOUT checking passwords (see load_unauthenticated)."""
+        for name in self.names():
+            self.load_unauthenticated(name)
+        return list(self.accounts.values())
+
+    def tickers(self) -> list:
+        """Returns the deduplicated union of the traded and held tickers of the loaded accounts."""
+        union = set()
+        for account in self.accounts.values():
+            union.update(account.tickers_buy_dict)
+            union.update(ticker for ticker in account.account_dict if ticker.lower() != "total")
+        return sorted(union)
+
+    def refresh_prices(self):
+        """
+        Re-prices every loaded account from one bulk quote request for the union of tickers.
+
+        Returns:
+            pd.Series: The shared last prices, indexed by ticker.
+        """
+        held = sorted({
+            ticker for account in self.accounts.values()
+            for ticker in account.account_dict if ticker.lower() != "total"
+        })
+        prices = calculate_func.get_current_prices(held)
+
+        for account in self.accounts.values():
+            account.account_dict = calculate_func.reprice_account_dict(account.account_dict, prices, account.totals)
+        return prices
+
+    def plan_prices(self, start_date: str = "first buy time", end_date: str = "now") -> tuple:
+        """
+        Plans the report window of every loaded account and fetches their closes together.
+
+        Args:
+            start_date (str, optional): Common start date, or "first buy time" for each
+                account's own first trade. Defaults to "first buy time".
+            end_date (str, optional): Common end date. Defaults to "now".
+
+        Returns:
+            tuple: (windows, row, column, matrix) where windows maps each account name
+                   to its (start, end) dates (accounts without trades are skipped), and
+                   row (ticker -> index) and column (date -> index) address the
+                   tickers x dates price matrix of profit_engine.
+        """
+        windows = {}
+        for name, account in self.accounts.items():
+            start = start_date
+            if start == "first buy time":
+                start = account.tickers_buy_dict.first_date()
+                if start is None:
+                    continue
+            windows[name] = calculate_func.sub_date(start, end_date)
+
+        tickers = self.tickers()
+        dates = sorted({date for window in windows.values() for date in window})
+        if not windows or not tickers:
+            return {}, {}, {}, profit_engine.build_price_matrix([], [])
+
+        row = {ticker: i for i, ticker in enumerate(tickers)}
+        column = {date: i for i, date in enumerate(dates)}
+        ends = {end for _, end in windows.values()}
+        matrix = profit_engine.build_price_matrix(tickers, dates, max_workers=self.max_workers,
+                                                  exact_dates=ends)
+        return windows, row, column, matrix
+
+    def profit_reports(self, start_date: str = "first buy time", end_date: str = "now") -> dict:
+        """
+        Calculates the profit report of every loaded account from one shared price matrix.
+
+        All start/end dates are planned first, then the closes of every distinct
+        (ticker, date) pair are fetched once and every account reads its rows from them.
+
+        Args:
+            start_date (str, optional): Common start date, or "first buy time" for each
+                account's own first trade. Defaults to "first buy time".
+            end_date (str, optional): Common end date. Defaults to "now".
+
+        Returns:
+            dict: account name -> profit_dict (with its 'total' row); accounts without
+                  trades are skipped.
+        """
+        windows, row, column, matrix = self.plan_prices(start_date, end_date)
+
+        reports = {}
+        for name, (start, end) in windows.items():
+            account = self.accounts[name]
+            account_tickers = list(account.tickers_buy_dict)
+            prices = slice_prices(matrix, row, column, account_tickers, start, end)
+
+            profit_dict = profit_engine.batch_profit(
+                account_tickers, start, end, account.tickers_buy_dict, account.tickers_sell_dict,
+                price_matrix=prices
+            )
+            reports[name] = calculate_func.create_all_profit_dict(profit_dict)
+        return reports
+
+    def close(self) -> None:
+        """Compacts (unless loaded read-only) and closes every loaded persisted account."""
+        for account in self.accounts.values():
+            if account.store is None or not account.store.read_only:
+                account.save()
+            account.close()
+        self.accounts = {}
+
+    def _save_credentials(self) -> None:
+        temp_path = self.registry_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._credentials, f, indent=2)
+        os.replace(temp_path, self.registry_path)
@@ -0,0 +1,337 @@
+"""
+Durable account storage: a binary snapshot plus an append-only trade journal.
+
+Every trade is appended to a JSON-lines journal; the file is flushed on each write and
+fsync'ed in batches (every few records or after a short delay) instead of once per
+trade. The journal is periodically compacted into a NumPy snapshot of the positions
+and one memory-mapped ledger file per side (see ledger.Ledger.save), so reopening an
+account maps the trade history instead of reading it and replays only the trades
+recorded since the last snapshot, without any market-data request.
+
+Each journal starts with a generation header. A compaction writes the ledger files and
+the snapshot of the next generation first and then starts a fresh journal, so a crash
+in between leaves an older journal that is recognized as already compacted and skipped.
+Ledger files carry their generation in their name and are only deleted once a newer
+snapshot is in place.
+
+A store opened read-only (e.g., by report workers while another process has the account
+open) loads the same state but never repairs, writes or compacts anything.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import lazy_import
+import ledger
+import positions
+from market_data import CACHE_DIR
+
+np = lazy_import.module("numpy")
+
+ACCOUNTS_DIR = os.path.join(CACHE_DIR, "accounts")
+SNAPSHOT_FILE = "snapshot.npz"
+JOURNAL_FILE = "journal.jsonl"
+LEDGER_SIDES = ("buy", "sell")
+LEDGER_SUFFIX = ".ledger"
+
+# The journal is fsync'ed after this many records or this many seconds, whichever comes first
+FSYNC_EVERY = 64
+FSYNC_INTERVAL = 1.0
+
+# Journal length that triggers an automatic compaction
+COMPACT_EVERY = 10_000
+
+# Position fields kept in the snapshot (the rest is derived from them)
+POSITION_FIELDS = ("amount", "initial price", "current price")
+
+
+def default_path(name: str) -> str:
+    """
+    Returns the storage folder of an account under the Moneyer cache directory.
+
+    Args:
+        name (str): The account name.
+
+    Returns:
+        str: The folder path.
+    """
+    return os.path.join(ACCOUNTS_DIR, name)
+
+
+class AccountStore:
+    """
+    Snapshot + journal persistence of one account.
+
+    Attributes:
+        path (str): The account's storage folder.
+        fsync_every (int): Records written between two fsync calls.
+        fsync_interval (float): Maximum seconds a record stays without fsync.
+        compact_every (int): Journal records that trigger a compaction (0 disables it).
+        generation (int): Generation of the current journal.
+        pending (int): Records in the journal since the last compaction.
+        read_only (bool): Whether the store only reads its files.
+    """
+
+    def __init__(self, path: str, fsync_every: int = FSYNC_EVERY, fsync_interval: float = FSYNC_INTERVAL,
+                 compact_every: int = COMPACT_EVERY, read_only: bool = False) -> None:
+        """
+        Opens (or creates) an account storage folder.
+
+        Args:
+            path (str): The storage folder.
+            fsync_every (int, optional): Records written between two fsync calls.
+            fsync_interval (float, optional): Maximum seconds between two fsync calls.
+            compact_every (int, optional): Journal records that trigger a compaction.
+            read_only (bool, optional): Load without touching the files: a torn or stale
+                journal is skipped instead of repaired, and record/compact raise.
+        """
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.generation = 0
+        self.pending = 0
+        self.read_only = read_only
+
+        if not read_only:
+            os.makedirs(path, exist_ok=True)
+        self._journal = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def __repr__(self) -> str:
+        mode = ", read_only=True" if self.read_only else ""
+        return f"AccountStore(path={self.path}, generation={self.generation}, pending={self.pending}{mode})"
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.path, SNAPSHOT_FILE)
+
+    @property
+    def journal_path(self) -> str:
+        return os.path.join(self.path, JOURNAL_FILE)
+
+    def ledger_path(self, side: str, generation: int) -> str:
+        """Returns the ledger file of one side ("buy" or "sell") written for a generation."""
+        return os.path.join(self.path, f"{side}.{generation}{LEDGER_SUFFIX}")
+
+    def load(self) -> tuple:
+        """
+        Restores the account state from the snapshot and the journal tail.
+
+        Returns:
+            tuple: (tickers_buy_dict, tickers_sell_dict, account_dict), account_dict being a
+                positions.PositionTable.
+        """
+        tickers_buy_dict, tickers_sell_dict, account_dict = ledger.Ledger(), ledger.Ledger(), positions.PositionTable()
+
+        if os.path.exists(self.snapshot_path):
+            with np.load(self.snapshot_path) as snapshot:
+                self.generation = int(snapshot["generation"])
+                tickers_buy_dict = ledger.Ledger.open(self.ledger_path("buy", self.generation))
+                tickers_sell_dict = ledger.Ledger.open(self.ledger_path("sell", self.generation))
+                account_dict = _positions_from_arrays(snapshot)
+
+        records = self._read_journal()
+        for record in records:
+            _replay(record, tickers_buy_dict, tickers_sell_dict, account_dict)
+        self.pending = len(records)
+
+        return tickers_buy_dict, tickers_sell_dict, account_dict
+
+    def record(self, side: str, ticker: str, trade: tuple, quote: float = None) -> None:
+        """
+        Appends one trade to the journal.
+
+        Args:
+            side (str): "buy" or "sell".
+            ticker (str): The stock ticker symbol.
+            trade (tuple): The ledger row (num, amount, price, date).
+            quote (float, optional): The market price known when the trade was recorded.
+
+        Raises:
+            ValueError: If the store is read-only.
+        """
+        self._check_writable()
+        num, amount, price, date = trade
+        entry = {
+            "side": side, "ticker": ticker, "num": int(num), "amount": int(amount),
+            "price": float(price), "date": str(date), "quote": None if quote is None else float(quote),
+        }
+
+        journal = self._open_journal()
+        journal.write(json.dumps(entry) + "\n")
+        journal.flush()
+
+        self.pending += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        """Forces the journal records written so far to disk."""
+        if self._journal is not None and self._unsynced:
+            os.fsync(self._journal.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def needs_compaction(self) -> bool:
+        """Returns True when the journal has grown past compact_every records."""
+        return 0 < self.compact_every <= self.pending
+
+    def compact(self, tickers_buy_dict: ledger.Ledger, tickers_sell_dict: ledger.Ledger,
+                account_dict: dict) -> None:
+        """
+        Writes a snapshot of the full state and starts an empty journal.
+
+        Args:
+            tickers_buy_dict (ledger.Ledger): Purchase history.
+            tickers_sell_dict (ledger.Ledger): Sales history.
+            account_dict (dict | positions.PositionTable): The positions.
+
+        Raises:
+            ValueError: If the store is read-only.
+        """
+        self._check_writable()
+        generation = self.generation + 1
+        arrays = {"generation": np.array(generation)}
+        arrays.update(_positions_to_arrays(account_dict))
+
+        # 1. Ledger files of the new generation (ignored until the snapshot refers to it)
+        tickers_buy_dict.save(self.ledger_path("buy", generation))
+        tickers_sell_dict.save(self.ledger_path("sell", generation))
+
+        # 2. New snapshot, atomically replacing the old one
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+        # 3. Fresh journal for the new generation
+        self.close()
+        self.generation = generation
+        self._write_journal_header()
+        self.pending = 0
+        self._remove_old_ledgers()
+
+    def close(self) -> None:
+        """Syncs and closes the journal."""
+        if self._journal is not None:
+            self.sync()
+            self._journal.close()
+            self._journal = None
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise ValueError(f"The account storage {self.path} is open read-only.")
+
+    def _remove_old_ledgers(self) -> None:
+        current = {self.ledger_path(side, self.generation) for side in LEDGER_SIDES}
+        for name in os.listdir(self.path):
+            path = os.path.join(self.path, name)
+            if name.endswith(LEDGER_SUFFIX) and path not in current:
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Still mapped on platforms that lock mapped files; removed by a later compaction
+                    pass
+
+    def _open_journal(self):
+        if self._journal is None:
+            if not os.path.exists(self.journal_path):
+                self._write_journal_header()
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        return self._journal
+
+    def _write_journal_header(self) -> None:
+        temp_path = self.journal_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"generation": self.generation}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.journal_path)
+
+    def _read_journal(self) -> list:
+        """
+        Reads the journal records that are not part of the snapshot yet.
+
+        A torn last line (interrupted write) is cut off, and a journal from an older
+        generation (compaction interrupted after the snapshot) is discarded; a read-only
+        store skips them without changing the file.
+        """
+        if not os.path.exists(self.journal_path):
+            return []
+
+        records = []
+        valid_bytes = 0
+        generation = None
+
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                valid_bytes += len(line)
+
+                if generation is None:
+                    generation = entry.get("generation", 0)
+                else:
+                    records.append(entry)
+
+        if generation is None or generation < self.generation:
+            if not self.read_only:
+                self._write_journal_header()
+            return []
+
+        if valid_bytes < os.path.getsize(self.journal_path) and not self.read_only:
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(valid_bytes)
+
+        self.generation = generation
+        return records
+
+
+def _positions_to_arrays(account_dict: dict) -> dict:
+    if not isinstance(account_dict, positions.PositionTable):
+        account_dict = positions.PositionTable.from_dict(account_dict)
+    columns = account_dict.to_columns()
+
+    # Never-priced positions are stored at their initial price
+    current_prices = np.where(np.isnan(columns["current_price"]), columns["initial_price"], columns["current_price"])
+    return {
+        "position_tickers": np.array(columns["tickers"], dtype=str),
+        "position_amount": columns["amount"].astype(np.int64),
+        "position_initial_price": columns["initial_price"],
+        "position_current_price": current_prices,
+    }
+
+
+def _positions_from_arrays(snapshot) -> positions.PositionTable:
+    return positions.PositionTable.from_columns(
+        snapshot["position_tickers"].tolist(),
+        *(snapshot["position_" + field.replace(" ", "_")] for field in POSITION_FIELDS)
+    )
+
+
+def _replay(record: dict, tickers_buy_dict: ledger.Ledger, tickers_sell_dict: ledger.Ledger,
+            account_dict: positions.PositionTable) -> None:
+    is_buy = record["side"] == "buy"
+    ticker = record["ticker"]
+
+    tickers_dict = tickers_buy_dict if is_buy else tickers_sell_dict
+    tickers_dict.add_ticker(ticker).append(record["num"], record["amount"], record["price"], record["date"])
+    account_dict.apply_trade(is_buy, ticker, record["amount"], record["price"])
+
+    if ticker in account_dict:
+        if record.get("quote") is not None:
+            account_dict.reprice(ticker, record["quote"])
+        elif "current price" not in account_dict[ticker]:
+            # Without a recorded quote the trade price stands in until the next refresh
+            account_dict.reprice(ticker, record["price"])
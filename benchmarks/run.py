@@ -0,0 +1,261 @@
+"""
+Benchmark runner for the ledger, account and profit hot paths.
+
+Generates a synthetic fixture folder and trade history for every scale, runs the
+timed scenarios against the offline LocalFileProvider and writes the results
+(ops/sec and peak traced memory per scenario) to a JSON file.
+
+Usage (from the repository root):
+    python -m benchmarks.run --scales 10 1000 100000 1000000 --output benchmark_results.json
+"""
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import calculate_func
+import market_data
+import portfolio_totals
+import user
+from benchmarks import synthetic
+
+DEFAULT_SCALES = [10, 1_000, 100_000, 1_000_000]
+
+
+def measure(setup, action, ops: int, trace_memory: bool = True) -> dict:
+    """
+    Times one scenario and, optionally, measures its peak traced memory in a second run.
+
+    Args:
+        setup (callable): Builds a fresh state for the scenario (not timed).
+        action (callable): Runs the scenario on the state returned by setup.
+        ops (int): Number of operations one action call performs.
+        trace_memory (bool, optional): Whether to run the traced memory pass.
+
+    Returns:
+        dict: {"ops", "seconds", "ops_per_sec", "peak_memory_bytes"}.
+    """
+    state = setup()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        action(state)
+        seconds = time.perf_counter() - start
+
+    peak = None
+    if trace_memory:
+        state = setup()
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                action(state)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "ops": ops,
+        "seconds": round(seconds, 6),
+        "ops_per_sec": round(ops / seconds, 3) if seconds > 0 else None,
+        "peak_memory_bytes": peak,
+    }
+
+
+def ingest(account: user.Account, trades: dict, first: int, last: int) -> None:
+    """Feeds trades[first:last] through Account.buy_stock / Account.sell_stock."""
+    for i in range(first, last):
+        ticker, amount, price = str(trades["ticker"][i]), int(trades["amount"][i]), float(trades["price"][i])
+        if trades["side"][i] == "buy":
+            account.buy_stock(ticker, amount, price, str(trades["date"][i]))
+        else:
+            account.sell_stock(ticker, amount, price, str(trades["date"][i]))
+
+
+def trade_records(trades: dict, first: int, last: int) -> pd.DataFrame:
+    """Returns trades[first:last] as a DataFrame accepted by Account.import_trades."""
+    return pd.DataFrame({column: values[first:last] for column, values in trades.items()})
+
+
+def run_scale(n_trades: int, args, tickers: list) -> dict:
+    """
+    Runs every scenario for one ledger size.
+
+    Returns:
+        dict: The scale description and its per-scenario results.
+    """
+    trades = synthetic.generate_trades(n_trades, tickers, args.start, args.end, seed=args.seed)
+    n_ingest = min(n_trades, args.max_ingest)
+    memory = not args.no_memory
+    results = {}
+
+    def new_account() -> user.Account:
+        return user.Account("bench", "bench")
+
+    # Row-by-row ingestion through the public API
+    results["buy_stock/sell_stock"] = measure(
+        new_account, lambda account: ingest(account, trades, 0, n_ingest), n_ingest, memory
+    )
+
+    # Same trades inside a deferred-recompute batch
+    def ingest_batch(account: user.Account) -> None:
+        with account.batch():
+            ingest(account, trades, 0, n_ingest)
+
+    results["batch buy_stock/sell_stock"] = measure(new_account, ingest_batch, n_ingest, memory)
+
+    # Bulk ingestion of the whole history
+    results["import_trades"] = measure(
+        new_account, lambda account: account.import_trades(trade_records(trades, 0, n_trades)), n_trades, memory
+    )
+
+    # Full-size account for the report scenarios
+    account = new_account()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ingest(account, trades, 0, n_ingest)
+        account.import_trades(trade_records(trades, n_ingest, n_trades))
+
+    busiest = max(account.tickers_buy_dict, key=lambda t: len(account.tickers_buy_dict[t]))
+    n_updates = min(1_000, n_trades)
+
+    def update_setup():
+        return copy.deepcopy(account.account_dict)
+
+    # Each update is followed by a read of the traded position's weight
+    def update_action(account_dict):
+        for _ in range(n_updates):
+            calculate_func.update_account_dict(
+                True, busiest, account_dict, account.tickers_sell_dict, account.tickers_buy_dict
+            )
+            account_dict[busiest]["percentage portfolio"]
+
+    results["update_account_dict"] = measure(update_setup, update_action, n_updates, memory)
+
+    # Same trades keeping running portfolio sums instead of re-summing the book: the copied
+    # table has no totals of its own above, here the weight is read from the running sums
+    def totals_setup():
+        account_dict = update_setup()
+        return account_dict, portfolio_totals.PortfolioTotals(account_dict)
+
+    def totals_action(state):
+        account_dict, totals = state
+        for _ in range(n_updates):
+            calculate_func.update_account_dict(
+                True, busiest, account_dict, account.tickers_sell_dict, account.tickers_buy_dict, totals
+            )
+            account_dict[busiest]["percentage portfolio"]
+
+    results["update_account_dict (running totals)"] = measure(totals_setup, totals_action, n_updates, memory)
+
+    # The position bookkeeping alone, without the quote lookup that dominates the scenarios above
+    trade_price = account.account_dict[busiest]["initial price"]
+
+    def position_action(account_dict):
+        for _ in range(n_updates):
+            calculate_func.apply_position_change(True, busiest, account_dict, 1, trade_price)
+            calculate_func.reprice_position(account_dict, busiest, trade_price)
+            account_dict[busiest]["percentage portfolio"]
+
+    results["position update + weight"] = measure(update_setup, position_action, n_updates, memory)
+    results["position update + weight (running totals)"] = measure(
+        lambda: totals_setup()[0], position_action, n_updates, memory
+    )
+
+    def dict_setup():
+        return account.account_dict.to_dict()
+
+    n_sums = 100
+    results["create_account_sum"] = measure(
+        dict_setup, lambda account_dict: [calculate_func.create_account_sum(account_dict) for _ in range(n_sums)],
+        n_sums, memory
+    )
+    results["PositionTable.total_row"] = measure(
+        update_setup, lambda table: [table.total_row() for _ in range(n_sums)], n_sums, memory
+    )
+
+    start, end = calculate_func.sub_date(args.start, args.end)
+    results["profit"] = measure(
+        lambda: {}, lambda profit_dict: calculate_func.profit(
+            busiest, start, end, account.tickers_buy_dict, account.tickers_sell_dict,
+            account.account_dict, profit_dict
+        ), 1, memory
+    )
+    results["show_profit"] = measure(
+        lambda: account, lambda acc: acc.show_profit("all", start, end), 1, memory
+    )
+
+    def table_setup():
+        account_dict = dict_setup()
+        calculate_func.create_account_sum(account_dict)
+        return account_dict
+
+    results["make_account_table"] = measure(table_setup, calculate_func.make_account_table, 1, memory)
+
+    return {
+        "trades": n_trades,
+        "tickers": len(account.tickers_buy_dict),
+        "positions": len(account.account_dict),
+        "ingested_via_api": n_ingest,
+        "results": results,
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    today = datetime.now()
+    parser = argparse.ArgumentParser(description="Benchmark the Moneyer ledger, account and profit paths.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="Number of trades per run (default: 10 1000 100000 1000000).")
+    parser.add_argument("--tickers", type=int, default=200, help="Number of synthetic tickers.")
+    parser.add_argument("--start", default=(today - timedelta(days=5 * 365)).strftime("%Y-%m-%d"),
+                        help="First trade date (default: five years ago).")
+    parser.add_argument("--end", default=(today - timedelta(days=1)).strftime("%Y-%m-%d"),
+                        help="Last trade date (default: yesterday).")
+    parser.add_argument("--max-ingest", type=int, default=20_000,
+                        help="Trades fed through buy_stock/sell_stock; the rest are bulk imported.")
+    parser.add_argument("--fixtures", default=None, help="Fixture folder (default: a temporary folder).")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced peak-memory pass.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    tickers = synthetic.ticker_names(args.tickers)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        fixtures = args.fixtures or os.path.join(temp_dir, "fixtures")
+        print(f"[*] Generating fixtures for {len(tickers)} tickers in {fixtures}...")
+        synthetic.generate_fixtures(fixtures, tickers, args.start, args.end, seed=args.seed)
+        market_data.set_provider(market_data.LocalFileProvider(fixtures))
+
+        report = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {k: v for k, v in vars(args).items() if k not in ("fixtures", "output")},
+            "scales": [],
+        }
+
+        for n_trades in args.scales:
+            print(f"[*] Running scale: {n_trades:,} trades...")
+            scale = run_scale(n_trades, args, tickers)
+            report["scales"].append(scale)
+
+            for name, result in scale["results"].items():
+                print(f"    {name:<28} {result['ops_per_sec'] or 0:>14,.1f} ops/sec")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[V] Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
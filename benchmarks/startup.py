@@ -0,0 +1,165 @@
+"""
+Cold-start benchmark: how long importing each entry module takes.
+
+Every module is imported in a fresh interpreter with '-X importtime', several times.
+The report gives, per entry module, the best wall time above a bare interpreter start,
+the modules that cost the most to import (cumulative microseconds) and which heavy
+third-party libraries ended up loaded. Entry modules over the budget are flagged and
+make the run exit with status 1, so the check can gate scripted invocations.
+
+Usage (from the repository root):
+    python -m benchmarks.startup --output startup_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+DEFAULT_MODULES = ["front_end", "user", "calculate_func", "account_registry", "market_data"]
+
+# Cold-start budget of an entry module, above a bare interpreter start
+DEFAULT_BUDGET_MS = 150.0
+
+HEAVY_LIBRARIES = ("numpy", "pandas", "yfinance", "pandas_market_calendars", "tabulate", "colorama")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code: str, importtime: bool = False) -> tuple:
+    """
+    Runs code in a fresh interpreter from the repository root.
+
+    Args:
+        code (str): The code passed to 'python -c'.
+        importtime (bool, optional): Whether to add '-X importtime'.
+
+    Returns:
+        tuple: (wall seconds, stdout, stderr).
+    """
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, completed.stdout, completed.stderr
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Parses the '-X importtime' log.
+
+    Args:
+        stderr (str): The interpreter's standard error.
+
+    Returns:
+        dict: module name -> (self microseconds, cumulative microseconds).
+    """
+    costs = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        costs[name.strip()] = (int(self_us), int(cumulative_us))
+    return costs
+
+
+def measure_baseline(repeat: int) -> tuple:
+    """
+    Measures a bare interpreter start.
+
+    Returns:
+        tuple: (best wall seconds, names of the modules imported at startup, e.g. by site).
+    """
+    runs = [run_python("import sys", importtime=True) for _ in range(repeat)]
+    seconds, _, stderr = min(runs, key=lambda run: run[0])
+    return seconds, set(parse_importtime(stderr))
+
+
+def measure_module(module: str, repeat: int, baseline: float, startup_modules: set) -> dict:
+    """
+    Measures the cold import of one entry module.
+
+    Args:
+        module (str): The module to import.
+        repeat (int): Fresh interpreters started (the best run is kept).
+        baseline (float): Best wall seconds of a bare interpreter start.
+        startup_modules (set): Modules every interpreter imports anyway (left out of top_imports).
+
+    Returns:
+        dict: {"wall_ms", "import_ms", "heavy_loaded", "top_imports"}.
+    """
+    probe = f"import sys; import {module}; print(','.join(m for m in {HEAVY_LIBRARIES!r} if m in sys.modules))"
+
+    best = None
+    for _ in range(repeat):
+        seconds, stdout, stderr = run_python(probe, importtime=True)
+        if best is None or seconds < best[0]:
+            best = (seconds, stdout, stderr)
+
+    seconds, stdout, stderr = best
+    costs = parse_importtime(stderr)
+    top = sorted(
+        ((name, cost) for name, cost in costs.items() if name not in startup_modules),
+        key=lambda item: item[1][1], reverse=True
+    )
+
+    return {
+        "wall_ms": round((seconds - baseline) * 1000, 1),
+        "import_ms": round(costs.get(module, (0, 0))[1] / 1000, 1),
+        "heavy_loaded": [name for name in stdout.strip().split(",") if name],
+        "top_imports": [
+            {"module": name, "self_ms": round(self_us / 1000, 2), "cumulative_ms": round(cumulative_us / 1000, 2)}
+            for name, (self_us, cumulative_us) in top[:10]
+        ],
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure the cold-start import cost of the Moneyer modules.")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="Entry modules to import.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module (best is kept).")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Cold-start budget per module above a bare interpreter (default: 150).")
+    parser.add_argument("--output", default="startup_results.json", help="JSON results file.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    baseline, startup_modules = measure_baseline(args.repeat)
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {k: v for k, v in vars(args).items() if k != "output"},
+        "interpreter_ms": round(baseline * 1000, 1),
+        "modules": {},
+    }
+
+    print(f"[*] Bare interpreter start: {baseline * 1000:.1f} ms")
+    over_budget = []
+    for module in args.modules:
+        result = measure_module(module, args.repeat, baseline, startup_modules)
+        report["modules"][module] = result
+
+        flag = "OK" if result["wall_ms"] <= args.budget_ms else "OVER BUDGET"
+        if flag != "OK":
+            over_budget.append(module)
+        heavy = ", ".join(result["heavy_loaded"]) or "none"
+        print(f"    {module:<20} {result['wall_ms']:>8.1f} ms  [{flag}]  heavy libraries loaded: {heavy}")
+        for entry in result["top_imports"][:3]:
+            print(f"        {entry['module']:<40} {entry['cumulative_ms']:>8.2f} ms")
+
+    report["over_budget"] = over_budget
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[V] Results written to {args.output}")
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Synthetic market data and trade ledgers for benchmarks.
+
+Everything is generated from a seed, so two runs with the same parameters produce the
+same fixtures and the same trades.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import trading_calendar
+
+
+def ticker_names(n_tickers: int) -> list:
+    """
+    Generates deterministic, unique ticker symbols ('TA', 'TB', ..., 'TAA', ...).
+
+    Args:
+        n_tickers (int): Number of symbols.
+
+    Returns:
+        list: The ticker symbols.
+    """
+    names = []
+    for i in range(n_tickers):
+        suffix = ""
+        i += 1
+        while i:
+            i, remainder = divmod(i - 1, 26)
+            suffix = chr(ord('A') + remainder) + suffix
+        names.append("T" + suffix)
+    return names
+
+
+def generate_fixtures(root: str, tickers: list, start_date: str, end_date: str, seed: int = 0) -> str:
+    """
+    Writes a LocalFileProvider fixture folder with random-walk daily bars.
+
+    Args:
+        root (str): Destination folder (created if needed).
+        tickers (list): The ticker symbols to generate.
+        start_date (str): First session ('YYYY-MM-DD').
+        end_date (str): Last session ('YYYY-MM-DD').
+        seed (int, optional): Random seed.
+
+    Returns:
+        str: The fixture folder path.
+    """
+    rng = np.random.default_rng(seed)
+    sessions = trading_calendar.get_calendar().sessions_between(start_date, end_date)
+    os.makedirs(os.path.join(root, "bars"), exist_ok=True)
+
+    last_prices = []
+    for ticker in tickers:
+        start_price = rng.uniform(20, 500)
+        closes = start_price * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(sessions))))
+        opens = closes * (1 + rng.normal(0, 0.005, len(sessions)))
+
+        pd.DataFrame({
+            "Date": sessions,
+            "Open": opens.round(4),
+            "High": (np.maximum(opens, closes) * 1.01).round(4),
+            "Low": (np.minimum(opens, closes) * 0.99).round(4),
+            "Close": closes.round(4),
+            "Volume": rng.integers(10_000, 5_000_000, len(sessions)),
+        }).to_csv(os.path.join(root, "bars", f"{ticker}.csv"), index=False)
+        last_prices.append(round(float(closes[-1]), 4))
+
+    pd.DataFrame({"Ticker": tickers, "Price": last_prices}).to_csv(os.path.join(root, "quotes.csv"), index=False)
+    pd.DataFrame({"Ticker": tickers, "Name": [f"{t} Corp" for t in tickers]}).to_csv(
+        os.path.join(root, "symbols.csv"), index=False
+    )
+
+    return root
+
+
+def generate_trades(n_trades: int, tickers: list, start_date: str, end_date: str,
+                    sell_ratio: float = 0.3, seed: int = 0) -> dict:
+    """
+    Generates a chronological trade history that never sells more than is held.
+
+    Args:
+        n_trades (int): Number of trades.
+        tickers (list): The ticker symbols to trade.
+        start_date (str): First possible trade date ('YYYY-MM-DD').
+        end_date (str): Last possible trade date ('YYYY-MM-DD').
+        sell_ratio (float, optional): Approximate share of sell orders.
+        seed (int, optional): Random seed.
+
+    Returns:
+        dict: Column arrays {"side", "ticker", "amount", "price", "date"} sorted by date,
+              where side is "buy" or "sell" and date is a 'YYYY-MM-DD' string.
+    """
+    rng = np.random.default_rng(seed)
+    sessions = np.array(trading_calendar.get_calendar().sessions_between(start_date, end_date))
+
+    dates = np.sort(rng.choice(sessions, n_trades))
+    codes = rng.integers(0, len(tickers), n_trades)
+    amounts = rng.integers(1, 100, n_trades)
+    prices = rng.uniform(20, 500, n_trades).round(2)
+    wants_sell = rng.random(n_trades) < sell_ratio
+
+    # Only sell what is already held (per ticker, in chronological order)
+    held = np.zeros(len(tickers), dtype=np.int64)
+    is_sell = np.zeros(n_trades, dtype=bool)
+    for i in range(n_trades):
+        code = codes[i]
+        if wants_sell[i] and held[code] >= amounts[i]:
+            is_sell[i] = True
+            held[code] -= amounts[i]
+        else:
+            held[code] += amounts[i]
+
+    return {
+        "side": np.where(is_sell, "sell", "buy"),
+        "ticker": np.array(tickers)[codes],
+        "amount": amounts,
+        "price": prices,
+        "date": dates,
+    }
@@ -1,9 +1,20 @@
-import yfinance as yf
+from __future__ import annotations
 from datetime import datetime, timedelta
-import pandas as pd
-import numpy as np
-from tabulate import tabulate
-import pandas_market_calendars as mcal
+from concurrent.futures import ThreadPoolExecutor
+import instrumentation
+import lazy_import
+import ledger
+import market_data
+import order_history
+import portfolio_totals
+import positions
+import price_store
+import symbol_cache
+import trading_calendar
+
+pd = lazy_import.module("pandas")
+np = lazy_import.module("numpy")
+tabulate = lazy_import.attribute("tabulate", "tabulate")
 
 
 def setup_pd() -> None:
@@ -66,6 +77,7 @@ def calculate_next_date(date_string: str, date_format: str = "%Y-%m-%d") -> str:
         return next_date.strftime(date_format)
     except ValueError as e:
         raise ValueError(f"Invalid date or format: {e}")
+@instrumentation.timed()
 def sub_date(start_date: str, end_date: str = "now") -> tuple:
     """
     Standardizes a date range by ensuring both dates are valid NASDAQ trading days.
@@ -93,27 +105,33 @@ def sub_date_helper(date: str) -> str:
     """
     Adjusts a given date backwards until a valid trading day is found.
 
-    This function attempts to validate a date. If validation fails (e.g., the market
-    was closed), it subtracts one day and retries until 'check_date' succeeds.
+    The date format is standardized first, then the precomputed NASDAQ calendar index
+    returns the latest session on or before it in a single lookup.
 
     Args:
         date (str): The initial date string to validate and potentially adjust.
 
     Returns:
         str: The nearest valid trading date (in the past) in 'YYYY-MM-DD' format.
+
+    Raises:
+        ValueError: If the date format is invalid or the date precedes the NASDAQ founding.
     """
-    while True:
-        try:
-            # Attempt to validate the current date
-            date = check_date(date)
-            break
-        except Exception:
-            # If invalid (market closed or format issue), subtract one day and retry
-            date_obj = datetime.strptime(date, "%Y-%m-%d")
-            date_obj = date_obj - timedelta(days=1)
-            date = date_obj.strftime("%Y-%m-%d")
+    fixed_date = fix_date_format(date)
+
+    if fixed_date == "Error":
+        raise ValueError(f"Invalid date format: {date}")
 
-    return date
+    # Latest trading day on or before the requested date
+    trading_day = trading_calendar.get_calendar().previous_open(fixed_date)
+
+    if trading_day is None:
+        raise ValueError(
+            f"The NASDAQ stock market did not exist before {trading_calendar.NASDAQ_FOUNDING_DATE}."
+        )
+
+    return trading_day
+@instrumentation.timed()
 def check_date(start_date: str) -> str:
     """
     Validates the format and market status of a specific date.
@@ -162,8 +180,8 @@ def check_start_date(start_date: str) -> bool:
             f"The NASDAQ stock market did not exist before {nasdaq_founding_date.strftime('%Y-%m-%d')}."
         )
 
-    # Check if the market was actually open on this specific day
-    if start_date in get_nasdaq_open_days(start_date, start_date):
+    # Check if the market was actually open on this specific day (constant-time index lookup)
+    if trading_calendar.get_calendar().is_open(start_date):
         return True
     else:
         raise ValueError(f"The NASDAQ stock market was closed on {start_date}.")
@@ -200,6 +218,7 @@ def fix_date_format(date_string: str) -> str:
 
     # Return "Error" as a sentinel value if no format matches
     return "Error"
+@instrumentation.timed()
 def get_nasdaq_open_days(start_date: str, end_date: str) -> list:
     """
     Retrieves a list of actual trading days when NASDAQ was open between two dates.
@@ -211,20 +230,18 @@ def get_nasdaq_open_days(start_date: str, end_date: str) -> list:
     Returns:
         list: A list of strings representing open trading days.
     """
-    # Load the official NASDAQ market calendar
-    nasdaq_calendar = mcal.get_calendar('NASDAQ')
-
-    # Fetch the market schedule for the specified range
-    schedule = nasdaq_calendar.schedule(start_date=start_date, end_date=end_date)
-
-    # Convert the resulting DatetimeIndex to a clean list of ISO date strings
-    open_days = schedule.index.strftime('%Y-%m-%d').tolist()
+    # Slice the precomputed NASDAQ session index instead of rebuilding the schedule
+    open_days = trading_calendar.get_calendar().sessions_between(start_date, end_date)
 
     return open_days
+@instrumentation.timed()
 def find_prices(ticker: str, start_date: str) -> list | None:
     """
     Fetches the stock's OHLCV (Open, High, Low, Close, Volume) data for a specific date.
 
+    Lookups are served by the persistent bar store (see price_store.py); only dates that
+    were never requested before trigger a ranged download from Yahoo Finance.
+
     Args:
         ticker (str): The stock ticker symbol (e.g., 'AAPL').
         start_date (str): The target date in 'YYYY-MM-DD' format.
@@ -233,49 +250,46 @@ def find_prices(ticker: str, start_date: str) -> list | None:
         list | None: A list containing [Open, High, Low, Close, Volume] as floats,
                      or None if data is unavailable or an error occurs.
     """
-    # Determine the next day to define the 1-day interval for history()
-    end_date = find_end_time(start_date)
-
     try:
-        stock = yf.Ticker(ticker)
-        # Fetch historical data for the specific day
-        data = stock.history(start=start_date, end=end_date, interval='1d')
+        # Served from disk when warm, otherwise fills a whole window around the date
+        prices = price_store.get_store().get_bar(ticker, start_date)
 
-        if data.empty:
+        if prices is None:
             raise ValueError(f"No trading data available for {ticker} on {start_date}.")
 
-        # Extract specific columns using iloc and ensure float type
-        open_price = float(data['Open'].iloc[0])
-        high_price = float(data['High'].iloc[0])
-        low_price = float(data['Low'].iloc[0])
-        close_price = float(data['Close'].iloc[0])
-        volume = float(data['Volume'].iloc[0])
-
-        return [open_price, high_price, low_price, close_price, volume]
+        return prices
 
     except Exception as e:
         print(f"Error fetching prices for {ticker}: {e}")
         return None
+@instrumentation.timed()
 def is_valid_ticker(ticker: str) -> bool:
     """
     Validates a ticker symbol by attempting to fetch its metadata from Yahoo Finance.
 
+    Results are cached with a time-to-live (see symbol_cache.py), so a ticker is only
+    looked up again once its cached result expires.
+
     Args:
         ticker (str): The ticker symbol to validate.
 
     Returns:
         bool: True if the ticker is recognized and has a valid profile, False otherwise.
     """
-    try:
-        stock = yf.Ticker(ticker)
-        # Fetching ticker information to confirm its existence
-        info = stock.get_info()
+    return symbol_cache.get_cache().is_valid(ticker)
+@instrumentation.timed()
+def validate_tickers(tickers: list, max_workers: int = symbol_cache.DEFAULT_MAX_WORKERS) -> dict:
+    """
+    Validates many ticker symbols at once, one lookup per distinct uncached symbol.
 
-        # A valid ticker typically contains a 'shortName' identifier
-        return 'shortName' in info and bool(info['shortName'])
-    except Exception as e:
-        print(f"Validation error for ticker '{ticker}': {e}")
-        return False
+    Args:
+        tickers (list): Ticker symbols to validate (duplicates allowed).
+        max_workers (int, optional): Maximum concurrent metadata requests.
+
+    Returns:
+        dict: A mapping of upper-cased ticker -> bool.
+    """
+    return symbol_cache.get_cache().validate_many(tickers, max_workers=max_workers)
 def now_date() -> str:
     """
     Retrieves the current system date in a standardized format.
@@ -284,6 +298,7 @@ def now_date() -> str:
         str: Today's date formatted as 'YYYY-MM-DD'.
     """
     return datetime.now().strftime("%Y-%m-%d")
+@instrumentation.timed()
 def profit(ticker: str, start_date_str: str, end_date_str: str,
            tickers_buy_dict: dict, tickers_sell_dict: dict,
            account_dict: dict, profit_dict: dict) -> dict:
@@ -528,6 +543,7 @@ def go_over_action(start_account_dict: dict, action: tuple, accrued_profit: floa
         raise ValueError(f"Unknown action type '{action_type}' in timeline processing!")
 
     return incremental_profit
+@instrumentation.timed()
 def create_timeline(ticker: str, start_date: datetime, end_date: datetime,
                     tickers_buy_dict: dict, tickers_sell_dict: dict) -> list:
     """
@@ -545,33 +561,18 @@ def create_timeline(ticker: str, start_date: datetime, end_date: datetime,
     """
     timeline = []
 
-    # Process Buy transactions
-    if ticker in tickers_buy_dict:
-        for i in range(len(tickers_buy_dict[ticker]["amount"])):
-            date_str = tickers_buy_dict[ticker]["date"][i]
-            current_date = datetime.strptime(date_str, "%Y-%m-%d")
-
-            if start_date <= current_date <= end_date:
-                timeline.append((
-                    "buy", ticker,
-                    tickers_buy_dict[ticker]["amount"][i],
-                    tickers_buy_dict[ticker]["price"][i],
-                    current_date
-                ))
-
-    # Process Sell transactions
-    if ticker in tickers_sell_dict:
-        for i in range(len(tickers_sell_dict[ticker]["amount"])):
-            date_str = tickers_sell_dict[ticker]["date"][i]
-            current_date = datetime.strptime(date_str, "%Y-%m-%d")
-
-            if start_date <= current_date <= end_date:
-                timeline.append((
-                    "sell", ticker,
-                    tickers_sell_dict[ticker]["amount"][i],
-                    tickers_sell_dict[ticker]["price"][i],
-                    current_date
-                ))
+    # Process Buy and Sell transactions; the rows inside the range are found by binary search
+    for order_type, tickers_dict in (("buy", tickers_buy_dict), ("sell", tickers_sell_dict)):
+        ticker_ledger = ledger.get_ticker_ledger(tickers_dict, ticker)
+        if ticker_ledger is None:
+            continue
+
+        rows = ticker_ledger.range_slice(start_date, end_date)
+        dates = ticker_ledger.dates[rows].astype("datetime64[us]").tolist()
+
+        for amount, price, current_date in zip(ticker_ledger.amounts[rows].tolist(),
+                                               ticker_ledger.prices[rows].tolist(), dates):
+            timeline.append((order_type, ticker, amount, price, current_date))
 
     # Append the termination point for the simulation
     timeline.append(("end", ticker, 0, 0, end_date))
@@ -589,20 +590,13 @@ def create_relevant_buy_dict(ticker: str, start_date: datetime, tickers_buy_dict
     Returns:
         list: A list of purchase amounts (integers) that are relevant to the start_date.
     """
-    relevant_buy_amounts = []
+    ticker_ledger = ledger.get_ticker_ledger(tickers_buy_dict, ticker)
 
-    if ticker not in tickers_buy_dict:
-        return relevant_buy_amounts
+    if ticker_ledger is None:
+        return []
 
-    # Iterate through dates and amounts simultaneously
-    for date_str, amount in zip(tickers_buy_dict[ticker]["date"], tickers_buy_dict[ticker]["amount"]):
-        transaction_date = datetime.strptime(date_str, "%Y-%m-%d")
-
-        # Include transactions that happened on or before the reconstruction date
-        if transaction_date <= start_date:
-            relevant_buy_amounts.append(amount)
-
-    return relevant_buy_amounts
+    # Include transactions that happened on or before the reconstruction date (sorted prefix)
+    return ticker_ledger.amounts[:ticker_ledger.count_until(start_date)].tolist()
 def create_relevant_sell_dict(ticker: str, start_date: datetime, tickers_sell_dict: dict) -> list:
     """
     Filters sale amounts for a ticker that occurred on or before a specific date.
@@ -615,18 +609,33 @@ def create_relevant_sell_dict(ticker: str, start_date: datetime, tickers_sell_di
     Returns:
         list: A list of sale amounts (integers) that are relevant to the start_date.
     """
-    relevant_sell_amounts = []
+    ticker_ledger = ledger.get_ticker_ledger(tickers_sell_dict, ticker)
 
-    if ticker not in tickers_sell_dict:
-        return relevant_sell_amounts
+    if ticker_ledger is None:
+        return []
+
+    return ticker_ledger.amounts[:ticker_ledger.count_until(start_date)].tolist()
+def holdings_at(ticker: str, date: datetime, tickers_buy_dict: dict, tickers_sell_dict: dict) -> int:
+    """
+    Calculates the net number of shares of a ticker held at the end of a specific date.
+
+    Args:
+        ticker (str): The stock ticker symbol.
+        date (datetime): The cutoff date (inclusive).
+        tickers_buy_dict (dict): Global purchase history.
+        tickers_sell_dict (dict): Global sales history.
 
-    for date_str, amount in zip(tickers_sell_dict[ticker]["date"], tickers_sell_dict[ticker]["amount"]):
-        transaction_date = datetime.strptime(date_str, "%Y-%m-%d")
+    Returns:
+        int: Shares bought minus shares sold on or before the date.
+    """
+    buy_ledger = ledger.get_ticker_ledger(tickers_buy_dict, ticker)
+    sell_ledger = ledger.get_ticker_ledger(tickers_sell_dict, ticker)
 
-        if transaction_date <= start_date:
-            relevant_sell_amounts.append(amount)
+    bought = buy_ledger.holdings_at(date) if buy_ledger is not None else 0
+    sold = sell_ledger.holdings_at(date) if sell_ledger is not None else 0
 
-    return relevant_sell_amounts
+    return bought - sold
+@instrumentation.timed()
 def create_start_account_dict(ticker: str, start_date: datetime,
                               tickers_buy_dict: dict, tickers_sell_dict: dict,
                               initial_invest: float, start_account_dict: dict) -> dict:
@@ -658,29 +667,26 @@ def create_start_account_dict(ticker: str, start_date: datetime,
         "percentage portfolio": 0
     }
 
-    # Gather all relevant transactions up to this date
-    relevant_buys = create_relevant_buy_dict(ticker, start_date, tickers_buy_dict)
-    relevant_sells = create_relevant_sell_dict(ticker, start_date, tickers_sell_dict)
+    # Calculate net shares held at that point in time (prefix-sum lookups on the ledgers)
+    start_account_dict[ticker]["amount"] = holdings_at(ticker, start_date, tickers_buy_dict, tickers_sell_dict)
 
-    # Calculate net shares held at that point in time
-    start_account_dict[ticker]["amount"] = sum(relevant_buys) - sum(relevant_sells)
-
-    # Lookback logic: Find the last valid closing price if the market was closed on start_date
+    # Lookback logic: Find the last valid closing price, stepping over closed days via the calendar index
+    calendar = trading_calendar.get_calendar()
     attempts = 0
-    search_date = start_date
+    search_date = calendar.previous_open(start_date)
     while True:
         try:
-            if attempts > 9:  # Limit search to 10 days back
+            if attempts > 9 or search_date is None:  # Limit search to 10 trading days back
                 start_account_dict[ticker]["current price"] = 0
                 break
 
             # Attempt to fetch the closing price for the specific date
-            price_data = find_prices(ticker, search_date.strftime("%Y-%m-%d"))
+            price_data = find_prices(ticker, search_date)
             start_account_dict[ticker]["current price"] = bring_price(price_data, 'close')
             break
         except Exception:
             attempts += 1
-            search_date -= timedelta(days=1)
+            search_date = calendar.previous_trading_day(search_date)
 
             # Finalize state metrics
     current_shares = start_account_dict[ticker]["amount"]
@@ -706,6 +712,10 @@ def update_dict_ticker_num(ticker: str, tickers_dict: dict) -> int:
     Returns:
         int: The next available transaction number (starts at 1).
     """
+    # Columnar ledgers track their highest number directly
+    if isinstance(tickers_dict[ticker], ledger.TickerLedger):
+        return tickers_dict[ticker].next_num()
+
     # Retrieve the existing list of numbers or an empty list if not found
     num_list = tickers_dict[ticker].get("num", [])
 
@@ -724,6 +734,11 @@ def update_dict_ticker(ticker: str, num: int, amount: int, stock_price: float,
         buy_sell_date (str): The transaction date in 'YYYY-MM-DD' format.
         tickers_dict (dict): The dictionary where data is stored.
     """
+    if isinstance(tickers_dict[ticker], ledger.TickerLedger):
+        # Columnar ledger: inserted at its date position
+        tickers_dict[ticker].append(num, amount, stock_price, buy_sell_date)
+        return None
+
     # Append values to their respective lists within the ticker's entry
     tickers_dict[ticker]["num"].append(num)
     tickers_dict[ticker]["amount"].append(amount)
@@ -762,6 +777,7 @@ def bring_price(price_list: list, order_type: str) -> float:
         return price_list[index]
     except (KeyError, IndexError):
         raise ValueError(f"Invalid order type or data list: {order_type}")
+@instrumentation.timed()
 def round_numeric_values(data: dict, precision: int = 3) -> dict:
     """
     Recursively rounds all numeric values (float, np.float64) in a nested dictionary.
@@ -780,6 +796,7 @@ def round_numeric_values(data: dict, precision: int = 3) -> dict:
                 inner_dict[key] = round(float(value), precision)
 
     return data
+@instrumentation.timed()
 def make_account_table(data: dict) -> None:
     """
     Standardizes portfolio data and prints a formatted table to the terminal.
@@ -854,51 +871,113 @@ def make_account_table(data: dict) -> None:
 
     else:
         raise ValueError(f"Invalid data structure. Keys found: {current_keys}")
-def refresh_current_price_in_account_dict(account_dict: dict) -> None:
+def make_profit_windows_table(reports: dict) -> None:
     """
-    Updates the 'current price' for all stocks in the dictionary using real-time data.
+    Prints the profit of several report windows side by side.
+
+    Each row is a ticker (plus the 'total' row) and each window column shows the
+    profit in dollars and its percentage change; '-' marks tickers not held in a window.
 
     Args:
-        account_dict (dict): Portfolio dictionary where keys are tickers.
+        reports (dict): window -> (start_date, profit_dict) where every profit_dict was
+                        completed by create_all_profit_dict.
     """
-    for ticker in account_dict:
-        # Skip the summary row
-        if ticker.lower() == 'total':
-            continue
+    tickers = []
+    for _, profit_dict in reports.values():
+        for ticker in profit_dict:
+            if ticker != "total" and ticker not in tickers:
+                tickers.append(ticker)
+
+    rows = []
+    for ticker in tickers + ["total"]:
+        row = [ticker.upper()]
+        for _, profit_dict in reports.values():
+            metrics = profit_dict.get(ticker)
+            if metrics is None:
+                row.append("-")
+            else:
+                row.append(f"{metrics['profit']:+,.2f} ({metrics['percentage change']:+.2f}%)")
+        rows.append(row)
+
+    headers = ["Ticker"] + [f"{window}\nsince {start}" for window, (start, _) in reports.items()]
+    formatted_table = tabulate(rows, headers=headers, tablefmt="fancy_grid", stralign="center")
+    print(f"\n[PROFIT BY WINDOW]\n{formatted_table}")
+def make_risk_table(risk_dict: dict, correlation: pd.DataFrame = None) -> None:
+    """
+    Prints the risk metrics of every position and of the portfolio, and optionally their correlations.
 
-        new_price = get_current_price(ticker)
-        if new_price is not None:
-            account_dict[ticker]["current price"] = new_price
-def make_order_table(data: dict) -> str:
+    Args:
+        risk_dict (dict): ticker -> {"volatility", "sharpe", "sortino", "max drawdown", "beta"},
+                          including a 'total' entry (see risk.portfolio_risk).
+        correlation (pd.DataFrame, optional): Ticker x ticker correlation matrix.
     """
-    Creates a formatted ASCII table from a dictionary of order data.
+    table = pd.DataFrame.from_dict(risk_dict, orient="index")
+    table.index.name = "Ticker"
+    table.reset_index(inplace=True)
 
-    Transposes the dictionary (where keys are headers and values are lists)
-    into a row-based format suitable for tabular display.
+    # Fractions are shown as percentages
+    table["volatility"] = table["volatility"] * 100
+    table["max drawdown"] = table["max drawdown"] * 100
+    table.columns = ["Ticker", "Volatility (%)", "Sharpe", "Sortino", "Max Drawdown (%)", "Beta"]
 
-    Args:
-        data (dict): Dictionary with column names as keys and data lists as values.
+    formatted_table = tabulate(
+        table.round(3),
+        headers="keys",
+        tablefmt="fancy_grid",
+        numalign="right",
+        stralign="center",
+        showindex=False
+    )
+    print(f"\n[RISK ANALYSIS REPORT]\n{formatted_table}")
 
-    Returns:
-        str: A string containing the formatted table.
+    if correlation is not None and not correlation.empty:
+        formatted_table = tabulate(correlation.round(2), headers="keys", tablefmt="grid", numalign="center")
+        print(f"\n[CORRELATION MATRIX]\n{formatted_table}")
+def make_tax_lot_table(summary: dict, method: str) -> None:
     """
-    if not data or not any(data.values()):
-        return "No order data available."
+    Prints realized and unrealized P&L per ticker from a tax-lot summary.
 
-    # Create a DataFrame and transpose to align data into columns
-    table_df = pd.DataFrame.from_dict(data, orient="index").T
+    Args:
+        summary (dict): ticker -> metrics including a 'total' entry (see tax_lots.TaxLotEngine.summary).
+            An unrealized P&L of None (unpriced ticker) is shown as 'n/a'.
+        method (str): The lot matching method, shown in the title.
+    """
+    table = pd.DataFrame.from_dict(round_numeric_values(summary), orient="index")
+    table.index.name = "Ticker"
+    table.reset_index(inplace=True)
+    table.columns = [
+        "Ticker", "Open Lots", "Open Amt", "Realized ($)", "Short-Term ($)", "Long-Term ($)", "Unrealized ($)"
+    ]
+    # Tickers without a price have no unrealized P&L
+    table = table.astype(object).where(table.notna(), None)
 
-    # Generate the formatted table using a clean grid style
     formatted_table = tabulate(
-        table_df,
+        table,
         headers="keys",
-        tablefmt="grid",
-        numalign="center",
+        tablefmt="fancy_grid",
+        numalign="right",
         stralign="center",
-        showindex=False
+        showindex=False,
+        missingval="n/a"
     )
+    print(f"\n[TAX LOTS - {method.upper()}]\n{formatted_table}")
+def refresh_current_price_in_account_dict(account_dict: dict) -> None:
+    """
+    Updates the 'current price' for all stocks in the dictionary using real-time data.
+
+    All prices are fetched in a single bulk quote request (see get_current_prices).
 
-    return formatted_table
+    Args:
+        account_dict (dict): Portfolio dictionary where keys are tickers.
+    """
+    # One batched quote request for every held ticker instead of one round trip each
+    tickers = [ticker for ticker in account_dict if ticker.lower() != 'total']
+    new_prices = get_current_prices(tickers)
+
+    for ticker in tickers:
+        new_price = new_prices.get(ticker)
+        if new_price is not None:
+            account_dict[ticker]["current price"] = float(new_price)
 def super_update(tickers_dict: dict, ticker: str, amount: int,
                  price_per_stock: float = None, date: str = None) -> None:
     """
@@ -930,13 +1009,193 @@ def super_update(tickers_dict: dict, ticker: str, amount: int,
 
     # 4. Perform a single update call with the prepared data
     update_dict_ticker(ticker, num, amount, price_per_stock, date, tickers_dict)
-def show_order_info(tickers_dict: dict, order_type: str) -> None:
+def read_trades(source) -> pd.DataFrame:
+    """
+    Loads trade records from a CSV file, a DataFrame or an iterable of records.
+
+    Expected columns (case-insensitive): 'ticker', 'side' ('buy' or 'sell'), 'amount',
+    and optionally 'price' and 'date'. Missing dates default to the latest trading day and
+    missing prices are later filled with the closing price of the trade date.
+
+    Args:
+        source (str | pd.DataFrame | iterable): CSV path, DataFrame or records (dicts).
+
+    Returns:
+        pd.DataFrame: Normalized trades with upper-cased tickers and lower-cased sides.
+
+    Raises:
+        ValueError: If required columns are missing or a side is unknown.
+    """
+    if isinstance(source, str):
+        trades = pd.read_csv(source)
+    elif isinstance(source, pd.DataFrame):
+        trades = source.copy()
+    else:
+        trades = pd.DataFrame.from_records(list(source))
+
+    trades.columns = [str(column).strip().lower() for column in trades.columns]
+
+    missing = {"ticker", "side", "amount"} - set(trades.columns)
+    if missing:
+        raise ValueError(f"Trade records are missing the columns: {', '.join(sorted(missing))}")
+
+    for column in ("price", "date"):
+        if column not in trades.columns:
+            trades[column] = None
+
+    trades["ticker"] = trades["ticker"].astype(str).str.strip().str.upper()
+    trades["side"] = trades["side"].astype(str).str.strip().str.lower()
+    trades["amount"] = trades["amount"].astype(int)
+    trades["price"] = pd.to_numeric(trades["price"], errors="coerce")
+
+    if pd.api.types.is_datetime64_any_dtype(trades["date"]):
+        trades["date"] = trades["date"].dt.strftime("%Y-%m-%d")
+
+    unknown_sides = set(trades["side"]) - {"buy", "sell"}
+    if unknown_sides:
+        raise ValueError(f"Unknown trade sides: {', '.join(sorted(unknown_sides))}. Use 'buy' or 'sell'.")
+
+    return trades.reset_index(drop=True)
+def validate_trade_dates(trades: pd.DataFrame) -> None:
+    """
+    Standardizes the 'date' column and checks every distinct date against the market calendar once.
+
+    Args:
+        trades (pd.DataFrame): Normalized trades, updated in-place.
+
+    Raises:
+        ValueError: If a date has an invalid format or the market was closed on it.
+    """
+    if trades["date"].isna().any():
+        trades["date"] = trades["date"].where(trades["date"].notna(), sub_date_helper(now_date()))
+    trades["date"] = trades["date"].astype(str)
+
+    # Each distinct date is parsed and checked once, whatever the number of trades on it
+    checked = {}
+    for date in trades["date"].unique():
+        checked[date] = check_date(date)
+
+    trades["date"] = trades["date"].map(checked)
+def fill_missing_trade_prices(trades: pd.DataFrame, max_workers: int = symbol_cache.DEFAULT_MAX_WORKERS) -> None:
+    """
+    Fills missing trade prices with the closing price of the trade date.
+
+    Each ticker needs a single ranged bar lookup spanning its priceless trades, and
+    tickers are resolved concurrently.
+
+    Args:
+        trades (pd.DataFrame): Trades with standardized dates, updated in-place.
+        max_workers (int, optional): Maximum number of tickers priced at the same time.
+
+    Raises:
+        ValueError: If no closing price exists for a trade date.
+    """
+    missing = trades["price"].isna()
+    if not missing.any():
+        return
+
+    groups = list(trades[missing].groupby("ticker")["date"])
+
+    def closes_for(group: tuple) -> dict:
+        ticker, dates = group
+        bars = price_store.get_store().get_bars(ticker, dates.min(), dates.max())
+        return {bar[0]: bar[4] for bar in bars}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups)))) as pool:
+        closes = dict(zip((ticker for ticker, _ in groups), pool.map(closes_for, groups)))
+
+    for index in trades.index[missing]:
+        ticker, date = trades.at[index, "ticker"], trades.at[index, "date"]
+        if date not in closes[ticker]:
+            raise ValueError(f"No trading data available for {ticker} on {date}.")
+        trades.at[index, "price"] = closes[ticker][date]
+@instrumentation.timed()
+def import_trades(trades: pd.DataFrame, tickers_buy_dict: dict, tickers_sell_dict: dict,
+                  account_dict: dict, max_workers: int = symbol_cache.DEFAULT_MAX_WORKERS) -> int:
     """
-    Iterates through all tickers and prints their detailed transaction history.
+    Validates, prices and appends a batch of trades to the ledgers and positions in one pass.
+
+    Nothing is written unless the whole batch is valid: tickers are validated in bulk,
+    dates are checked once per distinct date, missing prices are fetched per ticker, and
+    sells are checked against the running holdings in date order (records of the same
+    date keep their file order, which also gives their trade numbers). Market-price
+    dependent metrics are not refreshed here (see refresh_account_dict).
+
+    Args:
+        trades (pd.DataFrame): Normalized trades (see read_trades).
+        tickers_buy_dict (dict): Purchase history, updated in-place.
+        tickers_sell_dict (dict): Sales history, updated in-place.
+        account_dict (dict): Portfolio state, updated in-place (amounts and average costs).
+        max_workers (int, optional): Concurrency of ticker validation and price lookups.
+
+    Returns:
+        int: The number of imported trades.
+
+    Raises:
+        ValueError: If a ticker, date, price or sell amount is invalid.
+    """
+    if trades.empty:
+        return 0
+
+    # 1. One validation per distinct ticker
+    validity = validate_tickers(trades.loc[trades["side"] == "buy", "ticker"].unique().tolist(), max_workers)
+    invalid = [ticker for ticker, valid in validity.items() if not valid]
+    if invalid:
+        raise ValueError(f"These tickers are invalid: {', '.join(invalid)}")
+
+    # 2. One calendar check per distinct date, then prices for the trades that lack one
+    validate_trade_dates(trades)
+    fill_missing_trade_prices(trades, max_workers)
+
+    # Chronological order, so a file that is not sorted by date is not rejected; the index
+    # still holds each record's position in the file
+    trades = trades.sort_values("date", kind="stable")
+
+    # 3. Dry run of the holdings so that a bad sell leaves the account untouched
+    held = {ticker: info["amount"] for ticker, info in account_dict.items() if ticker.lower() != "total"}
+    for position, ticker, side, amount in zip(trades.index, trades["ticker"], trades["side"], trades["amount"]):
+        if side == "buy":
+            held[ticker] = held.get(ticker, 0) + amount
+        elif amount > held.get(ticker, 0):
+            raise ValueError(
+                f"Record {position}: you want to sell {amount} {ticker} stocks but you have only {held.get(ticker, 0)}."
+            )
+        else:
+            held[ticker] -= amount
+
+    # 4. Single pass over the records
+    for ticker, side, amount, price, date in zip(trades["ticker"], trades["side"], trades["amount"],
+                                                 trades["price"], trades["date"]):
+        tickers_dict = tickers_buy_dict if side == "buy" else tickers_sell_dict
+        if ticker not in tickers_dict:
+            tickers_dict[ticker] = {"num": [], "amount": [], "price": [], "date": []}
+
+        num = update_dict_ticker_num(ticker, tickers_dict)
+        update_dict_ticker(ticker, num, int(amount), float(price), date, tickers_dict)
+        apply_position_change(side == "buy", ticker, account_dict, int(amount), float(price))
+
+    return len(trades)
+@instrumentation.timed()
+def show_order_info(tickers_dict: dict, order_type: str, ticker=None, start_date: str = None,
+                    end_date: str = None, page: int = 1, page_size: int = order_history.DEFAULT_PAGE_SIZE,
+                    pause=None, **filters) -> int:
+    """
+    Prints the transaction history of one side, newest first, one page at a time.
 
     Args:
         tickers_dict (dict): Dictionary containing the history of orders.
         order_type (str): Type of info to display ('buy' or 'sell').
+        ticker (str | list, optional): Ticker or tickers to show. Defaults to all.
+        start_date (str, optional): First date (YYYY-MM-DD).
+        end_date (str, optional): Last date (YYYY-MM-DD).
+        page (int, optional): First page to print (1-based).
+        page_size (int, optional): Orders per page.
+        pause (callable, optional): Called between pages; the next page is printed only if
+            it returns True. Defaults to printing a single page.
+        **filters: min_amount, max_amount, min_price and max_price (see order_history.query).
+
+    Returns:
+        int: The number of orders printed.
 
     Raises:
         ValueError: If an invalid order_type is provided.
@@ -944,30 +1203,23 @@ def show_order_info(tickers_dict: dict, order_type: str) -> None:
     # Validate and set header title
     if order_type.lower() == "buy":
         print("\n[HISTORICAL BUYING ACTIVITY]")
+        order_query = order_history.query(tickers_buy_dict=tickers_dict, ticker=ticker, start_date=start_date,
+                                          end_date=end_date, page_size=page_size, **filters)
     elif order_type.lower() == "sell":
         print("\n[HISTORICAL SELLING ACTIVITY]")
+        order_query = order_history.query(tickers_sell_dict=tickers_dict, ticker=ticker, start_date=start_date,
+                                          end_date=end_date, page_size=page_size, **filters)
     else:
         raise ValueError(f"Invalid order_type: {order_type}. Use 'buy' or 'sell'.")
 
     print("=" * 30)
 
-    # Display a table for each ticker in the history
-    for ticker, history in tickers_dict.items():
-        print(f"\nTicker: {ticker.upper()}")
-
-        # Prepare the data structure for the table maker
-        table_data = {
-            "ID": history["num"],
-            "Amount": history["amount"],
-            "Price ($)": history["price"],
-            "Date": history["date"],
-        }
-
-        # Render and print the table
-        print(make_order_table(table_data))
+    # Pages are read from the ledgers only as they are printed
+    return order_history.print_pages(order_query, page, pause)
+@instrumentation.timed()
 def get_current_price(ticker_symbol: str) -> float | None:
     """
-    Fetches the real-time market price of a stock using yfinance.
+    Fetches the real-time market price of a stock through the active market-data provider.
 
     Args:
         ticker_symbol (str): The stock ticker symbol (e.g., 'AAPL').
@@ -982,9 +1234,7 @@ def get_current_price(ticker_symbol: str) -> float | None:
         return None
 
     try:
-        stock = yf.Ticker(ticker_symbol)
-        # fast_info provides low-latency access to the last price
-        current_price = stock.fast_info["last_price"]
+        current_price = market_data.get_provider().quote(ticker_symbol)
 
         if current_price is None:
             raise ValueError(f"No price data found for {ticker_symbol}")
@@ -992,8 +1242,138 @@ def get_current_price(ticker_symbol: str) -> float | None:
         return float(current_price)
     except Exception as e:
         raise ValueError(f"Could not retrieve price for '{ticker_symbol}': {e}")
+@instrumentation.timed()
+def get_current_prices(tickers: list) -> pd.Series:
+    """
+    Fetches the latest market prices of many stocks through the active market-data provider.
+
+    The Yahoo Finance provider downloads the symbols together in a few batched requests
+    (see market_data.YahooProvider.quotes).
+
+    Args:
+        tickers (list): The stock ticker symbols (the 'total' row is ignored).
+
+    Returns:
+        pd.Series: Last prices indexed by upper-cased ticker. Symbols without data are omitted.
+    """
+    symbols = list(dict.fromkeys(t.upper() for t in tickers if t.lower() != "total"))
+
+    if not symbols:
+        return pd.Series(dtype=float)
+
+    return market_data.get_provider().quotes(symbols)
+@instrumentation.timed()
+def refresh_account_dict(account_dict: dict, totals: portfolio_totals.PortfolioTotals = None) -> dict:
+    """
+    Re-prices every holding with one bulk quote request and recomputes all derived metrics.
+
+    Args:
+        account_dict (dict): The portfolio state to be refreshed in-place.
+        totals (PortfolioTotals, optional): Running portfolio sums of account_dict, rebuilt
+            from the new prices.
+
+    Returns:
+        dict: The refreshed account_dict.
+    """
+    tickers = [ticker for ticker in account_dict if ticker.lower() != 'total']
+    return reprice_account_dict(account_dict, get_current_prices(tickers), totals)
+@instrumentation.timed()
+def reprice_account_dict(account_dict: dict, prices, totals: portfolio_totals.PortfolioTotals = None) -> dict:
+    """
+    Applies already fetched market prices to every holding and recomputes all derived metrics.
+
+    Lets many portfolios share the result of one bulk quote request.
+
+    Args:
+        account_dict (dict | positions.PositionTable): The portfolio state to be updated in-place.
+        prices (Mapping): ticker -> last price (e.g., the Series of get_current_prices).
+        totals (PortfolioTotals, optional): Running portfolio sums of account_dict, rebuilt
+            from the new prices.
+
+    Returns:
+        dict: The repriced account_dict.
+    """
+    if isinstance(account_dict, positions.PositionTable):
+        # One column update for the whole book
+        unpriced = account_dict.reprice_many(prices)
+        for ticker, price in quote_unpriced(unpriced).items():
+            account_dict.reprice(ticker, price)
+    else:
+        holdings = {ticker: data for ticker, data in account_dict.items() if ticker.lower() != 'total'}
+        for ticker, data in holdings.items():
+            new_price = prices.get(ticker)
+            if new_price is not None:
+                data["current price"] = float(new_price)
+
+        unpriced = [ticker for ticker, data in holdings.items() if "current price" not in data]
+        for ticker, price in quote_unpriced(unpriced).items():
+            holdings[ticker]["current price"] = price
+
+        for data in holdings.values():
+            update_position_metrics(data, data["current price"])
+
+    if totals is not None:
+        totals.rebuild(account_dict)
+
+    # Refresh portfolio-wide weights once for the whole book
+    update_percentage_portfolio(account_dict, totals)
+
+    return account_dict
+def quote_unpriced(tickers: list, max_workers: int = symbol_cache.DEFAULT_MAX_WORKERS) -> dict:
+    """
+    Quotes the holdings a bulk quote request could not price (e.g., brand new listings).
+
+    The single-ticker lookups run concurrently, so the batch costs about one round trip
+    instead of one per ticker.
+
+    Args:
+        tickers (list): The stock ticker symbols.
+        max_workers (int, optional): Maximum number of tickers quoted at the same time.
+
+    Returns:
+        dict: ticker -> last price.
+
+    Raises:
+        ValueError: If a price cannot be retrieved (see get_current_price).
+    """
+    if not tickers:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers)))) as pool:
+        return dict(zip(tickers, pool.map(get_current_price, tickers)))
+def reprice_position(account_dict: dict, ticker: str, current_market_price: float) -> None:
+    """
+    Sets the market price of one holding and recomputes its metrics.
+
+    Args:
+        account_dict (dict | positions.PositionTable): The portfolio state, updated in-place.
+        ticker (str): A held ticker.
+        current_market_price (float): The latest market price per share.
+    """
+    if isinstance(account_dict, positions.PositionTable):
+        # Metrics of a table row are derived from its price
+        account_dict.reprice(ticker, current_market_price)
+    else:
+        update_position_metrics(account_dict[ticker], current_market_price)
+def update_position_metrics(data: dict, current_market_price: float) -> None:
+    """
+    Recomputes the market-price dependent metrics of a single holding.
+
+    Args:
+        data (dict): The holding entry of account_dict (needs 'amount' and 'initial price').
+        current_market_price (float): The latest market price per share.
+    """
+    amt = data["amount"]
+    init_p = data["initial price"]
+
+    data["current price"] = current_market_price
+    data["stock value in portfolio"] = amt * current_market_price
+    data["price change"] = (current_market_price - init_p) * amt
+    data["percentage change"] = ((current_market_price - init_p) / init_p) * 100
+@instrumentation.timed()
 def update_account_dict(order_type_buy: bool, ticker: str, account_dict: dict,
-                        sell_dict: dict = None, buy_dict: dict = None) -> dict:
+                        sell_dict: dict = None, buy_dict: dict = None,
+                        totals: portfolio_totals.PortfolioTotals = None) -> dict:
     """
     Updates the portfolio state based on a Buy or Sell transaction.
 
@@ -1006,6 +1386,11 @@ def update_account_dict(order_type_buy: bool, ticker: str, account_dict: dict,
         account_dict (dict): The portfolio state to be updated.
         sell_dict (dict, optional): Transaction history for sells.
         buy_dict (dict, optional): Transaction history for buys.
+        totals (PortfolioTotals, optional): Running portfolio sums of account_dict. When
+            given, only the traded position's contribution is updated (O(1)) instead of
+            re-summing the book. A positions.PositionTable with these totals attached has
+            already updated them and reads its weights from them; a plain dict gets every
+            weight rewritten from the running total, so none is left stale.
 
     Returns:
         dict: The updated account_dict.
@@ -1020,10 +1405,55 @@ def update_account_dict(order_type_buy: bool, ticker: str, account_dict: dict,
     ticker = ticker.upper()
     current_market_price = get_current_price(ticker)
 
+    if order_type_buy:
+        _, amount, price, _ = ledger.get_ticker_ledger(buy_dict, ticker).last_trade()
+    else:
+        _, amount, price, _ = ledger.get_ticker_ledger(sell_dict, ticker).last_trade()
+
+    apply_position_change(order_type_buy, ticker, account_dict, amount, price)
+
+    # --- POST-TRANSACTION RECALCULATION ---
+    # If the ticker still exists in the portfolio, update its performance metrics
+    if ticker in account_dict:
+        reprice_position(account_dict, ticker, current_market_price)
+
+    if totals is not None:
+        # A PositionTable keeps its attached totals current itself
+        if getattr(account_dict, "totals", None) is not totals:
+            totals.update(ticker, account_dict.get(ticker))
+        # Weights of a plain dict are rewritten from the running total (a PositionTable reads its own)
+        totals.write_weights(account_dict)
+        return account_dict
+
+    # Refresh portfolio-wide weights
+    update_percentage_portfolio(account_dict)
+
+    return account_dict
+def apply_position_change(order_type_buy: bool, ticker: str, account_dict: dict,
+                          amount: int, price: float) -> None:
+    """
+    Applies a single trade to the share amount and weighted average cost of a holding.
+
+    Market-price dependent metrics are left untouched (see update_position_metrics).
+
+    Args:
+        order_type_buy (bool): True for a Buy order, False for a Sell order.
+        ticker (str): The stock ticker symbol.
+        account_dict (dict | positions.PositionTable): The portfolio state to be updated in-place.
+        amount (int): The number of shares traded.
+        price (float): The trade price per share.
+
+    Raises:
+        ValueError: If trying to sell more shares than owned.
+    """
+    if isinstance(account_dict, positions.PositionTable):
+        account_dict.apply_trade(order_type_buy, ticker, amount, price)
+        return
+
     # --- CASE 1: BUY ORDER ---
     if order_type_buy:
-        new_shares = buy_dict[ticker]["amount"][-1]
-        new_buy_price = buy_dict[ticker]["price"][-1]
+        new_shares = amount
+        new_buy_price = price
 
         if ticker not in account_dict:
             # Initialize new ticker entry
@@ -1044,8 +1474,8 @@ def update_account_dict(order_type_buy: bool, ticker: str, account_dict: dict,
 
     # --- CASE 2: SELL ORDER ---
     else:
-        shares_to_sell = sell_dict[ticker]["amount"][-1]
-        current_shares = account_dict[ticker]["amount"]
+        shares_to_sell = amount
+        current_shares = account_dict[ticker]["amount"] if ticker in account_dict else 0
         remaining_shares = current_shares - shares_to_sell
 
         if remaining_shares < 0:
@@ -1055,30 +1485,24 @@ def update_account_dict(order_type_buy: bool, ticker: str, account_dict: dict,
             del account_dict[ticker]
         else:
             account_dict[ticker]["amount"] = remaining_shares
-
-    # --- POST-TRANSACTION RECALCULATION ---
-    # If the ticker still exists in the portfolio, update its performance metrics
-    if ticker in account_dict:
-        data = account_dict[ticker]
-        amt = data["amount"]
-        init_p = data["initial price"]
-
-        data["current price"] = current_market_price
-        data["stock value in portfolio"] = amt * current_market_price
-        data["price change"] = (current_market_price - init_p) * amt
-        data["percentage change"] = ((current_market_price - init_p) / init_p) * 100
-
-    # Refresh portfolio-wide weights
-    update_percentage_portfolio(account_dict)
-
-    return account_dict
-def update_percentage_portfolio(account_dict: dict) -> None:
+def update_percentage_portfolio(account_dict: dict, totals: portfolio_totals.PortfolioTotals = None) -> None:
     """
     Calculates the weight of each stock relative to the total portfolio value.
 
+    A positions.PositionTable reads its weights from its running totals and is left as it is.
+
     Args:
         account_dict (dict): The portfolio dictionary to update.
+        totals (PortfolioTotals, optional): Running portfolio sums of account_dict, which
+            spare the pass summing the portfolio value.
     """
+    if isinstance(account_dict, positions.PositionTable):
+        return
+
+    if totals is not None:
+        totals.write_weights(account_dict)
+        return
+
     total_val = calculate_sum_portfolio(account_dict)
 
     if total_val == 0:
@@ -1108,7 +1532,8 @@ def calculate_sum_portfolio(account_dict: dict) -> float:
         for ticker, info in account_dict.items()
         if ticker.lower() != "total"
     )
-def create_account_sum(account_dict: dict) -> None:
+@instrumentation.timed()
+def create_account_sum(account_dict: dict, totals: portfolio_totals.PortfolioTotals = None) -> None:
     """
     Generates a 'total' summary entry in the account dictionary.
 
@@ -1117,29 +1542,14 @@ def create_account_sum(account_dict: dict) -> None:
 
     Args:
         account_dict (dict): The portfolio dictionary to be modified in-place.
+        totals (PortfolioTotals, optional): Running portfolio sums of account_dict; the
+            row is read from them in O(1). Defaults to summing the holdings in one pass.
     """
-    # 1. Aggregate fundamental metrics
-    total_shares = calculate_total_amount_of_stock(account_dict)
-    avg_init_price = calculate_average_initial_price(account_dict)
-    total_market_value = calculate_total_value_in_portfolio(account_dict)
-    total_pl_abs = calculate_total_price_change(account_dict)
+    if totals is None:
+        totals = portfolio_totals.PortfolioTotals(account_dict)
 
-    # 2. Calculate derivative metrics with safety checks
-    overall_perc_change = calculate_percentage_change(
-        avg_init_price, total_shares, total_market_value
-    )
-    avg_curr_price = calculate_average_current_price(total_market_value, total_shares)
-
-    # 3. Commit the summary row
-    account_dict["total"] = {
-        "amount": total_shares,
-        "initial price": avg_init_price,
-        "current price": avg_curr_price,
-        "stock value in portfolio": total_market_value,
-        "price change": total_pl_abs,
-        "percentage change": overall_perc_change,
-        "percentage portfolio": 100.0  # Total portfolio is always 100% of itself
-    }
+    # Total portfolio is always 100% of itself
+    account_dict["total"] = totals.total_row()
 def calculate_average_current_price(total_market_value: float, total_shares: int) -> float:
     """
     Calculates the volume-weighted average current price of the portfolio.
@@ -1399,6 +1809,7 @@ def update_percentage_in_portfolio(profit_dict: dict, total_final_value: float)
         profit_dict[ticker]["percentage in portfolio"] = (final_val / total_final_value) * 100
 
     return profit_dict
+@instrumentation.timed()
 def create_all_profit_dict(profit_dict: dict) -> dict:
     """
     Aggregates all performance metrics into a 'total' summary row for the profit report.
@@ -0,0 +1,187 @@
+"""
+Daily portfolio value time series (equity curve).
+
+For every ticker the closes of the whole window come from one ranged close lookup, and
+the holdings and cost basis of every session are read off the ledgers with a single
+searchsorted over the trade dates, so the result is a ticker x session matrix rather
+than one price request per day.
+
+The cost basis follows the weighted average cost method of the account positions
+(calculate_func.apply_position_change): buys move the average cost, sells keep it,
+and a position sold out starts over.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+import lazy_import
+import ledger
+import price_store
+import trading_calendar
+
+np = lazy_import.module("numpy")
+pd = lazy_import.module("pandas")
+
+# Sessions searched backwards for the close that is carried into the first day
+LOOKBACK_SESSIONS = 10
+
+DEFAULT_MAX_WORKERS = 8
+
+FIELDS = ("holdings", "market value", "cost basis", "pnl")
+
+
+def daily_closes(ticker: str, sessions: list, lookback: int = LOOKBACK_SESSIONS) -> np.ndarray:
+    """
+    Returns the close of a ticker on each session, carrying the last known close forward.
+
+    Args:
+        ticker (str): The stock ticker symbol.
+        sessions (list | np.ndarray): Consecutive trading days ('YYYY-MM-DD' strings or datetime64[D]).
+        lookback (int, optional): Sessions before the first day searched for a close.
+
+    Returns:
+        np.ndarray: float64 closes; NaN before the first available bar.
+    """
+    session_days = np.asarray(sessions, dtype=ledger.DATE_DTYPE)
+    first_day, last_day = str(session_days[0]), str(session_days[-1])
+    range_start = trading_calendar.get_calendar().shift(first_day, -lookback) or first_day
+
+    try:
+        bar_dates, bar_closes = price_store.get_store().get_close_array(ticker, range_start, last_day)
+    except Exception as e:
+        print(f"Error fetching prices for {ticker}: {e}")
+        return np.full(len(sessions), np.nan)
+
+    if len(bar_dates) == 0:
+        return np.full(len(sessions), np.nan)
+
+    # Last bar on or before each session
+    position = np.searchsorted(bar_dates, session_days, side='right') - 1
+    return np.where(position >= 0, bar_closes[np.maximum(position, 0)], np.nan)
+
+
+@instrumentation.timed()
+def close_matrix(tickers: list, sessions: list, max_workers: int = DEFAULT_MAX_WORKERS) -> np.ndarray:
+    """
+    Builds a ticker x session matrix of closes, one ranged lookup per ticker on a thread pool.
+
+    Args:
+        tickers (list): The stock ticker symbols (rows, in this order).
+        sessions (list): Consecutive trading days in 'YYYY-MM-DD' format (columns).
+        max_workers (int, optional): Tickers whose closes are fetched concurrently.
+
+    Returns:
+        np.ndarray: float64 matrix of shape (len(tickers), len(sessions)), see daily_closes.
+    """
+    if not tickers or not len(sessions):
+        return np.full((len(tickers), len(sessions)), np.nan)
+
+    # Converted once for every ticker
+    session_days = np.array(sessions, dtype=ledger.DATE_DTYPE)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers)))) as pool:
+        return np.array(list(pool.map(lambda ticker: daily_closes(ticker, session_days), tickers)))
+
+
+def position_by_day(buy_ledger: ledger.TickerLedger | None, sell_ledger: ledger.TickerLedger | None,
+                    sessions: list) -> tuple:
+    """
+    Computes the shares held and their cost basis at the close of each session.
+
+    Args:
+        buy_ledger (TickerLedger | None): The ticker's purchases.
+        sell_ledger (TickerLedger | None): The ticker's sales.
+        sessions (list): Trading days in 'YYYY-MM-DD' format.
+
+    Returns:
+        tuple: (holdings int64 array, cost basis float64 array), one value per session.
+    """
+    parts = [(history, side) for history, side in ((buy_ledger, 1), (sell_ledger, -1)) if history is not None]
+    if not parts:
+        return np.zeros(len(sessions), dtype=np.int64), np.zeros(len(sessions))
+
+    dates = np.concatenate([history.dates for history, _ in parts])
+    signed = np.concatenate([history.amounts * side for history, side in parts])
+    prices = np.concatenate([history.prices for history, _ in parts])
+    is_buy = np.concatenate([np.full(len(history), side > 0) for history, side in parts])
+
+    # Chronological order, buys before sells on the same day (like the profit timeline)
+    order = np.lexsort((~is_buy, dates))
+    dates, signed, prices, is_buy = dates[order], signed[order], prices[order], is_buy[order]
+
+    held_after = np.cumsum(signed)
+    held_before = held_after - signed
+
+    # Average cost only changes on buys; a buy into an empty position starts over
+    average = np.zeros(len(signed))
+    current = 0.0
+    for i in np.flatnonzero(is_buy):
+        if held_before[i] > 0:
+            current = (held_before[i] * current + signed[i] * prices[i]) / held_after[i]
+        else:
+            current = prices[i]
+        average[i] = current
+
+    # Every sell keeps the average of the latest buy before it
+    last_buy = np.maximum.accumulate(np.where(is_buy, np.arange(len(signed)), 0))
+    cost_basis = held_after * average[last_buy]
+
+    # Last trade on or before each session
+    position = np.searchsorted(dates, np.array(sessions, dtype=ledger.DATE_DTYPE), side='right') - 1
+    before_first = position < 0
+    position = np.maximum(position, 0)
+
+    holdings = np.where(before_first, 0, held_after[position])
+    basis = np.where(before_first, 0.0, cost_basis[position])
+    return holdings, basis
+
+
+@instrumentation.timed()
+def value_history(tickers: list, start_date: str, end_date: str, tickers_buy_dict: dict,
+                  tickers_sell_dict: dict, max_workers: int = DEFAULT_MAX_WORKERS) -> pd.DataFrame:
+    """
+    Builds the daily holdings, market value, cost basis and P&L of a set of tickers.
+
+    Args:
+        tickers (list): The stock ticker symbols.
+        start_date (str): First day ('YYYY-MM-DD').
+        end_date (str): Last day ('YYYY-MM-DD').
+        tickers_buy_dict (dict): Global purchase history (Ledger or legacy dict).
+        tickers_sell_dict (dict): Global sales history (Ledger or legacy dict).
+        max_workers (int, optional): Tickers whose bars are fetched concurrently.
+
+    Returns:
+        pd.DataFrame: One row per trading session (DatetimeIndex) and (ticker, field)
+                      columns, where field is one of FIELDS and the 'total' ticker sums
+                      every position. Market value and P&L are NaN for held shares
+                      without any known close.
+    """
+    tickers = [ticker.upper() for ticker in tickers]
+    sessions = trading_calendar.get_calendar().sessions_between(start_date, end_date)
+    index = pd.DatetimeIndex(sessions, name="date")
+    columns = pd.MultiIndex.from_product([tickers + ["total"], FIELDS], names=["ticker", "field"])
+
+    if not sessions or not tickers:
+        return pd.DataFrame(index=index, columns=columns, dtype=float)
+
+    closes = close_matrix(tickers, sessions, max_workers)
+
+    holdings = np.empty((len(tickers), len(sessions)), dtype=np.int64)
+    basis = np.empty((len(tickers), len(sessions)))
+    for row, ticker in enumerate(tickers):
+        holdings[row], basis[row] = position_by_day(
+            ledger.get_ticker_ledger(tickers_buy_dict, ticker),
+            ledger.get_ticker_ledger(tickers_sell_dict, ticker),
+            sessions,
+        )
+
+    # A closed position is worth nothing even on days without a price
+    market_value = np.where(holdings == 0, 0.0, holdings * closes)
+    pnl = market_value - basis
+
+    stacked = np.stack([holdings, market_value, basis, pnl], axis=-1)  # ticker x session x field
+    total = stacked.sum(axis=0, keepdims=True)
+    values = np.concatenate([stacked, total]).transpose(1, 0, 2).reshape(len(sessions), -1)
+
+    return pd.DataFrame(values, index=index, columns=columns)
@@ -1,29 +1,55 @@
+import account_registry
 import calculate_func
-import user  # ודא שהקובץ user.py נמצא באותה תיקייה
 import getpass
+import instrumentation
+import lazy_import
 
-# נתוני גישה מוגדרים מראש
-CREDENTIALS = {
-    "username": "OferShulami",
-    "password": "1"  # שנה לסיסמה שלך
-}
+# asyncio + websockets, only needed by the streaming mode (keeps the menu start fast)
+quote_stream = lazy_import.module("quote_stream")
 
 
-def login() -> bool:
-    """ניהול תהליך ההתחברות למערכת"""
+def create_account(registry: account_registry.AccountRegistry):
+    """יצירת חשבון ראשון כשהרישום ריק (שם משתמש וסיסמה נבחרים על ידי המשתמש)"""
+    print("\nNo accounts yet - create one.")
+
+    while True:
+        username = input("New username: ")
+        password = getpass.getpass("New password: ")
+
+        if not password:
+            print("[X] The password cannot be empty.\n")
+        elif password != getpass.getpass("Repeat password: "):
+            print("[X] The passwords do not match.\n")
+        else:
+            try:
+                return registry.create(username, password)
+            except ValueError as e:
+                print(f"[X] {e}\n")
+
+
+def login(registry: account_registry.AccountRegistry):
+    """ניהול תהליך ההתחברות למערכת (מחזיר את החשבון הפתוח)"""
     print(f"\n{'=' * 35}")
     print("      WELCOME TO MONEYER")
     print(f"{'=' * 35}")
 
+    if not registry:
+        account = create_account(registry)
+        print("\n[V] Account created!")
+        return account
+
     while True:
         username = input("Username: ")
         password = getpass.getpass("Password: ")
 
-        if username == CREDENTIALS["username"] and password == CREDENTIALS["password"]:
-            print("\n[V] Login Successful!")
-            return True
-        else:
+        try:
+            # open() בודק את הסיסמה וטוען את החשבון (חישוב hash אחד לכל ניסיון)
+            account = registry.open(username, password)
+        except (KeyError, ValueError):
             print("[X] Invalid credentials. Please try again.\n")
+        else:
+            print("\n[V] Login Successful!")
+            return account
 
 
 def print_menu() -> str:
@@ -32,27 +58,32 @@ def print_menu() -> str:
     print("MAIN MENU:")
     print("a - Buy or Sell Stocks")
     print("s - Show Portfolio Status")
+    print("l - Live Portfolio (streaming quotes)")
     print("p - Show Profit Report")
+    print("w - Show Profit by Window (1D ... since inception)")
+    print("r - Show Risk Report")
+    print("t - Show Tax Lots (realized / unrealized P&L)")
+    print("h - Order History")
+    print("i - Import Trades from CSV")
+    print("m - Performance Profile (timings / cache hits)")
     print("q - Logout & Exit")
     return input("\nChoose an option: ").lower()
 
 
 def main():
-    # אתחול הגדרות Pandas לתצוגה יפה בטרמינל
-    calculate_func.setup_pd()
-
     is_logged_in = False
     ofer_account = None
 
+    registry = account_registry.AccountRegistry()
+
     while True:
         # שלב 1: התחברות
         if not is_logged_in:
-            if login():
-                # יצירת אובייקט החשבון
-                ofer_account = user.Account(CREDENTIALS["username"], CREDENTIALS["password"])
-                is_logged_in = True
-            else:
-                continue
+            ofer_account = login(registry)
+            is_logged_in = True
+
+            # אתחול הגדרות Pandas לתצוגה יפה בטרמינל (אחרי ההתחברות, כדי שהתפריט יופיע מיד)
+            calculate_func.setup_pd()
 
         # שלב 2: תפריט פעולות
         option = print_menu()
@@ -99,6 +130,16 @@ def main():
             print(f"\n{'*' * 10} Current Portfolio {'*' * 10}")
             ofer_account.show_account_info()
 
+        elif option == "l":
+            seconds = input("Stream for how many seconds? (Enter for 30): ")
+            url = input("Quote server URL (Enter for Yahoo Finance): ")
+            try:
+                ofer_account.stream_quotes(
+                    url or quote_stream.YAHOO_STREAM_URL, duration=float(seconds or 30), refresh_every=5
+                )
+            except (OSError, ValueError) as e:
+                print(f"\n[!] Streaming Error: {e}")
+
         elif option == "p":
             start_d = input("Enter start date (YYYY-MM-DD) or press Enter for 'all time': ")
             if not start_d:
@@ -108,8 +149,70 @@ def main():
                 # מציג רווח מתאריך ספציפי ועד היום
                 ofer_account.show_profit(start_date=start_d)
 
+        elif option == "w":
+            ofer_account.profit_windows()
+
+        elif option == "r":
+            try:
+                ofer_account.show_risk()
+            except ValueError as e:
+                print(f"\n[!] Risk Error: {e}")
+
+        elif option == "t":
+            method = input("Lot matching [fifo/lifo/hifo] (Enter for fifo): ").lower() or "fifo"
+            try:
+                ofer_account.show_tax_lots(method)
+            except ValueError as e:
+                print(f"\n[!] Tax Lot Error: {e}")
+
+        elif option == "h":
+            side = input("[b] Buys | [s] Sells: ").lower()
+            ticker = input("Ticker (Enter for all): ").upper() or None
+            start_d = input("Start date (YYYY-MM-DD) or Enter for 'all time': ") or None
+            end_d = input("End date (YYYY-MM-DD) or Enter for today: ") or None
+            filters = dict(ticker=ticker, start_date=start_d, end_date=end_d,
+                           pause=lambda: input("\n[n] Next page | Enter to stop: ").lower() == "n")
+            try:
+                if side == "b":
+                    ofer_account.show_buy_info(**filters)
+                elif side == "s":
+                    ofer_account.show_sell_info(**filters)
+                else:
+                    print("\n[!] Invalid side. Use 'b' or 's'.")
+            except ValueError as e:
+                print(f"\n[!] Order History Error: {e}")
+
+        elif option == "i":
+            path = input("CSV file (columns: ticker, side, amount, price, date): ")
+            try:
+                print(f"[*] Importing trades from {path}...")
+                count = ofer_account.import_trades(path)
+                print(f"[V] {count} trades imported.")
+            except (OSError, ValueError) as e:
+                print(f"\n[!] Import Error: {e}")
+
+        elif option == "m":
+            print(instrumentation.make_profile_table())
+            if instrumentation.is_enabled():
+                choice = input("\n[s] Save as JSON | [r] Reset | [d] Disable | Enter to go back: ").lower()
+                if choice == "s":
+                    path = input("JSON file: ")
+                    try:
+                        instrumentation.dump(path)
+                        print(f"[V] Profile written to {path}.")
+                    except OSError as e:
+                        print(f"\n[!] Profile Error: {e}")
+                elif choice == "r":
+                    instrumentation.reset()
+                elif choice == "d":
+                    instrumentation.disable()
+            elif input("\nEnable profiling for this session? (y/n): ").lower() == "y":
+                instrumentation.enable()
+
         elif option == "q":
             print("\nLogging out... See you next time!")
+            ofer_account.save()
+            ofer_account.close()
             is_logged_in = False
             ofer_account = None
             break
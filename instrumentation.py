@@ -0,0 +1,335 @@
+"""
+Opt-in instrumentation of external calls, hot functions and caches.
+
+Functions decorated with @timed record their call count and a latency histogram;
+caches report their hits and misses with record_cache(). Everything is off by default:
+a disabled timed function costs one flag check before the original call, and a
+disabled record_cache() returns immediately.
+
+Enable it from code (enable()), from the front-end menu, or for a whole session with
+the MONEYER_PROFILE environment variable:
+
+    MONEYER_PROFILE=1              print the profile when the process exits
+    MONEYER_PROFILE=profile.json   write the profile to that JSON file when the process exits
+
+Latencies are kept in logarithmic buckets (powers of two from 1 microsecond), so the
+memory used per function is constant whatever the number of calls.
+"""
+import atexit
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+import lazy_import
+
+tabulate = lazy_import.attribute("tabulate", "tabulate")
+
+PROFILE_ENV = "MONEYER_PROFILE"
+
+# Upper bounds (seconds) of the latency buckets: 1us, 2us, 4us, ... about 67s, then overflow
+BUCKET_BOUNDS = tuple(1e-6 * 2 ** i for i in range(27))
+
+PERCENTILES = (50, 95, 99)
+
+_enabled = False
+_lock = threading.Lock()
+_timings = {}  # name -> FunctionStats
+_caches = {}  # name -> [hits, misses]
+
+
+class FunctionStats:
+    """
+    Call count and latency histogram of one instrumented function.
+
+    Attributes:
+        calls (int): Completed calls (including the ones that raised).
+        total (float): Summed latency in seconds.
+        minimum (float): Fastest call in seconds.
+        maximum (float): Slowest call in seconds.
+        buckets (list): Calls per latency bucket (see BUCKET_BOUNDS, plus one overflow bucket).
+    """
+
+    __slots__ = ("calls", "total", "minimum", "maximum", "buckets")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def __repr__(self) -> str:
+        return f"FunctionStats(calls={self.calls}, total={self.total:.6f}s)"
+
+    def add(self, seconds: float) -> None:
+        """Records one call."""
+        self.calls += 1
+        self.total += seconds
+        self.minimum = min(self.minimum, seconds)
+        self.maximum = max(self.maximum, seconds)
+        self.buckets[_bucket(seconds)] += 1
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimates a latency percentile from the histogram.
+
+        Args:
+            q (float): The percentile (0-100).
+
+        Returns:
+            float: Upper bound (seconds) of the bucket holding the percentile, capped by
+                   the slowest call; 0.0 without calls.
+        """
+        if not self.calls:
+            return 0.0
+
+        rank = q / 100 * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.maximum
+                return min(bound, self.maximum)
+        return self.maximum
+
+
+def _bucket(seconds: float) -> int:
+    # Index of the first bound >= seconds (bucket i holds (bound[i-1], bound[i]])
+    if seconds <= BUCKET_BOUNDS[0]:
+        return 0
+    index = int(seconds / BUCKET_BOUNDS[0] - 1e-9).bit_length()
+    return min(index, len(BUCKET_BOUNDS))
+
+
+def enable() -> None:
+    """Starts recording timings and cache statistics."""
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    """Stops recording; the statistics gathered so far are kept."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """Returns True while instrumentation is recording."""
+    return _enabled
+
+
+def reset() -> None:
+    """Forgets every recorded timing and cache statistic."""
+    with _lock:
+        _timings.clear()
+        _caches.clear()
+
+
+def timed(name: str = None):
+    """
+    Decorator that records the call count and latency of a function while enabled.
+
+    Args:
+        name (str, optional): Name the calls are recorded under. Defaults to
+                              '<module>.<qualified name>' of the function.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_call(label, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def record_call(name: str, seconds: float) -> None:
+    """
+    Records one timed call (used by @timed, or directly for code blocks).
+
+    Args:
+        name (str): The function or block name.
+        seconds (float): Its latency.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        stats = _timings.get(name)
+        if stats is None:
+            stats = _timings[name] = FunctionStats()
+        stats.add(seconds)
+
+
+def record_cache(name: str, hit: bool) -> None:
+    """
+    Records one cache lookup.
+
+    Args:
+        name (str): The cache name (e.g., 'price_store.bars').
+        hit (bool): True if the cache answered, False if it had to fetch.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        counts = _caches.get(name)
+        if counts is None:
+            counts = _caches[name] = [0, 0]
+        counts[0 if hit else 1] += 1
+
+
+def timings() -> dict:
+    """
+    Returns the latency statistics of every instrumented function called so far.
+
+    Returns:
+        dict: name -> {"calls", "total", "mean", "min", "max", "p50", "p95", "p99"}
+              (seconds), sorted by total time, slowest first.
+    """
+    with _lock:
+        items = sorted(_timings.items(), key=lambda item: item[1].total, reverse=True)
+        return {
+            name: {
+                "calls": stats.calls,
+                "total": stats.total,
+                "mean": stats.total / stats.calls,
+                "min": stats.minimum,
+                "max": stats.maximum,
+                **{f"p{q}": stats.percentile(q) for q in PERCENTILES},
+            }
+            for name, stats in items
+        }
+
+
+def histogram(name: str) -> list:
+    """
+    Returns the latency histogram of one instrumented function.
+
+    Args:
+        name (str): The function name (see timings()).
+
+    Returns:
+        list: (bucket upper bound in seconds, calls) pairs of the non-empty buckets;
+              the overflow bucket has an infinite bound.
+
+    Raises:
+        KeyError: If the function was never called while enabled.
+    """
+    with _lock:
+        buckets = list(_timings[name].buckets)
+    bounds = BUCKET_BOUNDS + (float("inf"),)
+    return [(bound, count) for bound, count in zip(bounds, buckets) if count]
+
+
+def cache_stats() -> dict:
+    """
+    Returns the hits and misses of every instrumented cache.
+
+    Returns:
+        dict: name -> {"hits", "misses", "hit rate"} (hit rate as a fraction).
+    """
+    with _lock:
+        return {
+            name: {"hits": hits, "misses": misses, "hit rate": hits / (hits + misses)}
+            for name, (hits, misses) in sorted(_caches.items())
+        }
+
+
+def profile() -> dict:
+    """
+    Returns the whole session profile as plain data.
+
+    Returns:
+        dict: {"timings": timings(), "caches": cache_stats(),
+               "histograms": name -> histogram(name)}, the overflow bucket's infinite bound
+               written as None so that the profile is valid JSON.
+    """
+    with _lock:
+        names = list(_timings)
+    return {
+        "timings": timings(),
+        "caches": cache_stats(),
+        "histograms": {
+            name: [[None if math.isinf(bound) else bound, count] for bound, count in histogram(name)]
+            for name in names
+        },
+    }
+
+
+def make_profile_table() -> str:
+    """
+    Formats the timings and cache statistics as terminal tables.
+
+    Returns:
+        str: The formatted profile.
+    """
+    stats = timings()
+    if not stats and not _caches:
+        return "\n[!] No profile recorded yet." + ("" if _enabled else " Instrumentation is disabled.")
+
+    time_rows = [
+        [name, row["calls"], _ms(row["total"]), _ms(row["mean"]),
+         *(_ms(row[f"p{q}"]) for q in PERCENTILES), _ms(row["max"])]
+        for name, row in stats.items()
+    ]
+    time_table = tabulate(
+        time_rows,
+        headers=["Function", "Calls", "Total (ms)", "Mean (ms)", *(f"p{q} (ms)" for q in PERCENTILES), "Max (ms)"],
+        tablefmt="fancy_grid",
+        numalign="right",
+    )
+
+    cache_rows = [
+        [name, row["hits"], row["misses"], f"{row['hit rate'] * 100:.1f}%"]
+        for name, row in cache_stats().items()
+    ]
+    cache_table = tabulate(cache_rows, headers=["Cache", "Hits", "Misses", "Hit Rate"], tablefmt="fancy_grid",
+                           numalign="right")
+
+    return f"\n[PROFILE - TIMINGS]\n{time_table}\n\n[PROFILE - CACHES]\n{cache_table}"
+
+
+def dump(path: str = None) -> None:
+    """
+    Prints the profile, or writes it as JSON.
+
+    Args:
+        path (str, optional): JSON file to write. Defaults to printing the tables.
+    """
+    if path is None:
+        print(make_profile_table())
+        return
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile(), f, indent=2, allow_nan=False)
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.3f}"
+
+
+def _dump_at_exit(target: str) -> None:
+    try:
+        dump(None if target == "1" else target)
+    except OSError as e:
+        print(f"Could not write the profile to {target}: {e}", file=sys.stderr)
+
+
+if os.environ.get(PROFILE_ENV):
+    enable()
+    atexit.register(_dump_at_exit, os.environ[PROFILE_ENV])
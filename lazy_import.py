@@ -0,0 +1,98 @@
+"""
+Deferred imports of heavy third-party libraries.
+
+pandas, NumPy, yfinance, pandas_market_calendars, tabulate and colorama together take
+over a second to import, while the login prompt and scripted invocations need none of
+them. Modules bind them through this helper instead of a plain import:
+
+    np = lazy_import.module("numpy")                         # instead of: import numpy as np
+    tabulate = lazy_import.attribute("tabulate", "tabulate") # instead of: from tabulate import tabulate
+
+The real import happens on the first attribute access (or call) and is shared by every
+module. Modules using these names in annotations start with
+'from __future__ import annotations' so that defining a function does not load anything.
+"""
+import importlib
+import sys
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    After the import, the module's attributes are copied onto the stand-in, so later
+    lookups are ordinary attribute reads.
+    """
+
+    def __init__(self, name: str, on_load=None) -> None:
+        super().__init__(name)
+        self._lazy_on_load = on_load
+        self._lazy_module = None
+        self._lazy_lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_module is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+    def __getattr__(self, attr: str):
+        # Only called for attributes that are not copied yet
+        return getattr(self._load(), attr)
+
+    def __dir__(self) -> list:
+        return dir(self._load())
+
+    def _load(self) -> types.ModuleType:
+        if self._lazy_module is None:
+            with self._lazy_lock:
+                if self._lazy_module is None:
+                    loaded = importlib.import_module(self.__name__)
+                    if self._lazy_on_load is not None:
+                        self._lazy_on_load(loaded)
+                    self.__dict__.update(
+                        (key, value) for key, value in vars(loaded).items() if key not in ("__name__", "__spec__")
+                    )
+                    self._lazy_module = loaded
+        return self._lazy_module
+
+
+def module(name: str, on_load=None) -> LazyModule:
+    """
+    Returns a module that is imported on first use.
+
+    Args:
+        name (str): The absolute module name (e.g., 'pandas').
+        on_load (callable, optional): Called once with the real module right after the import.
+
+    Returns:
+        LazyModule: The stand-in to bind instead of the module.
+    """
+    return LazyModule(name, on_load)
+
+
+def attribute(module_name: str, name: str, on_load=None):
+    """
+    Returns a callable that imports a module on first call and forwards to one of its functions.
+
+    Args:
+        module_name (str): The absolute module name (e.g., 'tabulate').
+        name (str): The function inside it.
+        on_load (callable, optional): Called once with the real module right after the import.
+
+    Returns:
+        callable: The forwarding function.
+    """
+    lazy = LazyModule(module_name, on_load)
+
+    def forward(*args, **kwargs):
+        return getattr(lazy, name)(*args, **kwargs)
+
+    forward.__name__ = name
+    forward.__qualname__ = name
+    return forward
+
+
+def is_loaded(name: str) -> bool:
+    """Returns True if a module has actually been imported in this process."""
+    return name in sys.modules
@@ -0,0 +1,463 @@
+"""
+Columnar, date-sorted transaction ledger.
+
+Each ticker's trades are stored in NumPy arrays (int64 trade numbers and amounts,
+float64 prices, datetime64[D] dates) kept sorted by date. Date-range selection is a
+searchsorted slice and the holdings at a date are a prefix-sum lookup, so reports no
+longer parse and scan every trade.
+
+The ledger keeps the old dictionary shape readable: `ledger[ticker]["amount"]` still
+returns the column in insertion order (as a read-only tuple, so a legacy in-place
+`.append()` fails loudly instead of being lost), and assigning a dict of lists converts
+it. New trades go through TickerLedger.append.
+
+A whole ledger can be saved to a fixed-width binary file (Ledger.save) and memory-mapped
+back (Ledger.open): a small header, one 40-byte record per trade grouped by ticker and
+sorted by date, then a JSON index of the tickers. Opening only reads the header and the
+index; each ticker's columns are zero-copy views of the mapping, and the stored running
+amount answers holdings_at without reading the earlier trades, so only the pages of
+the queried date ranges are ever read. A mapped ticker is copied into memory on its
+first new trade.
+"""
+from __future__ import annotations
+
+import json
+import os
+import struct
+from datetime import datetime
+
+import lazy_import
+
+np = lazy_import.module("numpy")
+
+DATE_DTYPE = "datetime64[D]"
+COLUMNS = ("num", "amount", "price", "date")
+
+# Fixed-width trade record of ledger files (little-endian); cum_amount is the running traded amount
+RECORD_DTYPE = [("num", "<i8"), ("amount", "<i8"), ("price", "<f8"), ("date", "<M8[D]"), ("cum_amount", "<i8")]
+
+# Ledger file header: magic, record count, index offset, index length (padded to HEADER_SIZE)
+LEDGER_MAGIC = b"MNYLEDG1"
+HEADER_FORMAT = "<8sQQQ"
+HEADER_SIZE = 64
+
+# Records converted and written at a time when saving
+WRITE_CHUNK_ROWS = 1_000_000
+
+
+def to_datetime64(date) -> np.datetime64:
+    """
+    Converts a 'YYYY-MM-DD' string, date or datetime to a day-precision datetime64.
+
+    Args:
+        date (str | date | datetime | np.datetime64): The date to convert.
+
+    Returns:
+        np.datetime64: The date with day precision.
+    """
+    if isinstance(date, datetime):
+        date = date.date()
+    return np.datetime64(date, 'D')
+
+
+class TickerLedger:
+    """
+    Trade history of a single ticker in growable, date-sorted NumPy arrays.
+
+    Attributes:
+        nums (np.ndarray): Trade numbers (int64), sorted by date.
+        amounts (np.ndarray): Traded amounts (int64), sorted by date.
+        prices (np.ndarray): Prices per share (float64), sorted by date.
+        dates (np.ndarray): Trade dates (datetime64[D]), sorted ascending.
+    """
+
+    def __init__(self, capacity: int = 16) -> None:
+        """
+        Creates an empty ledger.
+
+        Args:
+            capacity (int, optional): Initial number of preallocated rows.
+        """
+        self._num = np.empty(capacity, dtype=np.int64)
+        self._amount = np.empty(capacity, dtype=np.int64)
+        self._price = np.empty(capacity, dtype=np.float64)
+        self._date = np.empty(capacity, dtype=DATE_DTYPE)
+        self._size = 0
+        self._max_num = 0
+        self._last = None
+
+        # Lazily rebuilt after every append
+        self._cum_amount = None
+        self._insertion_order = None
+
+    @classmethod
+    def from_lists(cls, history: dict) -> "TickerLedger":
+        """
+        Builds a ledger from the legacy dict-of-lists representation.
+
+        Args:
+            history (dict): {"num": [...], "amount": [...], "price": [...], "date": [...]}.
+
+        Returns:
+            TickerLedger: The equivalent columnar ledger.
+        """
+        ticker_ledger = cls(capacity=max(16, len(history.get("amount", []))))
+        for num, amount, price, date in zip(history["num"], history["amount"], history["price"], history["date"]):
+            ticker_ledger.append(num, amount, price, date)
+        return ticker_ledger
+
+    @classmethod
+    def from_arrays(cls, nums: np.ndarray, amounts: np.ndarray, prices: np.ndarray,
+                    dates: np.ndarray) -> "TickerLedger":
+        """
+        Builds a ledger directly from columns that are already sorted by date.
+
+        Args:
+            nums (np.ndarray): Trade numbers.
+            amounts (np.ndarray): Traded amounts.
+            prices (np.ndarray): Prices per share.
+            dates (np.ndarray): Trade dates (datetime64[D]), sorted ascending.
+
+        Returns:
+            TickerLedger: A ledger holding copies of the columns.
+        """
+        size = len(nums)
+        ticker_ledger = cls(capacity=max(16, size))
+        ticker_ledger._num[:size] = nums
+        ticker_ledger._amount[:size] = amounts
+        ticker_ledger._price[:size] = prices
+        ticker_ledger._date[:size] = dates
+        ticker_ledger._size = size
+
+        if size:
+            # The last appended trade is the one with the highest number
+            last = int(np.argmax(ticker_ledger.nums))
+            ticker_ledger._max_num = int(ticker_ledger._num[last])
+            ticker_ledger._last = (
+                ticker_ledger._max_num, int(ticker_ledger._amount[last]),
+                float(ticker_ledger._price[last]), str(ticker_ledger._date[last])
+            )
+        return ticker_ledger
+
+    @classmethod
+    def from_records(cls, records: np.ndarray, last: tuple | None, max_num: int) -> "TickerLedger":
+        """
+        Wraps date-sorted records of a ledger file without copying them.
+
+        The columns stay read-only views of the records until the first append, which
+        copies them into memory.
+
+        Args:
+            records (np.ndarray): RECORD_DTYPE records of one ticker (e.g., a memory-mapped slice).
+            last (tuple | None): The most recently appended trade (num, amount, price, date).
+            max_num (int): The highest trade number.
+
+        Returns:
+            TickerLedger: A ledger reading from the records.
+        """
+        ticker_ledger = cls(capacity=0)
+        ticker_ledger._num = records["num"]
+        ticker_ledger._amount = records["amount"]
+        ticker_ledger._price = records["price"]
+        ticker_ledger._date = records["date"]
+        ticker_ledger._cum_amount = records["cum_amount"]
+        ticker_ledger._size = len(records)
+        ticker_ledger._max_num = max_num
+        ticker_ledger._last = last
+        return ticker_ledger
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self) -> str:
+        return f"TickerLedger(trades={self._size})"
+
+    @property
+    def nums(self) -> np.ndarray:
+        return self._num[:self._size]
+
+    @property
+    def amounts(self) -> np.ndarray:
+        return self._amount[:self._size]
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self._price[:self._size]
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self._date[:self._size]
+
+    def append(self, num: int, amount: int, price: float, date) -> None:
+        """
+        Adds a trade, keeping the arrays sorted by date (ties keep insertion order).
+
+        Args:
+            num (int): The transaction sequence number.
+            amount (int): The quantity of shares.
+            price (float): The price per share.
+            date (str | date | datetime): The trade date.
+        """
+        day = to_datetime64(date)
+
+        if self._size == len(self._num):
+            self._grow(max(16, 2 * self._size))
+
+        if self._size == 0 or day >= self._date[self._size - 1]:
+            # Common case: trades arrive in chronological order
+            position = self._size
+        else:
+            position = int(np.searchsorted(self.dates, day, side='right'))
+            for column in (self._num, self._amount, self._price, self._date):
+                column[position + 1:self._size + 1] = column[position:self._size]
+
+        self._num[position] = num
+        self._amount[position] = amount
+        self._price[position] = price
+        self._date[position] = day
+        self._size += 1
+
+        self._max_num = max(self._max_num, num)
+        self._last = (num, amount, price, str(day))
+        self._cum_amount = None
+        self._insertion_order = None
+
+    def next_num(self) -> int:
+        """Returns the next available transaction number (starts at 1)."""
+        return self._max_num + 1
+
+    def last_trade(self) -> tuple | None:
+        """Returns the most recently appended trade as (num, amount, price, date)."""
+        return self._last
+
+    def range_slice(self, start_date=None, end_date=None) -> slice:
+        """
+        Finds the rows whose date lies in the inclusive range [start_date, end_date].
+
+        Args:
+            start_date (str | date | datetime, optional): First date. Defaults to the beginning.
+            end_date (str | date | datetime, optional): Last date. Defaults to the end.
+
+        Returns:
+            slice: A slice into the date-sorted columns.
+        """
+        dates = self.dates
+        first = 0 if start_date is None else int(np.searchsorted(dates, to_datetime64(start_date), side='left'))
+        last = self._size if end_date is None else int(np.searchsorted(dates, to_datetime64(end_date), side='right'))
+        return slice(first, max(first, last))
+
+    def count_until(self, date) -> int:
+        """Returns the number of trades dated on or before the given date."""
+        return int(np.searchsorted(self.dates, to_datetime64(date), side='right'))
+
+    def holdings_at(self, date) -> int:
+        """
+        Sums the traded amounts dated on or before a date via a prefix-sum lookup.
+
+        Args:
+            date (str | date | datetime): The cutoff date (inclusive).
+
+        Returns:
+            int: The cumulative traded amount up to the date.
+        """
+        count = self.count_until(date)
+        if count == 0:
+            return 0
+
+        if self._cum_amount is None:
+            self._cum_amount = np.cumsum(self.amounts)
+        return int(self._cum_amount[count - 1])
+
+    def __getitem__(self, column: str) -> tuple:
+        """
+        Returns one column in insertion order (legacy dict-of-lists access).
+
+        The column is a read-only copy: changing it would not change the ledger, so it is
+        returned as a tuple and legacy writes such as `.append()` raise instead of being lost.
+
+        Args:
+            column (str): One of "num", "amount", "price" or "date".
+
+        Returns:
+            tuple: The column values; dates are 'YYYY-MM-DD' strings.
+        """
+        if column not in COLUMNS:
+            raise KeyError(column)
+
+        if self._insertion_order is None:
+            self._insertion_order = np.argsort(self.nums, kind='stable')
+
+        values = {
+            "num": self.nums,
+            "amount": self.amounts,
+            "price": self.prices,
+            "date": self.dates,
+        }[column][self._insertion_order]
+
+        if column == "date":
+            return tuple(np.datetime_as_string(values, unit='D').tolist())
+        return tuple(values.tolist())
+
+    def get(self, column: str, default=None):
+        try:
+            return self[column]
+        except KeyError:
+            return default
+
+    def keys(self) -> tuple:
+        return COLUMNS
+
+    def items(self) -> list:
+        return [(column, self[column]) for column in COLUMNS]
+
+    def to_dict(self) -> dict:
+        """Returns the legacy dict-of-lists representation (insertion order, detached copies)."""
+        return {column: list(self[column]) for column in COLUMNS}
+
+    def _grow(self, capacity: int) -> None:
+        for name in ("_num", "_amount", "_price", "_date"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+
+class Ledger(dict):
+    """
+    Mapping of ticker -> TickerLedger used for tickers_buy_dict and tickers_sell_dict.
+
+    Assigning a legacy {"num": [], "amount": [], "price": [], "date": []} dict converts it
+    to a TickerLedger, so code written against the dict-of-lists layout keeps working.
+    """
+
+    def __setitem__(self, ticker: str, history) -> None:
+        if not isinstance(history, TickerLedger):
+            history = TickerLedger.from_lists(history)
+        super().__setitem__(ticker, history)
+
+    def __repr__(self) -> str:
+        return f"Ledger({', '.join(f'{t}: {len(h)}' for t, h in self.items())})"
+
+    def add_ticker(self, ticker: str) -> TickerLedger:
+        """Returns the ledger of a ticker, creating an empty one if needed."""
+        if ticker not in self:
+            self[ticker] = TickerLedger()
+        return self[ticker]
+
+    def save(self, path: str) -> None:
+        """
+        Writes the ledger to a fixed-width binary file (see Ledger.open), atomically.
+
+        Args:
+            path (str): The ledger file.
+        """
+        tickers = list(self.keys())
+        offsets, last, max_num = [0], [], []
+
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(bytes(HEADER_SIZE))
+            for ticker in tickers:
+                history = self[ticker]
+                running = 0
+                for start in range(0, len(history), WRITE_CHUNK_ROWS):
+                    rows = slice(start, min(start + WRITE_CHUNK_ROWS, len(history)))
+                    records = np.empty(rows.stop - rows.start, dtype=RECORD_DTYPE)
+                    for column in COLUMNS:
+                        records[column] = getattr(history, column + "s")[rows]
+                    records["cum_amount"] = np.cumsum(records["amount"]) + running
+                    running = int(records["cum_amount"][-1])
+                    f.write(records.tobytes())
+
+                offsets.append(offsets[-1] + len(history))
+                trade = history.last_trade()
+                last.append(None if trade is None else [int(trade[0]), int(trade[1]), float(trade[2]), str(trade[3])])
+                max_num.append(history.next_num() - 1)
+
+            index = json.dumps({"tickers": tickers, "offsets": offsets, "last": last, "max_num": max_num}).encode()
+            index_offset = f.tell()
+            f.write(index)
+            f.seek(0)
+            f.write(struct.pack(HEADER_FORMAT, LEDGER_MAGIC, offsets[-1], index_offset, len(index)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    @classmethod
+    def open(cls, path: str) -> "Ledger":
+        """
+        Memory-maps a ledger file written by save().
+
+        Only the header and the ticker index are read; trades are read from the mapping
+        when a report touches them.
+
+        Args:
+            path (str): The ledger file.
+
+        Returns:
+            Ledger: The ledger, each ticker a zero-copy view of the file.
+
+        Raises:
+            ValueError: If the file is not a ledger file.
+        """
+        with open(path, "rb") as f:
+            magic, rows, index_offset, index_length = struct.unpack(
+                HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT))
+            )
+            if magic != LEDGER_MAGIC:
+                raise ValueError(f"{path} is not a ledger file.")
+            f.seek(index_offset)
+            index = json.loads(f.read(index_length))
+
+        if rows:
+            records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(rows,))
+        else:
+            records = np.empty(0, dtype=RECORD_DTYPE)
+
+        result = cls()
+        offsets = index["offsets"]
+        for i, ticker in enumerate(index["tickers"]):
+            last = index["last"][i]
+            result[ticker] = TickerLedger.from_records(
+                records[offsets[i]:offsets[i + 1]], None if last is None else tuple(last), index["max_num"][i]
+            )
+        return result
+
+    def first_date(self, ticker: str = None) -> str | None:
+        """
+        Returns the earliest trade date of one ticker, or of the whole ledger.
+
+        Args:
+            ticker (str, optional): The ticker to inspect. Defaults to every ticker.
+
+        Returns:
+            str | None: The date in 'YYYY-MM-DD' format, or None if there are no trades.
+        """
+        if ticker is None:
+            histories = self.values()
+        else:
+            histories = [self[ticker]] if ticker in self else []
+
+        first_dates = [history.dates[0] for history in histories if len(history)]
+        if not first_dates:
+            return None
+        return str(min(first_dates))
+
+
+def get_ticker_ledger(tickers_dict: dict, ticker: str) -> TickerLedger | None:
+    """
+    Returns the columnar ledger of a ticker from either a Ledger or a legacy dict.
+
+    Args:
+        tickers_dict (dict): A Ledger or a legacy dict of ticker -> dict of lists.
+        ticker (str): The stock ticker symbol.
+
+    Returns:
+        TickerLedger | None: The ticker's ledger, or None if the ticker has no trades.
+    """
+    history = tickers_dict.get(ticker)
+    if history is None:
+        return None
+    if isinstance(history, TickerLedger):
+        return history
+    return TickerLedger.from_lists(history)
@@ -0,0 +1,325 @@
+"""
+Market-data provider abstraction.
+
+Everything the application needs from the market goes through a MarketDataProvider:
+daily bar history, latest quotes and symbol metadata. Two providers are included:
+
+    YahooProvider      - live data from Yahoo Finance (the default).
+    LocalFileProvider  - OHLCV, quote and symbol fixtures read from a CSV/Parquet folder,
+                         for offline use, load tests and reproducible benchmarks.
+
+The active provider is process-wide: every Account, cache and report of the process
+reads from it. It is selected once, before the accounts are used:
+
+    market_data.set_provider(LocalFileProvider("fixtures/"))
+"""
+from __future__ import annotations
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+import instrumentation
+import lazy_import
+
+pd = lazy_import.module("pandas")
+yf = lazy_import.module("yfinance")
+
+# Root folder for every on-disk cache of the application (override with MONEYER_CACHE_DIR)
+CACHE_DIR = os.environ.get("MONEYER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".moneyer"))
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+class MarketDataProvider(ABC):
+    """
+    Interface of a source of bar history, latest quotes and symbol metadata.
+
+    Attributes:
+        name (str): Short identifier of the provider.
+        complete_history (bool): Whether an empty history() result means the provider has
+            no bars for that range, rather than a failed, throttled or partial request.
+    """
+
+    name = "provider"
+    complete_history = False
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+    @abstractmethod
+    def history(self, ticker: str, start_date: str, end_date: str) -> list:
+        """
+        Returns the daily OHLCV bars of a ticker in an inclusive date range.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            start_date (str): First date of the range ('YYYY-MM-DD').
+            end_date (str): Last date of the range ('YYYY-MM-DD', inclusive).
+
+        Returns:
+            list: A date-sorted list of (date, open, high, low, close, volume) tuples.
+        """
+
+    @abstractmethod
+    def quotes(self, tickers: list) -> pd.Series:
+        """
+        Returns the latest prices of many tickers.
+
+        Args:
+            tickers (list): The stock ticker symbols.
+
+        Returns:
+            pd.Series: Last prices indexed by upper-cased ticker. Symbols without data are omitted.
+        """
+
+    @abstractmethod
+    def symbol_info(self, ticker: str) -> dict | None:
+        """
+        Returns the metadata of a ticker.
+
+        Args:
+            ticker (str): The ticker symbol to look up.
+
+        Returns:
+            dict | None: {"short name": str} for a recognized symbol, None otherwise.
+        """
+
+    def quote(self, ticker: str) -> float | None:
+        """
+        Returns the latest price of a single ticker.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+
+        Returns:
+            float | None: The last price, or None if it is unavailable.
+        """
+        price = self.quotes([ticker]).get(ticker.upper())
+        return float(price) if price is not None else None
+
+    def cache_file(self, filename: str) -> str:
+        """
+        Returns where a cache built on top of this provider should be stored.
+
+        Args:
+            filename (str): The cache file name (e.g., 'bars.sqlite').
+
+        Returns:
+            str: A file path, or ":memory:" for caches that should not persist.
+        """
+        return ":memory:"
+
+
+class YahooProvider(MarketDataProvider):
+    """Live market data from Yahoo Finance through the yfinance library."""
+
+    name = "yahoo"
+
+    def __init__(self, chunk_size: int = 200) -> None:
+        """
+        Args:
+            chunk_size (int, optional): Maximum number of symbols per bulk quote request.
+        """
+        self.chunk_size = chunk_size
+
+    @instrumentation.timed("yahoo.history")
+    def history(self, ticker: str, start_date: str, end_date: str) -> list:
+        # history() treats 'end' as exclusive, so ask for one extra day
+        exclusive_end = (datetime.strptime(end_date, DATE_FORMAT) + timedelta(days=1)).strftime(DATE_FORMAT)
+        data = yf.Ticker(ticker).history(start=start_date, end=exclusive_end, interval='1d')
+
+        if data.empty:
+            return []
+
+        dates = data.index.strftime(DATE_FORMAT).tolist()
+        return [
+            (day, float(o), float(h), float(l), float(c), float(v))
+            for day, o, h, l, c, v in zip(
+                dates, data['Open'], data['High'], data['Low'], data['Close'], data['Volume']
+            )
+        ]
+
+    @instrumentation.timed("yahoo.quotes")
+    def quotes(self, tickers: list) -> pd.Series:
+        symbols = list(dict.fromkeys(t.upper() for t in tickers))
+        prices = []
+
+        for i in range(0, len(symbols), self.chunk_size):
+            chunk = symbols[i:i + self.chunk_size]
+            try:
+                data = yf.download(chunk, period="5d", interval="1d", group_by="column",
+                                   auto_adjust=False, progress=False, threads=True)
+            except Exception as e:
+                print(f"Error fetching quotes for {', '.join(chunk)}: {e}")
+                continue
+
+            if data.empty:
+                continue
+
+            # 'Close' holds one column per symbol; the last non-missing value is the latest price
+            closes = data["Close"]
+            if isinstance(closes, pd.Series):
+                closes = closes.to_frame(name=chunk[0])
+            prices.append(closes.ffill().iloc[-1].dropna())
+
+        if not prices:
+            return pd.Series(dtype=float)
+
+        return pd.concat(prices).astype(float)
+
+    @instrumentation.timed("yahoo.quote")
+    def quote(self, ticker: str) -> float | None:
+        # fast_info provides low-latency access to the last price
+        current_price = yf.Ticker(ticker).fast_info["last_price"]
+        return float(current_price) if current_price is not None else None
+
+    @instrumentation.timed("yahoo.symbol_info")
+    def symbol_info(self, ticker: str) -> dict | None:
+        info = yf.Ticker(ticker).get_info()
+
+        # A valid ticker typically contains a 'shortName' identifier
+        if 'shortName' in info and bool(info['shortName']):
+            return {"short name": info['shortName']}
+        return None
+
+    def cache_file(self, filename: str) -> str:
+        return os.path.join(CACHE_DIR, filename)
+
+
+class LocalFileProvider(MarketDataProvider):
+    """
+    Market data read from a local fixture folder, for air-gapped and reproducible runs.
+
+    Folder layout (every file may be .csv or .parquet):
+        <root>/bars/<TICKER>.csv   columns: Date, Open, High, Low, Close, Volume
+        <root>/quotes.csv          columns: Ticker, Price   (optional, defaults to the last close)
+        <root>/symbols.csv         columns: Ticker, Name    (optional, defaults to tickers with bars)
+
+    Attributes:
+        root (str): The fixture folder.
+    """
+
+    name = "local"
+    # The fixture folder is the whole data set: no bars in a range means there are none
+    complete_history = True
+
+    def __init__(self, root: str) -> None:
+        """
+        Args:
+            root (str): Path of the fixture folder.
+
+        Raises:
+            ValueError: If the folder does not exist.
+        """
+        if not os.path.isdir(root):
+            raise ValueError(f"Market data folder not found: {root}")
+
+        self.root = root
+        self._lock = threading.Lock()
+        self._bars = {}
+        self._quotes = None
+        self._symbols = None
+
+    def __repr__(self) -> str:
+        return f"LocalFileProvider(root={self.root})"
+
+    def history(self, ticker: str, start_date: str, end_date: str) -> list:
+        bars = self._load_bars(ticker.upper())
+        return [bar for bar in bars if start_date <= bar[0] <= end_date]
+
+    def quotes(self, tickers: list) -> pd.Series:
+        quotes = self._load_quotes()
+        prices = {}
+
+        for ticker in dict.fromkeys(t.upper() for t in tickers):
+            if ticker in quotes:
+                prices[ticker] = quotes[ticker]
+            else:
+                bars = self._load_bars(ticker)
+                if bars:
+                    prices[ticker] = bars[-1][4]
+
+        return pd.Series(prices, dtype=float)
+
+    def symbol_info(self, ticker: str) -> dict | None:
+        ticker = ticker.upper()
+        symbols = self._load_symbols()
+
+        if symbols is not None:
+            return {"short name": symbols[ticker]} if ticker in symbols else None
+        return {"short name": ticker} if self._load_bars(ticker) else None
+
+    def _read_table(self, path_without_extension: str) -> pd.DataFrame | None:
+        for extension, reader in ((".parquet", pd.read_parquet), (".csv", pd.read_csv)):
+            path = path_without_extension + extension
+            if os.path.exists(path):
+                return reader(path)
+        return None
+
+    def _load_bars(self, ticker: str) -> list:
+        with self._lock:
+            if ticker not in self._bars:
+                table = self._read_table(os.path.join(self.root, "bars", ticker))
+                if table is None:
+                    self._bars[ticker] = []
+                else:
+                    dates = pd.to_datetime(table["Date"]).dt.strftime(DATE_FORMAT)
+                    rows = zip(dates, table["Open"], table["High"], table["Low"], table["Close"], table["Volume"])
+                    self._bars[ticker] = sorted(
+                        (day, float(o), float(h), float(l), float(c), float(v)) for day, o, h, l, c, v in rows
+                    )
+            return self._bars[ticker]
+
+    def _load_quotes(self) -> dict:
+        with self._lock:
+            if self._quotes is None:
+                table = self._read_table(os.path.join(self.root, "quotes"))
+                self._quotes = {} if table is None else dict(
+                    zip(table["Ticker"].str.upper(), table["Price"].astype(float))
+                )
+            return self._quotes
+
+    def _load_symbols(self) -> dict | None:
+        with self._lock:
+            if self._symbols is None:
+                table = self._read_table(os.path.join(self.root, "symbols"))
+                if table is not None:
+                    self._symbols = dict(zip(table["Ticker"].str.upper(), table["Name"]))
+            return self._symbols
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> MarketDataProvider:
+    """
+    Returns the active market-data provider (Yahoo Finance unless another one was set).
+
+    Returns:
+        MarketDataProvider: The process-wide provider.
+    """
+    global _provider
+
+    with _provider_lock:
+        if _provider is None:
+            _provider = YahooProvider()
+        return _provider
+
+
+def set_provider(provider: MarketDataProvider) -> None:
+    """
+    Selects the market-data provider used by every price, quote and validation lookup.
+
+    Args:
+        provider (MarketDataProvider): The provider to activate.
+    """
+    global _provider
+
+    if not isinstance(provider, MarketDataProvider):
+        raise ValueError(f"Expected a MarketDataProvider, got {type(provider).__name__}.")
+
+    with _provider_lock:
+        _provider = provider
@@ -0,0 +1,281 @@
+"""
+Indexed, paginated order-history queries.
+
+A query filters the buy and sell ledgers by ticker, date range, side, amount and price
+and yields the matching orders lazily, newest first by default:
+
+    ticker      : dictionary lookup of the ticker's ledger
+    side        : choice of the buy or the sell ledger
+    date range  : binary search on the date-sorted columns (ledger.TickerLedger.range_slice)
+    amount/price: vectorized masks over the rows of the date range, one chunk at a time
+
+Rows are read in chunks growing from the end (or the start) of each ticker's date range,
+and several tickers or both sides are merged by date, so the first page only reads
+about one chunk per ticker. The last 20 trades of a symbol cost the same whatever the
+length of its history, and with memory-mapped ledgers only the pages of those rows are
+read.
+
+Orders are (side, ticker, num, amount, price, date) tuples; format_orders renders them
+as fixed-width text lines, one at a time, instead of building a whole table.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+
+import lazy_import
+import ledger
+
+np = lazy_import.module("numpy")
+
+SIDES = ("buy", "sell")
+ORDER_FIELDS = ("side", "ticker", "num", "amount", "price", "date")
+
+DEFAULT_PAGE_SIZE = 20
+
+# Rows read per ticker by the first chunk; later chunks double up to MAX_CHUNK_ROWS
+FIRST_CHUNK_ROWS = 256
+MAX_CHUNK_ROWS = 65_536
+
+# Column headers and widths of format_orders
+ORDER_COLUMNS = (("Side", 4), ("Ticker", 8), ("ID", 8), ("Amount", 10), ("Price ($)", 12), ("Date", 10))
+
+
+class OrderQuery:
+    """
+    Lazily evaluated order-history query.
+
+    Attributes:
+        ledgers (dict): side -> ledger (Ledger or legacy dict) of the queried sides.
+        tickers (list | None): Upper-cased tickers to include, or None for every ticker.
+        start_date (str | None): First date (inclusive), or None.
+        end_date (str | None): Last date (inclusive), or None.
+        min_amount, max_amount (int | None): Inclusive bounds of the traded amount.
+        min_price, max_price (float | None): Inclusive bounds of the price per share.
+        newest_first (bool): Whether orders come newest first.
+        page_size (int): Orders per page.
+    """
+
+    def __init__(self, ledgers: dict, tickers: list = None, start_date: str = None, end_date: str = None,
+                 min_amount: int = None, max_amount: int = None, min_price: float = None,
+                 max_price: float = None, newest_first: bool = True, page_size: int = DEFAULT_PAGE_SIZE) -> None:
+        self.ledgers = ledgers
+        self.tickers = tickers
+        self.start_date = start_date
+        self.end_date = end_date
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.min_price = min_price
+        self.max_price = max_price
+        self.newest_first = newest_first
+        self.page_size = page_size
+
+    def __repr__(self) -> str:
+        return f"OrderQuery(sides={list(self.ledgers)}, tickers={self.tickers}, page_size={self.page_size})"
+
+    def __iter__(self):
+        return self.orders()
+
+    def orders(self):
+        """
+        Yields the matching orders, merged by date across tickers and sides.
+
+        Yields:
+            tuple: (side, ticker, num, amount, price, date), date as 'YYYY-MM-DD'.
+        """
+        scans = []
+        for side, tickers_dict in self.ledgers.items():
+            tickers = tickers_dict if self.tickers is None else [t for t in self.tickers if t in tickers_dict]
+            for ticker in tickers:
+                history = ledger.get_ticker_ledger(tickers_dict, ticker)
+                if history is not None and len(history):
+                    scans.append(self._scan(side, ticker, history))
+
+        if len(scans) == 1:
+            yield from scans[0]
+        else:
+            yield from heapq.merge(*scans, key=_order_key, reverse=self.newest_first)
+
+    def pages(self, start_page: int = 1):
+        """
+        Yields the result one page at a time.
+
+        Args:
+            start_page (int, optional): First page to yield (1-based).
+
+        Yields:
+            list: Up to page_size orders.
+        """
+        orders = itertools.islice(self.orders(), (start_page - 1) * self.page_size, None)
+        while True:
+            page = list(itertools.islice(orders, self.page_size))
+            if not page:
+                return
+            yield page
+
+    def page(self, number: int = 1) -> list:
+        """
+        Returns one page of the result.
+
+        Args:
+            number (int, optional): The page (1-based).
+
+        Returns:
+            list: Up to page_size orders; empty past the last page.
+        """
+        return next(self.pages(number), [])
+
+    def count(self) -> int:
+        """Counts the matching orders (reads every row of the date ranges when amount or price is filtered)."""
+        return sum(1 for _ in self.orders())
+
+    def _scan(self, side: str, ticker: str, history: ledger.TickerLedger):
+        """Yields the matching orders of one ticker ledger, reading its date range chunk by chunk."""
+        rows = history.range_slice(self.start_date, self.end_date)
+        start, stop = rows.start, rows.stop
+        size = FIRST_CHUNK_ROWS
+
+        while start < stop:
+            if self.newest_first:
+                first, last = max(start, stop - size), stop
+                stop = first
+            else:
+                first, last = start, min(stop, start + size)
+                start = last
+            size = min(2 * size, MAX_CHUNK_ROWS)
+
+            amounts = history.amounts[first:last]
+            prices = history.prices[first:last]
+            mask = np.ones(last - first, dtype=bool)
+            if self.min_amount is not None:
+                mask &= amounts >= self.min_amount
+            if self.max_amount is not None:
+                mask &= amounts <= self.max_amount
+            if self.min_price is not None:
+                mask &= prices >= self.min_price
+            if self.max_price is not None:
+                mask &= prices <= self.max_price
+
+            picked = np.flatnonzero(mask)
+            if self.newest_first:
+                picked = picked[::-1]
+            if not len(picked):
+                continue
+
+            nums = history.nums[first:last][picked].tolist()
+            dates = np.datetime_as_string(history.dates[first:last][picked], unit="D").tolist()
+            for num, amount, price, date in zip(nums, amounts[picked].tolist(), prices[picked].tolist(), dates):
+                yield side, ticker, num, amount, price, date
+
+
+def _order_key(order: tuple) -> tuple:
+    # Date, then ticker and trade number for a stable order among same-day trades
+    return order[5], order[1], order[2]
+
+
+def query(tickers_buy_dict: dict = None, tickers_sell_dict: dict = None, ticker=None, side: str = None,
+          start_date: str = None, end_date: str = None, min_amount: int = None, max_amount: int = None,
+          min_price: float = None, max_price: float = None, newest_first: bool = True,
+          page_size: int = DEFAULT_PAGE_SIZE) -> OrderQuery:
+    """
+    Builds an order-history query over the buy and/or sell ledgers.
+
+    Args:
+        tickers_buy_dict (dict, optional): Purchase history (Ledger or legacy dict).
+        tickers_sell_dict (dict, optional): Sales history (Ledger or legacy dict).
+        ticker (str | list, optional): Ticker or tickers to include. Defaults to all.
+        side (str, optional): "buy" or "sell". Defaults to both given ledgers.
+        start_date (str, optional): First date (YYYY-MM-DD, inclusive).
+        end_date (str, optional): Last date (YYYY-MM-DD, inclusive).
+        min_amount (int, optional): Smallest traded amount.
+        max_amount (int, optional): Largest traded amount.
+        min_price (float, optional): Lowest price per share.
+        max_price (float, optional): Highest price per share.
+        newest_first (bool, optional): Whether orders come newest first. Defaults to True.
+        page_size (int, optional): Orders per page.
+
+    Returns:
+        OrderQuery: The lazy query.
+
+    Raises:
+        ValueError: If side is not "buy" or "sell", or page_size is not positive.
+    """
+    if side is not None and side.lower() not in SIDES:
+        raise ValueError(f"Invalid side: {side}. Use 'buy' or 'sell'.")
+    if page_size < 1:
+        raise ValueError(f"Invalid page size: {page_size}.")
+
+    ledgers = {
+        name: tickers_dict
+        for name, tickers_dict in zip(SIDES, (tickers_buy_dict, tickers_sell_dict))
+        if tickers_dict is not None and (side is None or side.lower() == name)
+    }
+    if isinstance(ticker, str):
+        ticker = [ticker]
+    tickers = None if ticker is None else [t.upper() for t in ticker]
+
+    return OrderQuery(ledgers, tickers, start_date, end_date, min_amount, max_amount, min_price, max_price,
+                      newest_first, page_size)
+
+
+def format_orders(orders, show_side: bool = True):
+    """
+    Renders orders as fixed-width text lines, one line per order after a header.
+
+    Args:
+        orders (iterable): (side, ticker, num, amount, price, date) tuples.
+        show_side (bool, optional): Whether to include the side column.
+
+    Yields:
+        str: The header, a separator, then one line per order.
+    """
+    columns = ORDER_COLUMNS if show_side else ORDER_COLUMNS[1:]
+    header = " | ".join(f"{name:<{width}}" if name in ("Side", "Ticker", "Date") else f"{name:>{width}}"
+                        for name, width in columns)
+    yield header
+    yield "-" * len(header)
+
+    for side, ticker, num, amount, price, date in orders:
+        line = f"{ticker:<8} | {num:>8} | {amount:>10,} | {price:>12,.2f} | {date:<10}"
+        yield f"{side:<4} | {line}" if show_side else line
+
+
+def print_pages(order_query: OrderQuery, start_page: int = 1, pause=None) -> int:
+    """
+    Prints a query one page at a time.
+
+    Args:
+        order_query (OrderQuery): The query to print.
+        start_page (int, optional): First page to print (1-based).
+        pause (callable, optional): Called after every page that has a successor; printing
+            goes on only if it returns True. Defaults to printing a single page.
+
+    Returns:
+        int: The number of orders printed.
+    """
+    show_side = len(order_query.ledgers) > 1
+    printed = 0
+    pages = order_query.pages(start_page)
+    page = next(pages, None)
+
+    if page is None:
+        print("No order data available.")
+        return 0
+
+    number = start_page
+    while page is not None:
+        print(f"\nPage {number}")
+        for line in format_orders(page, show_side):
+            print(line)
+        printed += len(page)
+
+        page = next(pages, None)
+        if page is None:
+            break
+        if pause is None:
+            print(f"... more orders on page {number + 1}.")
+            break
+        if not pause():
+            break
+        number += 1
+    return printed
@@ -0,0 +1,184 @@
+"""
+Running portfolio aggregates, maintained incrementally.
+
+PortfolioTotals keeps the sums the 'total' row is made of (shares, cost basis and
+market value) and the contribution of every position to them. A trade or a price
+tick replaces the contribution of one position, so it costs O(1) whatever the size of
+the book:
+
+    totals = PortfolioTotals(account_dict)     one pass
+    ...a trade or a tick changes account_dict[ticker]...
+    totals.update(ticker, account_dict[ticker])    O(1)
+    totals.total_row()                             O(1), same fields as create_account_sum
+    totals.weight(ticker)                          O(1), 'percentage portfolio'
+
+Totals built on a positions.PositionTable are attached to it: the table replaces the
+contribution of every position it changes, and reads its weights from them.
+
+The sums are re-added from the stored contributions every RESYNC_EVERY updates, which
+bounds the floating-point drift of long streams of additions and subtractions.
+"""
+import positions
+
+# Updates after which the sums are re-added from the contributions (bounds float drift)
+RESYNC_EVERY = 100_000
+
+
+def contribution(data: dict) -> tuple:
+    """
+    Returns what one position adds to the portfolio sums.
+
+    Positions that were never priced are valued at their initial price (no gain or loss).
+
+    Args:
+        data (dict): The holding entry of account_dict (needs 'amount' and 'initial price').
+
+    Returns:
+        tuple: (shares, cost basis, market value).
+    """
+    amount = data["amount"]
+    return amount, amount * data["initial price"], amount * data.get("current price", data["initial price"])
+
+
+class PortfolioTotals:
+    """
+    Running sums of the positions of an account_dict.
+
+    Attributes:
+        shares (int): Total shares held.
+        cost_basis (float): Sum of amount * initial price.
+        market_value (float): Sum of amount * current price.
+    """
+
+    __slots__ = ("shares", "cost_basis", "market_value", "_positions", "_updates")
+
+    def __init__(self, account_dict: dict = None) -> None:
+        """
+        Args:
+            account_dict (dict, optional): The positions to sum ('total' row ignored).
+                Defaults to an empty portfolio.
+        """
+        self.rebuild({} if account_dict is None else account_dict)
+
+    def __repr__(self) -> str:
+        return f"PortfolioTotals(positions={len(self._positions)}, value={self.market_value:.2f})"
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._positions
+
+    def rebuild(self, account_dict: dict) -> None:
+        """Recomputes every contribution with one pass over the positions (attaching to a PositionTable)."""
+        if isinstance(account_dict, positions.PositionTable):
+            self._positions = account_dict.contributions()
+            account_dict.attach(self)
+        else:
+            self._positions = {
+                ticker: contribution(data) for ticker, data in account_dict.items() if ticker.lower() != "total"
+            }
+        self.resync()
+
+    def resync(self) -> None:
+        """Re-adds the sums from the stored contributions."""
+        self.shares = sum(shares for shares, _, _ in self._positions.values())
+        self.cost_basis = sum(cost for _, cost, _ in self._positions.values())
+        self.market_value = sum(value for _, _, value in self._positions.values())
+        self._updates = 0
+
+    def update(self, ticker: str, data: dict = None) -> None:
+        """
+        Replaces the contribution of one position after a trade or a price change.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            data (dict, optional): Its account_dict entry, or None if the position was closed.
+        """
+        self.replace(ticker, None if data is None else contribution(data))
+
+    def replace(self, ticker: str, values: tuple = None) -> None:
+        """
+        Replaces the contribution of one position with already computed values.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            values (tuple, optional): (shares, cost basis, market value), or None if the
+                position was closed.
+        """
+        old_shares, old_cost, old_value = self._positions.pop(ticker, (0, 0.0, 0.0))
+        new_shares, new_cost, new_value = (0, 0.0, 0.0) if values is None else values
+        if values is not None:
+            self._positions[ticker] = values
+
+        self.shares += new_shares - old_shares
+        self.cost_basis += new_cost - old_cost
+        self.market_value += new_value - old_value
+
+        self._updates += 1
+        if self._updates >= RESYNC_EVERY:
+            self.resync()
+
+    @property
+    def price_change(self) -> float:
+        """Unrealized profit/loss of the whole portfolio."""
+        return self.market_value - self.cost_basis
+
+    @property
+    def average_initial_price(self) -> float:
+        return self.cost_basis / self.shares if self.shares else 0.0
+
+    @property
+    def average_current_price(self) -> float:
+        return self.market_value / self.shares if self.shares else 0.0
+
+    @property
+    def percentage_change(self) -> float:
+        """Return of the whole portfolio on its cost basis (0-100), 0.0 without cost basis."""
+        return self.price_change * 100 / self.cost_basis if self.cost_basis else 0.0
+
+    def weight(self, ticker: str) -> float:
+        """
+        Returns the weight of one position in the portfolio.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+
+        Returns:
+            float: Its share of the market value (0-100), 0.0 for an empty or unknown position.
+        """
+        position = self._positions.get(ticker)
+        if position is None or self.market_value == 0:
+            return 0.0
+        return position[2] / self.market_value * 100
+
+    def total_row(self) -> dict:
+        """
+        Returns the portfolio 'total' row.
+
+        Returns:
+            dict: The same fields as a position entry (see calculate_func.create_account_sum).
+        """
+        return {
+            "amount": self.shares,
+            "initial price": self.average_initial_price,
+            "current price": self.average_current_price,
+            "stock value in portfolio": self.market_value,
+            "price change": self.price_change,
+            "percentage change": self.percentage_change,
+            "percentage portfolio": 100.0,
+        }
+
+    def write_weights(self, account_dict: dict) -> None:
+        """
+        Writes every position's 'percentage portfolio' from the running total (one pass).
+
+        A PositionTable reads its weights from its attached totals, so it is left as it is.
+        """
+        if isinstance(account_dict, positions.PositionTable):
+            return
+        if self.market_value == 0:
+            return
+        for ticker, data in account_dict.items():
+            if ticker in self._positions:
+                data["percentage portfolio"] = self._positions[ticker][2] / self.market_value * 100
@@ -0,0 +1,400 @@
+"""
+Compact, array-backed account positions.
+
+A PositionTable stores the positions of one account as rows of a single structured
+NumPy array (amount, initial price, current price) with a ticker -> row index. The
+other account_dict fields (value, price change, percentage change, portfolio weight)
+are derived from these columns when read, so a position takes 24 bytes plus its index
+entry instead of a dict of seven string keys and the 'total' row is never mixed in.
+
+Weights are read from the portfolio_totals.PortfolioTotals built on the table, which
+the table keeps current on every change, so a weight is O(1) and never stale after
+another position changed. A table without running totals sums its column on each read.
+
+The table keeps the old account_dict shape readable: `table[ticker]` is a read-only
+dict-style view with the same keys, and iterating, `in`, `len` and `items()` behave
+like the dict they replace. Changes go through the table (apply_trade, reprice,
+reprice_many), and the full-book math runs on whole columns.
+
+Closed positions leave a dead row behind, so the remaining rows keep their place and
+order; the array is compacted once dead rows outnumber live ones.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping
+
+import lazy_import
+
+np = lazy_import.module("numpy")
+
+# A never-priced position has a NaN current price
+COLUMNS = [("amount", "i8"), ("initial_price", "f8"), ("current_price", "f8")]
+
+# account_dict keys of a position, in their original order
+FIELDS = (
+    "amount", "initial price", "current price", "stock value in portfolio",
+    "price change", "percentage change", "percentage portfolio",
+)
+
+PRICED_FIELDS = FIELDS[2:6]
+
+# Dead rows tolerated before a compaction (on top of one per live row)
+MIN_DEAD_ROWS = 16
+
+
+class PositionView(Mapping):
+    """
+    Read-only account_dict entry of one position, computed from its table row.
+
+    The market-price dependent keys are missing until the position is priced, as in the
+    dict they replace. 'percentage portfolio' is always current: it is the position's share
+    of the portfolio market value (never-priced positions counted at their cost), read from
+    the table's running totals when it has them.
+    """
+
+    __slots__ = ("_table", "_ticker")
+
+    def __init__(self, table: PositionTable, ticker: str) -> None:
+        self._table = table
+        self._ticker = ticker
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def __getitem__(self, field: str):
+        row = self._table._rows[self._table._index[self._ticker]]
+        amount, initial_price, current_price = row.tolist()
+
+        if field == "amount":
+            return amount
+        if field == "initial price":
+            return initial_price
+        if field == "percentage portfolio":
+            if self._table._totals is not None:
+                return self._table._totals.weight(self._ticker)
+            total = self._table.market_value()
+            value = amount * (initial_price if current_price != current_price else current_price)
+            return value / total * 100 if total else 0.0
+        if field not in PRICED_FIELDS or current_price != current_price:
+            raise KeyError(field)
+
+        if field == "current price":
+            return current_price
+        if field == "stock value in portfolio":
+            return amount * current_price
+        if field == "price change":
+            return (current_price - initial_price) * amount
+        return ((current_price - initial_price) / initial_price) * 100
+
+    def __iter__(self):
+        current_price = self._table._rows["current_price"][self._table._index[self._ticker]]
+        yield "amount"
+        yield "initial price"
+        if current_price == current_price:
+            yield from PRICED_FIELDS
+        yield "percentage portfolio"
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class PositionTable(Mapping):
+    """
+    Positions of one account in a structured NumPy array with a ticker -> row index.
+
+    Attributes:
+        capacity (int): Rows allocated (live, dead and free).
+        totals (PortfolioTotals | None): Running sums kept current on every change (see attach).
+    """
+
+    __slots__ = ("_rows", "_size", "_index", "_totals")
+
+    def __init__(self, capacity: int = 8) -> None:
+        """
+        Creates an empty table.
+
+        Args:
+            capacity (int, optional): Initial number of preallocated rows.
+        """
+        self._rows = np.zeros(capacity, dtype=COLUMNS)
+        self._size = 0
+        self._index = {}
+        self._totals = None
+
+    @classmethod
+    def from_columns(cls, tickers: list, amounts, initial_prices, current_prices) -> PositionTable:
+        """
+        Builds a table from aligned columns (e.g., the arrays of a snapshot).
+
+        Args:
+            tickers (list): The tickers, in display order.
+            amounts (array-like): Shares held.
+            initial_prices (array-like): Average cost per share.
+            current_prices (array-like): Last prices (NaN for never-priced positions).
+
+        Returns:
+            PositionTable: The table.
+        """
+        size = len(tickers)
+        table = cls(capacity=max(8, size))
+        rows = table._rows
+        rows["amount"][:size] = amounts
+        rows["initial_price"][:size] = initial_prices
+        rows["current_price"][:size] = current_prices
+        table._size = size
+        table._index = {ticker: row for row, ticker in enumerate(tickers)}
+        return table
+
+    @classmethod
+    def from_dict(cls, account_dict: dict) -> PositionTable:
+        """
+        Converts a legacy account_dict (its 'total' row is dropped).
+
+        Args:
+            account_dict (dict): ticker -> {"amount", "initial price", ["current price"], ...}.
+
+        Returns:
+            PositionTable: The equivalent table.
+        """
+        positions = {ticker: data for ticker, data in account_dict.items() if ticker.lower() != "total"}
+        return cls.from_columns(
+            list(positions),
+            [data["amount"] for data in positions.values()],
+            [data["initial price"] for data in positions.values()],
+            [data.get("current price", np.nan) for data in positions.values()],
+        )
+
+    def __getitem__(self, ticker: str) -> PositionView:
+        if ticker not in self._index:
+            raise KeyError(ticker)
+        return PositionView(self, ticker)
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, ticker) -> bool:
+        return ticker in self._index
+
+    def __repr__(self) -> str:
+        return f"PositionTable(positions={len(self._index)}, capacity={self.capacity})"
+
+    def __deepcopy__(self, memo: dict) -> PositionTable:
+        return self.copy()
+
+    @property
+    def capacity(self) -> int:
+        return len(self._rows)
+
+    @property
+    def totals(self):
+        return self._totals
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the row array (the index dict not included)."""
+        return self._rows.nbytes
+
+    def copy(self) -> PositionTable:
+        """Returns an independent copy of the table."""
+        table = PositionTable.__new__(PositionTable)
+        table._rows = self._rows.copy()
+        table._size = self._size
+        table._index = dict(self._index)
+        # The running totals belong to this table
+        table._totals = None
+        return table
+
+    def attach(self, totals) -> None:
+        """
+        Makes running totals the source of the weights and keeps them current.
+
+        Every later change of a position replaces its contribution in the totals (O(1)).
+        Called by PortfolioTotals.rebuild(), which fills them from this table first.
+
+        Args:
+            totals (PortfolioTotals): The running sums of this table.
+        """
+        self._totals = totals
+
+    def to_dict(self) -> dict:
+        """Returns the positions as a legacy account_dict (plain dicts, no 'total' row)."""
+        return {ticker: dict(PositionView(self, ticker)) for ticker in self._index}
+
+    def to_columns(self) -> dict:
+        """
+        Returns the live rows as aligned columns.
+
+        Returns:
+            dict: {"tickers": list, "amount", "initial_price", "current_price": np.ndarray}.
+        """
+        live = self._rows[self._live_rows()]
+        return {"tickers": list(self._index), **{name: live[name] for name, _ in COLUMNS}}
+
+    def apply_trade(self, order_type_buy: bool, ticker: str, amount: int, price: float) -> None:
+        """
+        Applies a single trade to the share amount and weighted average cost of a holding.
+
+        Args:
+            order_type_buy (bool): True for a Buy order, False for a Sell order.
+            ticker (str): The stock ticker symbol.
+            amount (int): The number of shares traded.
+            price (float): The trade price per share.
+
+        Raises:
+            ValueError: If trying to sell more shares than owned.
+        """
+        row = self._index.get(ticker)
+
+        if order_type_buy:
+            if row is None:
+                self._add(ticker, amount, price)
+            else:
+                old_shares, old_initial_price, _ = self._rows[row].tolist()
+                total_shares = old_shares + amount
+                self._rows["amount"][row] = total_shares
+                self._rows["initial_price"][row] = ((old_initial_price * old_shares) + (price * amount)) / total_shares
+            self._changed(ticker)
+            return
+
+        current_shares = 0 if row is None else int(self._rows["amount"][row])
+        remaining_shares = current_shares - amount
+
+        if remaining_shares < 0:
+            raise ValueError(f"Insufficient shares to sell {amount} of {ticker}.")
+
+        if remaining_shares == 0:
+            self.remove(ticker)
+        else:
+            self._rows["amount"][row] = remaining_shares
+            self._changed(ticker)
+
+    def remove(self, ticker: str) -> None:
+        """
+        Closes a position.
+
+        Raises:
+            KeyError: If the ticker is not held.
+        """
+        row = self._index.pop(ticker)
+        # A zeroed dead row adds nothing to the column sums
+        self._rows[row] = (0, 0.0, 0.0)
+        self._changed(ticker)
+        if self._size - len(self._index) > max(MIN_DEAD_ROWS, len(self._index)):
+            self._compact(len(self._rows))
+
+    def reprice(self, ticker: str, price: float) -> None:
+        """
+        Sets the last price of one position.
+
+        Raises:
+            KeyError: If the ticker is not held.
+        """
+        self._rows["current_price"][self._index[ticker]] = price
+        self._changed(ticker)
+
+    def reprice_many(self, prices) -> list:
+        """
+        Applies already fetched prices to every position they cover, in one column update.
+
+        Args:
+            prices (Mapping): ticker -> last price (e.g., a pd.Series of quotes).
+
+        Returns:
+            list: Tickers that are still unpriced (no price given and never priced before).
+        """
+        tickers = list(self._index)
+        if not tickers:
+            return []
+
+        rows = self._live_rows()
+        if hasattr(prices, "reindex"):
+            new_prices = prices.reindex(tickers).to_numpy(dtype=np.float64)
+        else:
+            new_prices = np.array([prices.get(ticker, np.nan) for ticker in tickers], dtype=np.float64)
+
+        current = self._rows["current_price"][rows]
+        current = np.where(np.isnan(new_prices), current, new_prices)
+        self._rows["current_price"][rows] = current
+        if self._totals is not None:
+            self._totals.rebuild(self)
+        return [tickers[i] for i in np.flatnonzero(np.isnan(current))]
+
+    def market_values(self) -> np.ndarray:
+        """Value of every live position, in ticker order (never-priced ones at their cost)."""
+        live = self._rows[self._live_rows()]
+        return live["amount"] * np.where(np.isnan(live["current_price"]), live["initial_price"], live["current_price"])
+
+    def market_value(self) -> float:
+        """Summed value of the positions (never-priced ones at their cost), on whole columns."""
+        rows = self._rows[:self._size]
+        return float((rows["amount"] * np.where(np.isnan(rows["current_price"]),
+                                                rows["initial_price"], rows["current_price"])).sum())
+
+    def total_row(self) -> dict:
+        """
+        Returns the portfolio 'total' row, computed on whole columns.
+
+        Returns:
+            dict: The same fields as a position entry (see calculate_func.create_account_sum).
+        """
+        rows = self._rows[:self._size]
+        shares = int(rows["amount"].sum())
+        cost_basis = float((rows["amount"] * rows["initial_price"]).sum())
+        market_value = self.market_value()
+        average_initial_price = cost_basis / shares if shares else 0.0
+        return {
+            "amount": shares,
+            "initial price": average_initial_price,
+            "current price": market_value / shares if shares else 0.0,
+            "stock value in portfolio": market_value,
+            "price change": market_value - cost_basis,
+            "percentage change": (market_value - cost_basis) * 100 / cost_basis if cost_basis else 0.0,
+            "percentage portfolio": 100.0,
+        }
+
+    def contributions(self) -> dict:
+        """
+        Returns what each position adds to the portfolio sums (see portfolio_totals.contribution).
+
+        Returns:
+            dict: ticker -> (shares, cost basis, market value).
+        """
+        live = self._rows[self._live_rows()]
+        amounts = live["amount"]
+        costs = amounts * live["initial_price"]
+        values = amounts * np.where(np.isnan(live["current_price"]), live["initial_price"], live["current_price"])
+        return dict(zip(self._index, zip(amounts.tolist(), costs.tolist(), values.tolist())))
+
+    def _changed(self, ticker: str) -> None:
+        # Replaces the position's contribution in the running totals (see contributions())
+        if self._totals is None:
+            return
+        row = self._index.get(ticker)
+        if row is None:
+            self._totals.replace(ticker, None)
+            return
+        amount, initial_price, current_price = self._rows[row].tolist()
+        value = amount * (initial_price if current_price != current_price else current_price)
+        self._totals.replace(ticker, (amount, amount * initial_price, value))
+
+    def _live_rows(self) -> np.ndarray:
+        return np.fromiter(self._index.values(), dtype=np.intp, count=len(self._index))
+
+    def _add(self, ticker: str, amount: int, price: float) -> None:
+        if self._size == len(self._rows):
+            self._compact(max(8, 2 * len(self._index)))
+        self._rows[self._size] = (amount, price, np.nan)
+        self._index[ticker] = self._size
+        self._size += 1
+
+    def _compact(self, capacity: int) -> None:
+        """Moves the live rows to the front of a new array, keeping their order."""
+        rows = np.zeros(max(capacity, len(self._index) + 1), dtype=COLUMNS)
+        size = len(self._index)
+        rows[:size] = self._rows[self._live_rows()]
+        self._rows = rows
+        self._size = size
+        self._index = {ticker: row for row, ticker in enumerate(self._index)}
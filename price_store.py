@@ -0,0 +1,354 @@
+"""
+Persistent on-disk OHLCV bar store that sits in front of the market-data provider.
+
+Bars are kept in a small SQLite database keyed by (ticker, date). Every ticker also
+records the date ranges that were already requested from the provider, so repeated and
+historical lookups (including weekends and holidays inside a fetched range) are
+answered from disk without touching the network. Misses are filled by fetching a
+whole window of bars around the requested date instead of a single day.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import instrumentation
+import lazy_import
+import market_data
+
+np = lazy_import.module("numpy")
+
+# Number of calendar days fetched on each side of a missed date
+FETCH_WINDOW_DAYS = 365
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+class BarStore:
+    """
+    SQLite-backed cache of daily OHLCV bars with range-based miss filling.
+
+    Attributes:
+        path (str): Location of the SQLite database (":memory:" for a throwaway store).
+        fetcher (callable): Function (ticker, start, end) -> list of bar tuples used on a miss.
+        window_days (int): Calendar days fetched on each side of a missed date.
+        trust_empty (bool): Whether an empty fetch may be cached as "no bars in this range".
+    """
+
+    def __init__(self, path: str = ":memory:", fetcher=None, window_days: int = FETCH_WINDOW_DAYS,
+                 trust_empty: bool = False) -> None:
+        """
+        Opens (or creates) the bar database.
+
+        Args:
+            path (str, optional): Database file path. Defaults to an in-memory database.
+            fetcher (callable, optional): Range fetcher. Defaults to the active provider's history().
+            window_days (int, optional): Size of the fetch window around a miss.
+            trust_empty (bool, optional): Whether the fetcher returning no bars confirms that the
+                range has none (see MarketDataProvider.complete_history). Defaults to False, so an
+                empty or failed response is fetched again on the next lookup.
+        """
+        self.path = path
+        self.fetcher = fetcher or market_data.get_provider().history
+        self.window_days = window_days
+        self.trust_empty = trust_empty
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._coverage = {}  # ticker -> sorted list of (start, end) date strings
+        self._close_arrays = {}  # ticker -> (dates, closes) NumPy arrays, see get_close_array()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS bars (
+                ticker TEXT NOT NULL,
+                date TEXT NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (ticker, date)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS coverage (
+                ticker TEXT NOT NULL,
+                start TEXT NOT NULL,
+                end TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS coverage_ticker ON coverage (ticker);
+            """
+        )
+        self._conn.commit()
+
+    def __repr__(self) -> str:
+        return f"BarStore(path={self.path})"
+
+    def get_bar(self, ticker: str, date: str) -> list | None:
+        """
+        Returns the OHLCV bar of a ticker for a single date, fetching a window on a miss.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            date (str): The requested date in 'YYYY-MM-DD' format.
+
+        Returns:
+            list | None: [Open, High, Low, Close, Volume] or None if the market had no bar that day.
+        """
+        ticker = ticker.upper()
+        bar = self._read_bar(ticker, date)
+        hit = bar is not None or self.is_covered(ticker, date)
+        instrumentation.record_cache("price_store.bars", hit)
+
+        if not hit:
+            # Fill the miss with a whole window so neighbouring lookups become hits
+            day = datetime.strptime(date, DATE_FORMAT)
+            window_start = (day - timedelta(days=self.window_days)).strftime(DATE_FORMAT)
+            window_end = min(day + timedelta(days=self.window_days), datetime.now()).strftime(DATE_FORMAT)
+            self.ensure_range(ticker, window_start, max(window_end, date))
+            bar = self._read_bar(ticker, date)
+
+        return bar
+
+    def get_bars(self, ticker: str, start_date: str, end_date: str) -> list:
+        """
+        Returns every stored bar of a ticker in an inclusive date range, filling gaps first.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            start_date (str): First date of the range ('YYYY-MM-DD').
+            end_date (str): Last date of the range ('YYYY-MM-DD').
+
+        Returns:
+            list: A date-sorted list of (date, open, high, low, close, volume) tuples.
+        """
+        ticker = ticker.upper()
+        self.ensure_range(ticker, start_date, end_date)
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, open, high, low, close, volume FROM bars "
+                "WHERE ticker = ? AND date BETWEEN ? AND ? ORDER BY date",
+                (ticker, start_date, end_date)
+            ).fetchall()
+        return rows
+
+    def get_close_array(self, ticker: str, start_date: str, end_date: str) -> tuple:
+        """
+        Returns the closing prices of a ticker in an inclusive date range as NumPy arrays.
+
+        The first call for a ticker loads all of its stored closes into memory; later calls
+        are array slices until new bars of that ticker are written. Gaps are filled first.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            start_date (str): First date of the range ('YYYY-MM-DD').
+            end_date (str): Last date of the range ('YYYY-MM-DD').
+
+        Returns:
+            tuple: (dates datetime64[D] array, closes float64 array), sorted by date.
+        """
+        ticker = ticker.upper()
+        self.ensure_range(ticker, start_date, end_date)
+
+        with self._lock:
+            cached = self._close_arrays.get(ticker)
+            instrumentation.record_cache("price_store.close_arrays", cached is not None)
+            if cached is None:
+                rows = self._conn.execute(
+                    "SELECT date, close FROM bars WHERE ticker = ? ORDER BY date", (ticker,)
+                ).fetchall()
+                cached = (
+                    np.array([row[0] for row in rows], dtype="datetime64[D]"),
+                    np.array([row[1] for row in rows], dtype=np.float64),
+                )
+                self._close_arrays[ticker] = cached
+
+        dates, closes = cached
+        first = np.searchsorted(dates, np.datetime64(start_date, 'D'), side='left')
+        last = np.searchsorted(dates, np.datetime64(end_date, 'D'), side='right')
+        return dates[first:last], closes[first:last]
+
+    def ensure_range(self, ticker: str, start_date: str, end_date: str) -> None:
+        """
+        Fetches every part of a date range that was never requested before.
+
+        Only dates before today are marked as covered, so the still-moving bar of the
+        current session is fetched again on the next lookup. A fetch that returns no bars
+        is not marked as covered either (an empty or rate-limited response is not proof
+        that the range has no bars), unless the store trusts empty fetches.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            start_date (str): First date of the range ('YYYY-MM-DD').
+            end_date (str): Last date of the range ('YYYY-MM-DD').
+        """
+        ticker = ticker.upper()
+
+        gaps = self.missing_ranges(ticker, start_date, end_date)
+        instrumentation.record_cache("price_store.ranges", not gaps)
+
+        for gap_start, gap_end in gaps:
+            bars = self.fetcher(ticker, gap_start, gap_end)
+            if not bars and not self.trust_empty:
+                continue
+
+            # Never mark today (or the future) as complete
+            yesterday = (datetime.now() - timedelta(days=1)).strftime(DATE_FORMAT)
+            covered_end = min(gap_end, yesterday)
+            covered = (gap_start, covered_end) if covered_end >= gap_start else None
+            self._write_range(ticker, bars, covered)
+
+    def is_covered(self, ticker: str, date: str) -> bool:
+        """
+        Checks whether a date of a ticker was already part of a fetched range.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            date (str): The date in 'YYYY-MM-DD' format.
+
+        Returns:
+            bool: True if the store can answer for this date without a fetch.
+        """
+        return any(start <= date <= end for start, end in self._get_coverage(ticker.upper()))
+
+    def missing_ranges(self, ticker: str, start_date: str, end_date: str) -> list:
+        """
+        Computes the sub-ranges of a date range that are not covered yet.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            start_date (str): First date of the range ('YYYY-MM-DD').
+            end_date (str): Last date of the range ('YYYY-MM-DD').
+
+        Returns:
+            list: A list of (start, end) date string tuples still to be fetched.
+        """
+        gaps = []
+        cursor = start_date
+
+        for cov_start, cov_end in self._get_coverage(ticker.upper()):
+            if cov_end < cursor:
+                continue
+            if cov_start > end_date:
+                break
+            if cov_start > cursor:
+                gaps.append((cursor, _shift(cov_start, -1)))
+            cursor = _shift(cov_end, 1)
+            if cursor > end_date:
+                break
+
+        if cursor <= end_date:
+            gaps.append((cursor, end_date))
+
+        return gaps
+
+    def clear(self, ticker: str = None) -> None:
+        """
+        Drops cached bars and coverage for one ticker, or for every ticker.
+
+        Args:
+            ticker (str, optional): The ticker to forget. Defaults to all tickers.
+        """
+        with self._lock:
+            if ticker is None:
+                self._conn.execute("DELETE FROM bars")
+                self._conn.execute("DELETE FROM coverage")
+                self._coverage = {}
+                self._close_arrays = {}
+            else:
+                ticker = ticker.upper()
+                self._conn.execute("DELETE FROM bars WHERE ticker = ?", (ticker,))
+                self._conn.execute("DELETE FROM coverage WHERE ticker = ?", (ticker,))
+                self._coverage.pop(ticker, None)
+                self._close_arrays.pop(ticker, None)
+            self._conn.commit()
+
+    def _read_bar(self, ticker: str, date: str) -> list | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT open, high, low, close, volume FROM bars WHERE ticker = ? AND date = ?",
+                (ticker, date)
+            ).fetchone()
+        return list(row) if row is not None else None
+
+    def _write_range(self, ticker: str, bars: list, covered: tuple | None) -> None:
+        # Bars and coverage go in one transaction, so a range is never marked as covered
+        # without its bars, and the coverage is merged with what is on disk right now
+        # (another process may have extended it since it was cached here)
+        if not bars and covered is None:
+            return
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                if bars:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [(ticker, *bar) for bar in bars]
+                    )
+                if covered is not None:
+                    rows = self._conn.execute(
+                        "SELECT start, end FROM coverage WHERE ticker = ?", (ticker,)
+                    ).fetchall()
+                    merged = _merge_ranges([tuple(row) for row in rows] + [covered])
+                    self._conn.execute("DELETE FROM coverage WHERE ticker = ?", (ticker,))
+                    self._conn.executemany(
+                        "INSERT INTO coverage VALUES (?, ?, ?)", [(ticker, s, e) for s, e in merged]
+                    )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            if covered is not None:
+                self._coverage[ticker] = merged
+            self._close_arrays.pop(ticker, None)
+
+    def _get_coverage(self, ticker: str) -> list:
+        with self._lock:
+            if ticker not in self._coverage:
+                rows = self._conn.execute(
+                    "SELECT start, end FROM coverage WHERE ticker = ? ORDER BY start", (ticker,)
+                ).fetchall()
+                self._coverage[ticker] = [tuple(row) for row in rows]
+            return self._coverage[ticker]
+
+
+def _merge_ranges(ranges: list) -> list:
+    # Merge overlapping or adjacent (start, end) intervals
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= _shift(merged[-1][1], 1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _shift(date: str, days: int) -> str:
+    """Moves a 'YYYY-MM-DD' date string by a number of calendar days."""
+    return (datetime.strptime(date, DATE_FORMAT) + timedelta(days=days)).strftime(DATE_FORMAT)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(provider: market_data.MarketDataProvider = None) -> BarStore:
+    """
+    Returns the bar store of a market-data provider, opening it on first use.
+
+    Each provider gets its own store (persistent under CACHE_DIR for Yahoo Finance,
+    in memory for local fixture folders), so data from different sources never mixes.
+
+    Args:
+        provider (MarketDataProvider, optional): Defaults to the active provider.
+
+    Returns:
+        BarStore: The provider's bar store.
+    """
+    provider = provider or market_data.get_provider()
+
+    with _stores_lock:
+        if provider not in _stores:
+            _stores[provider] = BarStore(provider.cache_file("bars.sqlite"), fetcher=provider.history,
+                                         trust_empty=provider.complete_history)
+        return _stores[provider]
@@ -0,0 +1,352 @@
+"""
+Vectorized multi-ticker profit engine.
+
+Computes the same per-ticker report as calculate_func.profit() for many tickers at once.
+Instead of building and walking a tuple timeline per ticker, every trade inside the
+window is gathered from the columnar ledgers into flat arrays, sorted once, and the
+profit contribution of each action is evaluated with array operations:
+
+    buy  : (price - previous price) * amount held before the buy (if positive)
+    sell : (price - previous price) * (0.75 * sold amount + amount held after the sell)
+    end  : (closing price - previous price) * amount held at the end
+
+Start and end closing prices come from a ticker x date price matrix built from the
+persistent bar store.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+import lazy_import
+import ledger
+import price_store
+import trading_calendar
+
+np = lazy_import.module("numpy")
+pd = lazy_import.module("pandas")
+
+# Number of trading sessions searched backwards for a closing price (like create_start_account_dict)
+LOOKBACK_SESSIONS = 10
+
+# Default number of tickers whose prices are resolved concurrently
+DEFAULT_MAX_WORKERS = 8
+
+# Same tax/fee adjustment applied to sells as go_over_action
+SELL_PROFIT_FACTOR = 0.75
+
+# Event kinds, in the order actions of the same day are processed
+BUY, SELL, END = 0, 1, 2
+
+# Report windows of profit_windows() as pd.DateOffset arguments ("1D", "YTD" and "ALL" are resolved separately)
+WINDOWS = {
+    "1D": None,
+    "1W": {"weeks": 1},
+    "1M": {"months": 1},
+    "3M": {"months": 3},
+    "YTD": None,
+    "1Y": {"years": 1},
+    "ALL": None,
+}
+
+
+def closes_for_ticker(ticker: str, dates: list, lookback: int = LOOKBACK_SESSIONS,
+                      exact_dates=()) -> list:
+    """
+    Finds the closing price of a ticker on (or shortly before) each requested date.
+
+    All dates are served by a single ranged bar lookup covering the lookback of the
+    earliest date up to the latest one. Dates listed in exact_dates (report end dates)
+    only accept the bar of that very day, like the legacy profit() end price.
+
+    Args:
+        ticker (str): The stock ticker symbol.
+        dates (list): Trading dates in 'YYYY-MM-DD' format.
+        lookback (int, optional): Trading sessions searched backwards for each date.
+        exact_dates (iterable, optional): Dates that get no lookback.
+
+    Returns:
+        list: One close per date, or NaN when no bar exists within the lookback.
+    """
+    calendar = trading_calendar.get_calendar()
+    range_start = calendar.shift(min(dates), -(lookback - 1)) or trading_calendar.NASDAQ_FOUNDING_DATE
+    range_end = max(dates)
+
+    try:
+        bars = price_store.get_store().get_bars(ticker, range_start, range_end)
+    except Exception as e:
+        print(f"Error fetching prices for {ticker}: {e}")
+        return [np.nan] * len(dates)
+
+    bar_dates = [bar[0] for bar in bars]
+    closes = []
+
+    for date in dates:
+        # Last bar on or before the date, accepted only inside the lookback window
+        position = bisect_right(bar_dates, date) - 1
+        if date in exact_dates:
+            window_start = date
+        else:
+            window_start = calendar.shift(date, -(lookback - 1)) or trading_calendar.NASDAQ_FOUNDING_DATE
+        if position >= 0 and bar_dates[position] >= window_start:
+            closes.append(bars[position][4])
+        else:
+            closes.append(np.nan)
+
+    return closes
+
+
+@instrumentation.timed()
+def build_price_matrix(tickers: list, dates: list, lookback: int = LOOKBACK_SESSIONS,
+                       max_workers: int = DEFAULT_MAX_WORKERS, exact_dates=()) -> np.ndarray:
+    """
+    Builds a ticker x date matrix of closing prices.
+
+    Price lookups are I/O bound, so tickers are resolved concurrently on a bounded
+    thread pool. Rows are always filled in the order of `tickers`, whatever the
+    completion order of the workers.
+
+    Args:
+        tickers (list): The stock ticker symbols (rows).
+        dates (list): Trading dates in 'YYYY-MM-DD' format (columns).
+        lookback (int, optional): Trading sessions searched backwards for each date.
+        max_workers (int, optional): Maximum number of tickers resolved at the same time.
+        exact_dates (iterable, optional): Dates that get no lookback (see closes_for_ticker).
+
+    Returns:
+        np.ndarray: float64 matrix of shape (len(tickers), len(dates)); NaN marks missing prices.
+    """
+    matrix = np.full((len(tickers), len(dates)), np.nan)
+    if not tickers:
+        return matrix
+
+    workers = max(1, min(max_workers or 1, len(tickers)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        rows = pool.map(lambda ticker: closes_for_ticker(ticker, dates, lookback, exact_dates), tickers)
+        for row, closes in enumerate(rows):
+            matrix[row] = closes
+
+    return matrix
+
+
+@instrumentation.timed()
+def batch_profit(tickers: list, start_date: str, end_date: str,
+                 tickers_buy_dict: dict, tickers_sell_dict: dict,
+                 price_matrix: np.ndarray = None, max_workers: int = DEFAULT_MAX_WORKERS) -> dict:
+    """
+    Calculates the profit metrics of many tickers over the same timeframe at once.
+
+    Args:
+        tickers (list): The stock ticker symbols to report on.
+        start_date (str): Calculation start date ('YYYY-MM-DD', a trading day).
+        end_date (str): Calculation end date ('YYYY-MM-DD', a trading day).
+        tickers_buy_dict (dict): Global purchase history (Ledger or legacy dict).
+        tickers_sell_dict (dict): Global sales history (Ledger or legacy dict).
+        price_matrix (np.ndarray, optional): (len(tickers), 2) matrix of start/end closes.
+            Built from the bar store when omitted: the start close may come from up to
+            LOOKBACK_SESSIONS sessions earlier, the end close must be from end_date itself.
+        max_workers (int, optional): Tickers whose prices are fetched concurrently.
+
+    Returns:
+        dict: A profit_dict with the same structure calculate_func.profit() produces,
+              ready for calculate_func.create_all_profit_dict.
+
+    Raises:
+        ValueError: If no closing price is available at the end date for a reported ticker.
+    """
+    tickers = [ticker.upper() for ticker in tickers]
+    n_tickers = len(tickers)
+    if n_tickers == 0:
+        return {}
+
+    if price_matrix is None:
+        price_matrix = build_price_matrix(tickers, [start_date, end_date], max_workers=max_workers,
+                                          exact_dates={end_date})
+
+    # Missing start prices count as 0 like the lookback in create_start_account_dict
+    start_price = np.nan_to_num(price_matrix[:, 0], nan=0.0)
+    end_price = price_matrix[:, 1]
+
+    # --- Gather the state at the start and every action inside the window ---
+    start_amount = np.zeros(n_tickers, dtype=np.int64)
+    columns = {"code": [], "kind": [], "date": [], "seq": [], "amount": [], "price": []}
+
+    for code, ticker in enumerate(tickers):
+        for kind, tickers_dict in ((BUY, tickers_buy_dict), (SELL, tickers_sell_dict)):
+            ticker_ledger = ledger.get_ticker_ledger(tickers_dict, ticker)
+            if ticker_ledger is None:
+                continue
+
+            held = ticker_ledger.holdings_at(start_date)
+            start_amount[code] += held if kind == BUY else -held
+
+            rows = ticker_ledger.range_slice(start_date, end_date)
+            count = rows.stop - rows.start
+            if count == 0:
+                continue
+
+            columns["code"].append(np.full(count, code, dtype=np.int64))
+            columns["kind"].append(np.full(count, kind, dtype=np.int64))
+            columns["date"].append(ticker_ledger.dates[rows])
+            columns["seq"].append(np.arange(count, dtype=np.int64))
+            columns["amount"].append(ticker_ledger.amounts[rows])
+            columns["price"].append(ticker_ledger.prices[rows])
+
+    # One 'end' action per ticker, processed after every trade of the last day
+    end_day = ledger.to_datetime64(end_date)
+    columns["code"].append(np.arange(n_tickers, dtype=np.int64))
+    columns["kind"].append(np.full(n_tickers, END, dtype=np.int64))
+    columns["date"].append(np.full(n_tickers, end_day))
+    columns["seq"].append(np.zeros(n_tickers, dtype=np.int64))
+    columns["amount"].append(np.zeros(n_tickers, dtype=np.int64))
+    columns["price"].append(end_price)
+
+    code, kind, date, seq, amount, price = (
+        np.concatenate(columns[name]) for name in ("code", "kind", "date", "seq", "amount", "price")
+    )
+
+    # Timeline order: per ticker, by date, buys before sells before the end action
+    order = np.lexsort((seq, kind, date, code))
+    code, kind, amount, price = code[order], kind[order], amount[order], price[order]
+
+    is_buy = kind == BUY
+    is_sell = kind == SELL
+    group_start = np.r_[True, code[1:] != code[:-1]]
+
+    # --- Holdings before/after every action (grouped cumulative sums) ---
+    signed = np.where(is_buy, amount, np.where(is_sell, -amount, 0))
+    running = np.cumsum(signed)
+    group_id = np.cumsum(group_start) - 1
+    group_base = (running - signed)[group_start]
+    amount_after = start_amount[code] + running - group_base[group_id]
+    amount_before = amount_after - signed
+
+    # --- Price moves since the previous action of the same ticker ---
+    previous_price = np.r_[0.0, price[:-1]]
+    previous_price[group_start] = start_price[code[group_start]]
+    move = price - previous_price
+
+    increment = np.where(
+        is_buy, np.where(amount_before > 0, move * amount_before, 0.0),
+        np.where(is_sell, move * amount * SELL_PROFIT_FACTOR + move * amount_after, move * amount_after)
+    )
+    profit = np.bincount(code, weights=increment, minlength=n_tickers)
+
+    # --- Initial values (first buy of the window fills in missing ones) ---
+    initial_amount = start_amount.copy()
+    initial_price = np.where(start_amount != 0, start_price, 0.0)
+    initial_value = start_amount * start_price
+    initial_invest = initial_value + np.bincount(code, weights=np.where(is_buy, amount * price, 0.0),
+                                                 minlength=n_tickers)
+
+    # Events are grouped by ticker, so the first occurrence of each code is its first buy
+    buy_positions = np.flatnonzero(is_buy)
+    buy_codes, first_occurrence = np.unique(code[buy_positions], return_index=True)
+    first_buy = np.full(n_tickers, -1, dtype=np.int64)
+    first_buy[buy_codes] = buy_positions[first_occurrence]
+    has_buy = first_buy >= 0
+
+    fill_price = has_buy & (initial_price == 0)
+    initial_price[fill_price] = price[first_buy[fill_price]]
+    fill_amount = has_buy & (initial_amount == 0)
+    initial_amount[fill_amount] = amount[first_buy[fill_amount]]
+    fill_value = has_buy & (initial_value == 0)
+    initial_value[fill_value] = initial_amount[fill_value] * initial_price[fill_value]
+
+    final_amount = start_amount + np.bincount(code, weights=signed, minlength=n_tickers).astype(np.int64)
+    percentage = np.divide(profit, initial_invest, out=np.zeros(n_tickers), where=initial_invest != 0) * 100
+
+    # --- Assemble the profit_dict, dropping tickers without holdings in the window ---
+    profit_dict = {}
+    for i, ticker in enumerate(tickers):
+        if initial_price[i] == 0:
+            continue
+        if np.isnan(end_price[i]):
+            raise ValueError(f"No closing price available for {ticker} on {end_date}.")
+
+        profit_dict[ticker] = {
+            "initial amount": int(initial_amount[i]),
+            "final amount": int(final_amount[i]),
+            "initial price": float(initial_price[i]),
+            "final price": float(end_price[i]),
+            "initial stock value in Portfolio": float(initial_value[i]),
+            "final stock value in Portfolio": float(final_amount[i] * end_price[i]),
+            "profit": float(profit[i]),
+            "percentage change": float(percentage[i]),
+            "percentage in portfolio": 0,
+        }
+
+    return profit_dict
+
+
+def window_start(window: str, end_date: str, inception_date: str) -> str:
+    """
+    Resolves the start date of a named report window ending on end_date.
+
+    Args:
+        window (str): One of WINDOWS ("1D", "1W", "1M", "3M", "YTD", "1Y", "ALL").
+        end_date (str): The window end ('YYYY-MM-DD', a trading day).
+        inception_date (str): The first trade date, used by "ALL".
+
+    Returns:
+        str: The trading day on or before the window start, in 'YYYY-MM-DD' format.
+
+    Raises:
+        ValueError: If the window name is unknown.
+    """
+    calendar = trading_calendar.get_calendar()
+    window = window.upper()
+
+    if window == "ALL":
+        return calendar.previous_open(inception_date) or inception_date
+    if window == "1D":
+        return calendar.shift(end_date, -1)
+    if window == "YTD":
+        # Last close of the previous year
+        return calendar.previous_open(f"{int(end_date[:4]) - 1}-12-31")
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown report window: {window}. Use one of {', '.join(WINDOWS)}.")
+
+    start = pd.Timestamp(end_date) - pd.DateOffset(**WINDOWS[window])
+    return calendar.previous_open(start.strftime("%Y-%m-%d"))
+
+
+@instrumentation.timed()
+def profit_windows(tickers: list, windows: list, end_date: str, inception_date: str,
+                   tickers_buy_dict: dict, tickers_sell_dict: dict,
+                   max_workers: int = DEFAULT_MAX_WORKERS) -> dict:
+    """
+    Calculates the profit of many report windows that share the same end date.
+
+    Every window's start date is planned first, the closes of all the distinct dates are
+    fetched together in one price matrix (one ranged bar lookup per ticker), and each
+    window is then evaluated by batch_profit on its two columns of that matrix.
+
+    Args:
+        tickers (list): The stock ticker symbols to report on.
+        windows (list): Window names (see window_start).
+        end_date (str): Common end date ('YYYY-MM-DD', a trading day).
+        inception_date (str): The first trade date, used by "ALL".
+        tickers_buy_dict (dict): Global purchase history (Ledger or legacy dict).
+        tickers_sell_dict (dict): Global sales history (Ledger or legacy dict).
+        max_workers (int, optional): Tickers whose prices are fetched concurrently.
+
+    Returns:
+        dict: window -> (start_date, profit_dict), in the order of `windows`.
+    """
+    tickers = [ticker.upper() for ticker in tickers]
+    starts = {window: window_start(window, end_date, inception_date) for window in windows}
+
+    # One column per distinct date, shared by every window
+    dates = sorted(set(starts.values()) | {end_date})
+    column = {date: i for i, date in enumerate(dates)}
+    matrix = build_price_matrix(tickers, dates, max_workers=max_workers, exact_dates={end_date})
+
+    reports = {}
+    for window, start in starts.items():
+        window_prices = matrix[:, [column[start], column[end_date]]]
+        reports[window] = (start, batch_profit(
+            tickers, start, end_date, tickers_buy_dict, tickers_sell_dict, price_matrix=window_prices
+        ))
+    return reports
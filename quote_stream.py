@@ -0,0 +1,486 @@
+"""
+Streaming real-time quotes with incremental portfolio updates.
+
+A QuoteStream subscribes to live prices over a WebSocket (through the websockets library
+that yfinance depends on) and applies every tick to the account positions:
+
+    tick -> the affected account_dict entry is re-priced      O(1)
+         -> the running portfolio market value moves by the delta   O(1)
+
+The portfolio total and each weight are read from the running sums (see
+portfolio_totals), so a tick never re-sums the book. A positions.PositionTable reads
+its 'percentage portfolio' fields from those sums; those of a plain dict are written in
+one pass when the stream ends.
+
+Two message formats are understood:
+    Yahoo Finance streamer  : {"type": "pricing", "message": "<base64 PricingData protobuf>"}
+    Plain JSON (replay)     : {"id": "AAPL", "price": 187.3} or a JSON list of such ticks
+
+Malformed messages are counted and skipped; connection failures (bad URL, rejected
+handshake) are raised by stream() as ValueError.
+
+ReplayServer is a local WebSocket server replaying recorded or synthetic ticks at a
+chosen rate, for offline testing and load tests:
+
+    python quote_stream.py replay ticks.csv --port 8765 --rate 5000 --loop
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import csv
+import json
+import random
+import threading
+import time
+
+import calculate_func
+import lazy_import
+import portfolio_totals
+import positions
+
+ws_client = lazy_import.module("websockets.asyncio.client")
+ws_server = lazy_import.module("websockets.asyncio.server")
+ws_exceptions = lazy_import.module("websockets.exceptions")
+
+YAHOO_STREAM_URL = "wss://streamer.finance.yahoo.com/?version=2"
+
+# The Yahoo streamer drops subscriptions that are not renewed
+RESUBSCRIBE_INTERVAL = 15
+
+DEFAULT_REPLAY_PORT = 8765
+
+# Ticks sent per replay message
+DEFAULT_BATCH_SIZE = 100
+
+
+def parse_ticks(message: str | bytes) -> list:
+    """
+    Extracts the price ticks of one stream message.
+
+    Args:
+        message (str | bytes): A Yahoo Finance streamer message or plain JSON tick(s).
+
+    Returns:
+        list: (upper-cased ticker, price) pairs; messages without a price give [].
+
+    Raises:
+        ValueError: If the message is not valid JSON or a Yahoo payload cannot be decoded.
+        TypeError, AttributeError: If the JSON does not have the shape of a tick.
+    """
+    data = json.loads(message)
+    items = data if isinstance(data, list) else [data]
+
+    ticks = []
+    for item in items:
+        if "message" in item:
+            item = _decode_yahoo(item["message"])
+        ticker, price = item.get("id"), item.get("price")
+        if ticker and price is not None:
+            ticks.append((ticker.upper(), float(price)))
+    return ticks
+
+
+def _decode_yahoo(encoded: str) -> dict:
+    from google.protobuf.json_format import MessageToDict
+    from google.protobuf.message import DecodeError
+    from yfinance.pricing_pb2 import PricingData
+
+    pricing_data = PricingData()
+    try:
+        pricing_data.ParseFromString(base64.b64decode(encoded))
+    except DecodeError as e:
+        raise ValueError(f"Undecodable pricing message: {e}") from e
+    return MessageToDict(pricing_data, preserving_proto_field_name=True)
+
+
+class LivePortfolio:
+    """
+    Positions kept current by price ticks, with running portfolio totals.
+
+    Trades still go through the account; call resync() after the positions change
+    outside of it.
+
+    Attributes:
+        account_dict (dict | positions.PositionTable): The positions, updated in place.
+        positions (Mapping): ticker -> position entry (account_dict without the 'total' row).
+        totals (PortfolioTotals): Running shares, cost basis and market value, moved by every tick.
+        ticks (int): Ticks applied to a held ticker so far.
+    """
+
+    def __init__(self, account_dict: dict, totals: portfolio_totals.PortfolioTotals = None) -> None:
+        """
+        Args:
+            account_dict (dict | positions.PositionTable): The positions to keep current.
+            totals (PortfolioTotals, optional): Running sums of account_dict to keep current
+                too (e.g., the account's own). Defaults to new ones.
+        """
+        self.account_dict = account_dict
+        self.totals = totals if totals is not None else portfolio_totals.PortfolioTotals()
+        self.ticks = 0
+        self.resync()
+
+    def __repr__(self) -> str:
+        return f"LivePortfolio(positions={len(self.positions)}, value={self.market_value:.2f}, ticks={self.ticks})"
+
+    @property
+    def shares(self) -> int:
+        return self.totals.shares
+
+    @property
+    def cost_basis(self) -> float:
+        return self.totals.cost_basis
+
+    @property
+    def market_value(self) -> float:
+        return self.totals.market_value
+
+    def resync(self) -> None:
+        """Recomputes the running sums with one pass over the positions."""
+        if isinstance(self.account_dict, positions.PositionTable):
+            self.positions = self.account_dict
+        else:
+            self.positions = {ticker: data for ticker, data in self.account_dict.items() if ticker.lower() != "total"}
+        self.totals.rebuild(self.positions)
+
+    def apply(self, ticker: str, price: float) -> bool:
+        """
+        Applies one price tick.
+
+        Args:
+            ticker (str): The upper-cased ticker symbol.
+            price (float): Its new price.
+
+        Returns:
+            bool: True if the ticker is held (and was re-priced).
+        """
+        if ticker not in self.positions:
+            return False
+
+        calculate_func.reprice_position(self.account_dict, ticker, price)
+        # A PositionTable keeps its attached totals current itself
+        if getattr(self.account_dict, "totals", None) is not self.totals:
+            self.totals.update(ticker, self.positions[ticker])
+        self.ticks += 1
+        return True
+
+    def weight(self, ticker: str) -> float:
+        """Returns the current weight of a position in the portfolio (0-100)."""
+        return self.totals.weight(ticker)
+
+    def total(self) -> dict:
+        """Returns the portfolio 'total' row (same fields as calculate_func.create_account_sum)."""
+        return self.totals.total_row()
+
+    def write_weights(self) -> None:
+        """Writes every position's 'percentage portfolio' from the running total (one pass, for display)."""
+        calculate_func.update_percentage_portfolio(self.positions, self.totals)
+
+
+class QuoteStream:
+    """
+    WebSocket quote subscription feeding a LivePortfolio.
+
+    Attributes:
+        portfolio (LivePortfolio): The positions kept current.
+        url (str): The stream server.
+        symbols (list): Subscribed tickers.
+        messages (int): Messages received so far.
+        skipped (int): Malformed messages skipped so far.
+    """
+
+    def __init__(self, portfolio: LivePortfolio, url: str = YAHOO_STREAM_URL, symbols: list = None) -> None:
+        """
+        Args:
+            portfolio (LivePortfolio): The positions to keep current.
+            url (str, optional): The stream server. Defaults to the Yahoo Finance streamer.
+            symbols (list, optional): Tickers to subscribe to. Defaults to the held tickers.
+        """
+        self.portfolio = portfolio
+        self.url = url
+        self.symbols = [symbol.upper() for symbol in (symbols or portfolio.positions)]
+        self.messages = 0
+        self.skipped = 0
+
+    def __repr__(self) -> str:
+        return (f"QuoteStream(url={self.url}, symbols={len(self.symbols)}, messages={self.messages}, "
+                f"skipped={self.skipped})")
+
+    async def run(self, duration: float = None, max_ticks: int = None, refresh_every: float = None,
+                  on_refresh=None) -> int:
+        """
+        Streams quotes until the duration elapses, max_ticks ticks arrive or the server closes.
+
+        Args:
+            duration (float, optional): Seconds to stream. Defaults to no limit.
+            max_ticks (int, optional): Stop after this many received ticks. Defaults to no limit.
+            refresh_every (float, optional): Seconds between two on_refresh calls.
+            on_refresh (callable, optional): Called with the portfolio every refresh_every seconds.
+
+        Returns:
+            int: Ticks received (held or not).
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration if duration is not None else None
+        next_refresh = loop.time() + refresh_every if refresh_every else None
+        received = 0
+        apply = self.portfolio.apply
+
+        async with ws_client.connect(self.url, max_size=None) as websocket:
+            await self._subscribe(websocket)
+            heartbeat = asyncio.create_task(self._resubscribe(websocket))
+            try:
+                async with asyncio.timeout_at(deadline):
+                    async for message in websocket:
+                        self.messages += 1
+                        try:
+                            ticks = parse_ticks(message)
+                        except (ValueError, TypeError, AttributeError):
+                            # One malformed message does not end the stream
+                            self.skipped += 1
+                            continue
+                        for ticker, price in ticks:
+                            apply(ticker, price)
+                            received += 1
+
+                        if next_refresh is not None and on_refresh is not None and loop.time() >= next_refresh:
+                            on_refresh(self.portfolio)
+                            next_refresh = loop.time() + refresh_every
+                        if max_ticks is not None and received >= max_ticks:
+                            break
+            except TimeoutError:
+                pass
+            except ws_exceptions.ConnectionClosedError as e:
+                print(f"Quote stream closed: {e}")
+            finally:
+                heartbeat.cancel()
+                with contextlib.suppress(asyncio.CancelledError, ws_exceptions.ConnectionClosed):
+                    await heartbeat
+
+        return received
+
+    async def _subscribe(self, websocket) -> None:
+        await websocket.send(json.dumps({"subscribe": self.symbols}))
+
+    async def _resubscribe(self, websocket) -> None:
+        while True:
+            await asyncio.sleep(RESUBSCRIBE_INTERVAL)
+            await self._subscribe(websocket)
+
+
+def stream(account_dict: dict, url: str = YAHOO_STREAM_URL, symbols: list = None, duration: float = None,
+           max_ticks: int = None, refresh_every: float = None, on_refresh=None,
+           totals: portfolio_totals.PortfolioTotals = None) -> LivePortfolio:
+    """
+    Streams quotes into account positions, blocking until the stream ends.
+
+    Args:
+        account_dict (dict): The positions, updated in place.
+        url (str, optional): The stream server. Defaults to the Yahoo Finance streamer.
+        symbols (list, optional): Tickers to subscribe to. Defaults to the held tickers.
+        duration (float, optional): Seconds to stream.
+        max_ticks (int, optional): Stop after this many ticks.
+        refresh_every (float, optional): Seconds between two on_refresh calls.
+        on_refresh (callable, optional): Called with the LivePortfolio every refresh_every seconds.
+        totals (PortfolioTotals, optional): Running sums of account_dict to keep current.
+
+    Returns:
+        LivePortfolio: The live positions, with their weights written.
+
+    Raises:
+        ValueError: If the stream server cannot be reached over WebSocket (invalid URL,
+            rejected or failed handshake).
+        OSError: If the connection fails at the network level.
+    """
+    portfolio = LivePortfolio(account_dict, totals)
+    quote_stream = QuoteStream(portfolio, url, symbols)
+    try:
+        asyncio.run(quote_stream.run(duration, max_ticks, refresh_every, on_refresh))
+    except ws_exceptions.WebSocketException as e:
+        raise ValueError(f"Quote stream failed ({type(e).__name__}): {e}") from e
+    finally:
+        # Ticks applied before a failure are kept, so the weights are written either way
+        portfolio.write_weights()
+
+    if quote_stream.skipped:
+        print(f"[!] Skipped {quote_stream.skipped} malformed quote messages.")
+    return portfolio
+
+
+def load_ticks(path: str) -> list:
+    """
+    Reads recorded ticks from a CSV file with 'ticker' and 'price' columns.
+
+    Args:
+        path (str): The CSV file.
+
+    Returns:
+        list: (ticker, price) pairs in file order.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fields = {name.lower(): name for name in reader.fieldnames or []}
+        if "ticker" not in fields or "price" not in fields:
+            raise ValueError(f"{path} needs 'ticker' and 'price' columns.")
+        return [(row[fields["ticker"]].upper(), float(row[fields["price"]])) for row in reader]
+
+
+def random_walk_ticks(prices: dict, count: int, volatility: float = 0.001, seed: int = 0) -> list:
+    """
+    Generates synthetic ticks: random tickers moving by small random steps.
+
+    Args:
+        prices (dict): ticker -> starting price.
+        count (int): Number of ticks.
+        volatility (float, optional): Standard deviation of the relative step.
+        seed (int, optional): Random seed.
+
+    Returns:
+        list: (ticker, price) pairs.
+    """
+    rng = random.Random(seed)
+    current = {ticker.upper(): float(price) for ticker, price in prices.items()}
+    tickers = list(current)
+
+    ticks = []
+    for _ in range(count):
+        ticker = rng.choice(tickers)
+        current[ticker] *= 1 + rng.gauss(0.0, volatility)
+        ticks.append((ticker, round(current[ticker], 4)))
+    return ticks
+
+
+class ReplayServer:
+    """
+    Local WebSocket server replaying ticks to every subscriber, in the plain JSON format.
+
+    Attributes:
+        ticks (list): The (ticker, price) pairs to replay.
+        host (str): Listening address.
+        port (int): Listening port (the actual one once started, when 0 was asked).
+        rate (float | None): Ticks per second per connection (None replays as fast as possible).
+        batch_size (int): Ticks per message.
+        loop (bool): Whether to start over once every tick was sent.
+    """
+
+    def __init__(self, ticks: list, host: str = "localhost", port: int = DEFAULT_REPLAY_PORT,
+                 rate: float = None, batch_size: int = DEFAULT_BATCH_SIZE, loop: bool = False) -> None:
+        self.ticks = ticks
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.batch_size = max(1, batch_size)
+        self.loop = loop
+
+        self._thread = None
+        self._event_loop = None
+        self._stopped = None
+
+    def __repr__(self) -> str:
+        return f"ReplayServer(url={self.url}, ticks={len(self.ticks)}, rate={self.rate})"
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def serve(self, ready: threading.Event = None) -> None:
+        """Serves until stop() is called."""
+        self._event_loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+
+        async with ws_server.serve(self._handle, self.host, self.port, max_size=None) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            if ready is not None:
+                ready.set()
+            await self._stopped.wait()
+
+    def start(self) -> str:
+        """
+        Starts serving on a background thread.
+
+        Returns:
+            str: The server URL.
+        """
+        ready = threading.Event()
+        self._thread = threading.Thread(target=asyncio.run, args=(self.serve(ready),), daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.url
+
+    def stop(self) -> None:
+        """Stops a server started with start()."""
+        if self._event_loop is not None:
+            self._event_loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    async def _handle(self, websocket) -> None:
+        subscribed = set()
+        first = json.loads(await websocket.recv())
+        subscribed.update(symbol.upper() for symbol in first.get("subscribe", []))
+        listener = asyncio.create_task(self._listen(websocket, subscribed))
+
+        try:
+            start = time.perf_counter()
+            sent = 0
+            while True:
+                for i in range(0, len(self.ticks), self.batch_size):
+                    batch = [
+                        {"id": ticker, "price": price}
+                        for ticker, price in self.ticks[i:i + self.batch_size] if ticker in subscribed
+                    ]
+                    if not batch:
+                        continue
+                    await websocket.send(json.dumps(batch))
+                    sent += len(batch)
+
+                    if self.rate:
+                        # Pace on the total sent so far, so sleeps do not accumulate drift
+                        delay = start + sent / self.rate - time.perf_counter()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                    else:
+                        await asyncio.sleep(0)
+                if not self.loop:
+                    break
+        except ws_exceptions.ConnectionClosed:
+            pass
+        finally:
+            listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError, ws_exceptions.ConnectionClosed):
+                await listener
+
+    async def _listen(self, websocket, subscribed: set) -> None:
+        # Later subscribe / unsubscribe messages change what this connection receives
+        async for message in websocket:
+            request = json.loads(message)
+            subscribed.update(symbol.upper() for symbol in request.get("subscribe", []))
+            subscribed.difference_update(symbol.upper() for symbol in request.get("unsubscribe", []))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local quote replay server for the streaming mode.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    replay = subparsers.add_parser("replay", help="Replay ticks from a CSV file (columns: ticker, price).")
+    replay.add_argument("ticks", help="CSV file of ticks.")
+    replay.add_argument("--host", default="localhost", help="Listening address.")
+    replay.add_argument("--port", type=int, default=DEFAULT_REPLAY_PORT, help="Listening port.")
+    replay.add_argument("--rate", type=float, default=None, help="Ticks per second (default: as fast as possible).")
+    replay.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Ticks per message.")
+    replay.add_argument("--loop", action="store_true", help="Start over after the last tick.")
+    args = parser.parse_args()
+
+    server = ReplayServer(load_ticks(args.ticks), args.host, args.port, args.rate, args.batch_size, args.loop)
+    print(f"[*] Replaying {len(server.ticks):,} ticks on {server.url} (Ctrl+C to stop)")
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Batch report runner: renders the reports of many accounts on a process pool.
+
+Once prices are cached, reporting is CPU bound (position totals, profit timelines,
+rounding and table rendering), so threads do not help. The runner fetches market data
+once in the parent process:
+
+    quotes        : one bulk quote request for the union of held tickers
+    price matrix  : the start/end closes of every account's window (AccountRegistry.plan_prices)
+
+and hands them read-only to every worker process when it starts. Workers install a
+snapshot provider serving those quotes, so they never touch the network, load their
+accounts from storage read-only and write one text report per account to the output
+folder. The parent only reads the accounts too (to plan the tickers and windows), so a
+live journal is never rewritten by a report run. An account that fails is reported as failed without
+stopping the others.
+
+One huge account can be split by ticker instead (--split): each worker computes the
+profit of a slice of its tickers and the parent merges and renders them.
+
+    python report_runner.py --output reports/ --workers 32
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import account_registry
+import account_store
+import calculate_func
+import lazy_import
+import market_data
+import portfolio_totals
+import profit_engine
+import user
+
+pd = lazy_import.module("pandas")
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Accounts (or tickers with --split) handed to a worker per task
+DEFAULT_CHUNK_SIZE = 16
+DEFAULT_SPLIT_CHUNK_SIZE = 256
+
+REPORT_SUFFIX = ".txt"
+
+# Read-only market data of the current worker process (see _init_worker)
+_shared = {}
+
+
+class SnapshotProvider(market_data.MarketDataProvider):
+    """
+    Serves a fixed set of quotes, so report workers never request market data.
+
+    Attributes:
+        prices (dict): ticker -> last price.
+    """
+
+    name = "snapshot"
+
+    def __init__(self, prices: dict) -> None:
+        self.prices = prices
+
+    def __repr__(self) -> str:
+        return f"SnapshotProvider(tickers={len(self.prices)})"
+
+    def history(self, ticker: str, start_date: str, end_date: str) -> list:
+        return []
+
+    def quotes(self, tickers: list) -> pd.Series:
+        prices = {ticker.upper(): self.prices[ticker.upper()] for ticker in tickers if ticker.upper() in self.prices}
+        return pd.Series(prices, dtype=float)
+
+    def symbol_info(self, ticker: str) -> dict | None:
+        return None
+
+
+def _init_worker(root: str, prices: dict, windows: dict, row: dict, column: dict, matrix) -> None:
+    """Stores the shared market data of a worker process and activates its snapshot provider."""
+    _shared.update(root=root, prices=prices, windows=windows, row=row, column=column, matrix=matrix)
+    market_data.set_provider(SnapshotProvider(prices))
+
+
+def _open_account(name: str) -> user.Account:
+    # Read-only: the parent process (or the application) may have the same folder open
+    storage = os.path.join(_shared["root"], account_registry.check_account_name(name))
+    return user.Account(name, "", storage=storage, read_only=True)
+
+
+def _account_profit(account: user.Account, tickers: list) -> dict:
+    """Returns the raw profit_dict of some tickers of an account over its planned window."""
+    start, end = _shared["windows"][account.name]
+    prices = account_registry.slice_prices(_shared["matrix"], _shared["row"], _shared["column"], tickers, start, end)
+    return profit_engine.batch_profit(
+        tickers, start, end, account.tickers_buy_dict, account.tickers_sell_dict, price_matrix=prices
+    )
+
+
+def render_report(account_dict: dict, profit_dict: dict, title: str,
+                  totals: portfolio_totals.PortfolioTotals = None) -> str:
+    """
+    Renders the portfolio and profit tables of an account as text.
+
+    Args:
+        account_dict (dict): The priced positions (without the 'total' row).
+        profit_dict (dict): The raw profit_dict (see profit_engine.batch_profit), may be empty.
+        title (str): Heading of the report.
+        totals (PortfolioTotals, optional): Running sums of account_dict, for the 'total' row.
+
+    Returns:
+        str: The report.
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        print(f"[{title}]")
+        if account_dict:
+            # Tables round in place, so they get copies
+            positions = {ticker: dict(data) for ticker, data in account_dict.items() if ticker.lower() != "total"}
+            calculate_func.create_account_sum(positions, totals)
+            calculate_func.make_account_table(positions)
+        else:
+            print("\n[!] Portfolio is empty.")
+
+        if profit_dict:
+            calculate_func.make_account_table(calculate_func.create_all_profit_dict(dict(profit_dict)))
+    return output.getvalue()
+
+
+def _write_report(output_dir: str, name: str, report: str) -> str:
+    path = os.path.join(output_dir, name + REPORT_SUFFIX)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(report)
+    return path
+
+
+def _report_accounts(names: list, output_dir: str) -> list:
+    """
+    Worker task: writes the reports of a chunk of accounts.
+
+    Returns:
+        list: (name, error message or None) per account.
+    """
+    results = []
+    for name in names:
+        account = None
+        try:
+            account = _open_account(name)
+            account.account_dict = calculate_func.reprice_account_dict(
+                account.account_dict, _shared["prices"], account.totals
+            )
+            profit_dict = {}
+            if name in _shared["windows"]:
+                profit_dict = _account_profit(account, list(account.tickers_buy_dict))
+            _write_report(output_dir, name, render_report(account.account_dict, profit_dict, name, account.totals))
+            results.append((name, None))
+        except Exception as e:
+            # One broken account (corrupt snapshot, missing file, ...) must not stop the run
+            results.append((name, f"{type(e).__name__}: {e}"))
+        finally:
+            if account is not None:
+                account.close()
+    return results
+
+
+def _profit_slice(name: str, tickers: list) -> dict:
+    """Worker task: the profit_dict of a slice of one account's tickers."""
+    account = _open_account(name)
+    try:
+        return _account_profit(account, tickers)
+    finally:
+        account.close()
+
+
+def _chunks(items: list, size: int) -> list:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _show_progress(done: int, total: int, label: str) -> None:
+    print(f"\r[{done}/{total}] {label:<40}", end="" if done < total else "\n", flush=True)
+
+
+def _shared_data(registry: account_registry.AccountRegistry, start_date: str, end_date: str) -> tuple:
+    """Fetches the quotes and the price matrix every worker reads from."""
+    prices = registry.refresh_prices()
+    windows, row, column, matrix = registry.plan_prices(start_date, end_date)
+    return {ticker: float(price) for ticker, price in prices.items()}, windows, row, column, matrix
+
+
+def run(root: str = account_store.ACCOUNTS_DIR, output_dir: str = "reports", names: list = None,
+        workers: int = DEFAULT_WORKERS, chunk_size: int = DEFAULT_CHUNK_SIZE,
+        start_date: str = "first buy time", end_date: str = "now") -> dict:
+    """
+    Writes the report of every account (or of the given ones) to an output folder.
+
+    Args:
+        root (str, optional): Registry folder. Defaults to the Moneyer accounts folder.
+        output_dir (str, optional): Folder receiving one '<account>.txt' report per account.
+        names (list, optional): Accounts to report on. Defaults to every registered account.
+        workers (int, optional): Worker processes. Defaults to the number of CPUs.
+        chunk_size (int, optional): Accounts per worker task.
+        start_date (str, optional): Profit start date, or "first buy time" for each
+            account's own first trade. Defaults to "first buy time".
+        end_date (str, optional): Profit end date. Defaults to "now".
+
+    Returns:
+        dict: account name -> error message of the accounts that could not be reported.
+
+    Raises:
+        KeyError: If a requested account is not registered.
+    """
+    registry = account_registry.AccountRegistry(root)
+    names = names or registry.names()
+
+    failed = {}
+    try:
+        for name in names:
+            if name not in registry:
+                raise KeyError(name)
+            try:
+                registry.load_unauthenticated(name, read_only=True)
+            except Exception as e:
+                failed[name] = f"{type(e).__name__}: {e}"
+
+        os.makedirs(output_dir, exist_ok=True)
+        shared = _shared_data(registry, start_date, end_date)
+    finally:
+        # The workers load the accounts themselves
+        registry.close()
+
+    total = len(names)
+    names = [name for name in names if name not in failed]
+    done = len(failed)
+    with ProcessPoolExecutor(max_workers=max(1, workers), initializer=_init_worker,
+                             initargs=(root, *shared)) as pool:
+        futures = [pool.submit(_report_accounts, chunk, output_dir) for chunk in _chunks(names, max(1, chunk_size))]
+        for future in as_completed(futures):
+            for name, error in future.result():
+                done += 1
+                if error is not None:
+                    failed[name] = error
+                _show_progress(done, total, name)
+
+    for name, error in failed.items():
+        print(f"Error reporting on {name}: {error}")
+    return failed
+
+
+def run_split(name: str, root: str = account_store.ACCOUNTS_DIR, output_dir: str = "reports",
+              workers: int = DEFAULT_WORKERS, chunk_size: int = DEFAULT_SPLIT_CHUNK_SIZE,
+              start_date: str = "first buy time", end_date: str = "now") -> str:
+    """
+    Writes the report of one huge account, splitting its tickers across worker processes.
+
+    Args:
+        name (str): The account to report on.
+        root (str, optional): Registry folder. Defaults to the Moneyer accounts folder.
+        output_dir (str, optional): Folder receiving the '<account>.txt' report.
+        workers (int, optional): Worker processes. Defaults to the number of CPUs.
+        chunk_size (int, optional): Tickers per worker task.
+        start_date (str, optional): Profit start date. Defaults to the account's first trade.
+        end_date (str, optional): Profit end date. Defaults to "now".
+
+    Returns:
+        str: Path of the written report.
+
+    Raises:
+        KeyError: If the account is not registered.
+    """
+    registry = account_registry.AccountRegistry(root)
+    account = registry.load_unauthenticated(name, read_only=True)
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        shared = _shared_data(registry, start_date, end_date)
+    finally:
+        # The in-memory ledgers stay usable for the final render
+        registry.close()
+
+    profit_dict = {}
+    if name in shared[1]:
+        chunks = _chunks(list(account.tickers_buy_dict), max(1, chunk_size))
+        done = 0
+        with ProcessPoolExecutor(max_workers=max(1, workers), initializer=_init_worker,
+                                 initargs=(root, *shared)) as pool:
+            futures = [pool.submit(_profit_slice, name, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                profit_dict.update(future.result())
+                done += 1
+                _show_progress(done, len(chunks), name)
+
+    # Keep the ledger order of the tickers, whatever the completion order of the slices
+    profit_dict = {ticker: profit_dict[ticker] for ticker in account.tickers_buy_dict if ticker in profit_dict}
+    return _write_report(output_dir, name, render_report(account.account_dict, profit_dict, name, account.totals))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the reports of many accounts using every CPU core.")
+    parser.add_argument("names", nargs="*", help="Accounts to report on (default: every registered account).")
+    parser.add_argument("--root", default=account_store.ACCOUNTS_DIR, help="Registry folder.")
+    parser.add_argument("--output", default="reports", help="Folder receiving the reports.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Worker processes.")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Accounts (or tickers with --split) per task.")
+    parser.add_argument("--start", default="first buy time", help="Profit start date (YYYY-MM-DD).")
+    parser.add_argument("--end", default="now", help="Profit end date (YYYY-MM-DD).")
+    parser.add_argument("--split", action="store_true",
+                        help="Split the tickers of a single account across the workers.")
+    args = parser.parse_args()
+
+    if args.split:
+        if len(args.names) != 1:
+            parser.error("--split needs exactly one account name.")
+        path = run_split(args.names[0], args.root, args.output, args.workers,
+                         args.chunk_size or DEFAULT_SPLIT_CHUNK_SIZE, args.start, args.end)
+        print(f"Report written to {path}")
+    else:
+        failed = run(args.root, args.output, args.names, args.workers,
+                     args.chunk_size or DEFAULT_CHUNK_SIZE, args.start, args.end)
+        print(f"Reports written to {args.output} ({len(failed)} failed)")
+
+
+if __name__ == "__main__":
+    main()
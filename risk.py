@@ -0,0 +1,185 @@
+"""
+Portfolio risk analytics over cached daily closes.
+
+The closes of every held ticker (and of a benchmark symbol) are loaded into a single
+ticker x session matrix from the bar store. Every metric is array math along the
+session axis of that matrix, so each ticker and the portfolio are evaluated together:
+
+    volatility    : annualized standard deviation of daily returns
+    sharpe        : annualized excess return / volatility
+    sortino       : annualized excess return / annualized downside deviation
+    max drawdown  : worst peak-to-trough fall of the value series (negative fraction)
+    beta          : covariance with the benchmark returns / benchmark variance
+
+The portfolio series is the value of the current holdings over the window.
+"""
+from __future__ import annotations
+
+import equity_curve
+import instrumentation
+import lazy_import
+import trading_calendar
+
+np = lazy_import.module("numpy")
+pd = lazy_import.module("pandas")
+
+TRADING_DAYS_PER_YEAR = 252
+
+DEFAULT_BENCHMARK = "SPY"
+
+METRICS = ("volatility", "sharpe", "sortino", "max drawdown", "beta")
+
+
+def fill_gaps(closes: np.ndarray) -> np.ndarray:
+    """
+    Carries every row's last known close forward, then its first close backward.
+
+    Args:
+        closes (np.ndarray): ticker x session matrix with NaN gaps.
+
+    Returns:
+        np.ndarray: The filled matrix; rows without any close stay NaN.
+    """
+    n_rows, n_cols = closes.shape
+    valid = ~np.isnan(closes)
+    rows = np.arange(n_rows)[:, None]
+
+    last_valid = np.maximum.accumulate(np.where(valid, np.arange(n_cols), 0), axis=1)
+    filled = closes[rows, last_valid]
+
+    # Leading gaps take the first close of the row
+    first_valid = np.argmax(valid, axis=1)
+    leading = np.arange(n_cols) < first_valid[:, None]
+    return np.where(leading, closes[np.arange(n_rows), first_valid][:, None], filled)
+
+
+def daily_returns(values: np.ndarray) -> np.ndarray:
+    """Returns the simple daily returns along the last axis (one column shorter)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return values[..., 1:] / values[..., :-1] - 1
+
+
+def annualized_volatility(returns: np.ndarray) -> np.ndarray:
+    """Returns the annualized standard deviation of daily returns along the last axis."""
+    return np.std(returns, axis=-1, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR)
+
+
+def sharpe_ratio(returns: np.ndarray, risk_free_rate: float = 0.0) -> np.ndarray:
+    """
+    Returns the annualized Sharpe ratio along the last axis.
+
+    Args:
+        returns (np.ndarray): Daily returns.
+        risk_free_rate (float, optional): Annual risk-free rate (e.g., 0.04).
+    """
+    excess = np.mean(returns, axis=-1) * TRADING_DAYS_PER_YEAR - risk_free_rate
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return excess / annualized_volatility(returns)
+
+
+def sortino_ratio(returns: np.ndarray, risk_free_rate: float = 0.0) -> np.ndarray:
+    """
+    Returns the annualized Sortino ratio along the last axis.
+
+    Args:
+        returns (np.ndarray): Daily returns.
+        risk_free_rate (float, optional): Annual risk-free rate (e.g., 0.04).
+    """
+    daily_target = risk_free_rate / TRADING_DAYS_PER_YEAR
+    downside = np.minimum(returns - daily_target, 0.0)
+    downside_deviation = np.sqrt(np.mean(downside ** 2, axis=-1)) * np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    excess = np.mean(returns, axis=-1) * TRADING_DAYS_PER_YEAR - risk_free_rate
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return excess / downside_deviation
+
+
+def max_drawdown(values: np.ndarray) -> np.ndarray:
+    """Returns the worst fall from a running peak along the last axis, as a negative fraction."""
+    peaks = np.maximum.accumulate(values, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.min(values / peaks - 1, axis=-1)
+
+
+def beta(returns: np.ndarray, benchmark_returns: np.ndarray) -> np.ndarray:
+    """
+    Returns the beta of each return series against a benchmark along the last axis.
+
+    Args:
+        returns (np.ndarray): Daily returns (1-D or rows of a 2-D matrix).
+        benchmark_returns (np.ndarray): The benchmark's daily returns (1-D).
+    """
+    centered = returns - np.mean(returns, axis=-1, keepdims=True)
+    benchmark_centered = benchmark_returns - np.mean(benchmark_returns)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (centered @ benchmark_centered) / (benchmark_centered @ benchmark_centered)
+
+
+def correlation_matrix(returns: np.ndarray) -> np.ndarray:
+    """Returns the Pearson correlation of every pair of rows (NaN for constant rows)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.atleast_2d(np.corrcoef(returns))
+
+
+@instrumentation.timed()
+def portfolio_risk(holdings: dict, start_date: str, end_date: str, benchmark: str = DEFAULT_BENCHMARK,
+                   risk_free_rate: float = 0.0, max_workers: int = equity_curve.DEFAULT_MAX_WORKERS) -> tuple:
+    """
+    Computes the risk metrics of every position and of the whole portfolio.
+
+    Args:
+        holdings (dict): ticker -> number of shares held.
+        start_date (str): First day of the window ('YYYY-MM-DD').
+        end_date (str): Last day of the window ('YYYY-MM-DD').
+        benchmark (str, optional): Benchmark symbol for beta, or None to skip it.
+        risk_free_rate (float, optional): Annual risk-free rate used by Sharpe and Sortino.
+        max_workers (int, optional): Tickers whose closes are fetched concurrently.
+
+    Returns:
+        tuple: (risk_dict, correlation) where risk_dict maps every ticker and 'total' to
+               {metric: value} for each of METRICS, and correlation is a ticker x ticker
+               DataFrame of daily-return correlations.
+
+    Raises:
+        ValueError: If the window holds fewer than three trading sessions.
+    """
+    tickers = [ticker.upper() for ticker in holdings]
+    sessions = trading_calendar.get_calendar().sessions_between(start_date, end_date)
+    if len(sessions) < 3:
+        raise ValueError(f"Not enough trading sessions between {start_date} and {end_date} to measure risk.")
+
+    symbols = tickers + ([benchmark.upper()] if benchmark else [])
+    closes = fill_gaps(equity_curve.close_matrix(symbols, sessions, max_workers))
+    ticker_closes = closes[:len(tickers)]
+
+    # Value of the current holdings over the window (tickers without prices count as 0)
+    amounts = np.array([holdings[ticker] for ticker in holdings], dtype=np.float64)
+    portfolio_values = np.nansum(ticker_closes * amounts[:, None], axis=0)
+
+    returns = daily_returns(ticker_closes)
+    portfolio_returns = daily_returns(portfolio_values)
+
+    # Row 0..n-1: positions, row n: portfolio
+    all_values = np.vstack([ticker_closes, portfolio_values])
+    all_returns = np.vstack([returns, portfolio_returns])
+
+    if benchmark:
+        betas = beta(all_returns, daily_returns(closes[-1]))
+    else:
+        betas = np.full(len(all_returns), np.nan)
+
+    columns = {
+        "volatility": annualized_volatility(all_returns),
+        "sharpe": sharpe_ratio(all_returns, risk_free_rate),
+        "sortino": sortino_ratio(all_returns, risk_free_rate),
+        "max drawdown": max_drawdown(all_values),
+        "beta": betas,
+    }
+
+    risk_dict = {
+        name: {metric: float(columns[metric][row]) for metric in METRICS}
+        for row, name in enumerate(tickers + ["total"])
+    }
+    correlation = pd.DataFrame(correlation_matrix(returns), index=tickers, columns=tickers)
+
+    return risk_dict, correlation
@@ -0,0 +1,205 @@
+"""
+Ticker metadata cache used for symbol validation.
+
+Validating a symbol means a metadata request to the market-data provider (for Yahoo
+Finance a full get_info() call, the heaviest endpoint the application uses). Results
+are kept in memory and in a small SQLite table with a time-to-live: known symbols are
+trusted for a week, while rejected symbols and failed lookups are remembered for a day
+(negative cache). Many symbols can be resolved at once on a thread pool.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+import market_data
+
+# Time-to-live (seconds) of positive and negative validation results
+VALID_TTL = 7 * 24 * 60 * 60
+INVALID_TTL = 24 * 60 * 60
+
+# Upper bound of concurrent metadata requests in validate_many()
+DEFAULT_MAX_WORKERS = 8
+
+
+class SymbolCache:
+    """
+    TTL cache of ticker validation results with a negative cache for unknown symbols
+    and failed lookups.
+
+    Attributes:
+        path (str): Location of the SQLite database (":memory:" for a throwaway cache).
+        fetcher (callable): Function ticker -> dict | None used on a miss.
+    """
+
+    def __init__(self, path: str = ":memory:", fetcher=None) -> None:
+        """
+        Opens (or creates) the symbol database.
+
+        Args:
+            path (str, optional): Database file path. Defaults to an in-memory database.
+            fetcher (callable, optional): Metadata fetcher. Defaults to the active provider's
+                symbol_info().
+        """
+        self.path = path
+        self.fetcher = fetcher or market_data.get_provider().symbol_info
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._entries = {}  # ticker -> (valid, short name, checked_at)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS symbols (
+                ticker TEXT PRIMARY KEY,
+                valid INTEGER NOT NULL,
+                short_name TEXT,
+                checked_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+        for ticker, valid, short_name, checked_at in self._conn.execute("SELECT * FROM symbols"):
+            self._entries[ticker] = (bool(valid), short_name, checked_at)
+
+    def __repr__(self) -> str:
+        return f"SymbolCache(path={self.path}, symbols={len(self._entries)})"
+
+    def lookup(self, ticker: str) -> bool | None:
+        """
+        Returns the cached validation result of a ticker without any network access.
+
+        Args:
+            ticker (str): The ticker symbol.
+
+        Returns:
+            bool | None: The cached result, or None if it is missing or expired.
+        """
+        entry = self._entries.get(ticker.upper())
+        if entry is None:
+            instrumentation.record_cache("symbol_cache", False)
+            return None
+
+        valid, _, checked_at = entry
+        ttl = VALID_TTL if valid else INVALID_TTL
+        if time.time() - checked_at > ttl:
+            instrumentation.record_cache("symbol_cache", False)
+            return None
+
+        instrumentation.record_cache("symbol_cache", True)
+        return valid
+
+    def is_valid(self, ticker: str) -> bool:
+        """
+        Validates a single ticker, asking the provider only on a cache miss.
+
+        Args:
+            ticker (str): The ticker symbol to validate.
+
+        Returns:
+            bool: True if the ticker is recognized, False otherwise.
+        """
+        ticker = ticker.upper()
+        cached = self.lookup(ticker)
+        if cached is not None:
+            return cached
+
+        return self._resolve(ticker)
+
+    def validate_many(self, tickers, max_workers: int = DEFAULT_MAX_WORKERS) -> dict:
+        """
+        Validates many tickers, resolving every distinct cache miss concurrently.
+
+        Args:
+            tickers (iterable): Ticker symbols (duplicates are resolved once).
+            max_workers (int, optional): Maximum concurrent metadata requests.
+
+        Returns:
+            dict: A mapping of upper-cased ticker -> bool.
+        """
+        results = {}
+        misses = []
+
+        for ticker in dict.fromkeys(t.upper() for t in tickers):
+            cached = self.lookup(ticker)
+            if cached is None:
+                misses.append(ticker)
+            else:
+                results[ticker] = cached
+
+        if misses:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(misses)))) as pool:
+                for ticker, valid in zip(misses, pool.map(self._resolve, misses)):
+                    results[ticker] = valid
+
+        return results
+
+    def invalidate(self, ticker: str = None) -> None:
+        """
+        Forgets the cached result of one ticker, or of every ticker.
+
+        Args:
+            ticker (str, optional): The ticker to forget. Defaults to all tickers.
+        """
+        with self._lock:
+            if ticker is None:
+                self._entries = {}
+                self._conn.execute("DELETE FROM symbols")
+            else:
+                self._entries.pop(ticker.upper(), None)
+                self._conn.execute("DELETE FROM symbols WHERE ticker = ?", (ticker.upper(),))
+            self._conn.commit()
+
+    def _resolve(self, ticker: str) -> bool:
+        try:
+            info = self.fetcher(ticker)
+        except Exception as e:
+            # A failing lookup is negative-cached like an unknown symbol, so a broken
+            # provider is not asked again for every validation until INVALID_TTL expires
+            print(f"Validation error for ticker '{ticker}': {e}")
+            info = None
+
+        valid = info is not None
+        short_name = info.get("short name") if info else None
+        checked_at = time.time()
+
+        with self._lock:
+            self._entries[ticker] = (valid, short_name, checked_at)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO symbols VALUES (?, ?, ?, ?)",
+                (ticker, int(valid), short_name, checked_at)
+            )
+            self._conn.commit()
+
+        return valid
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(provider: market_data.MarketDataProvider = None) -> SymbolCache:
+    """
+    Returns the symbol cache of a market-data provider, opening it on first use.
+
+    Args:
+        provider (MarketDataProvider, optional): Defaults to the active provider.
+
+    Returns:
+        SymbolCache: The provider's symbol cache.
+    """
+    provider = provider or market_data.get_provider()
+
+    with _caches_lock:
+        if provider not in _caches:
+            _caches[provider] = SymbolCache(
+                provider.cache_file("symbols.sqlite"), fetcher=provider.symbol_info
+            )
+        return _caches[provider]
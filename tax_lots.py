@@ -0,0 +1,416 @@
+"""
+Tax-lot accounting: realized and unrealized P&L per purchase lot.
+
+Every buy opens a lot; every sell consumes open lots of the same ticker in the order of
+the selected matching method:
+
+    fifo     : oldest lot first      (deque, popleft)
+    lifo     : newest lot first      (deque, pop)
+    hifo     : highest cost first    (heap keyed by price)
+    specific : lots named by the sell (dict by lot id); sells naming no lots use FIFO
+
+Consuming a lot is O(1) for FIFO/LIFO and O(log n) for HIFO, so replaying hundreds of
+thousands of lots never rescans the open lots on each sell.
+"""
+from __future__ import annotations
+
+import heapq
+from collections import Counter, deque
+from datetime import date as date_cls, datetime
+
+import instrumentation
+import lazy_import
+import ledger
+
+np = lazy_import.module("numpy")
+
+METHODS = ("fifo", "lifo", "hifo", "specific")
+
+# Holding periods longer than this many days are long-term
+LONG_TERM_DAYS = 365
+
+SUMMARY_FIELDS = (
+    "open lots", "open amount", "realized", "short-term realized", "long-term realized", "unrealized"
+)
+
+
+def to_date(day) -> date_cls:
+    """
+    Converts a 'YYYY-MM-DD' string, datetime, date or datetime64 to a date.
+
+    Args:
+        day (str | date | datetime | np.datetime64): The day to convert.
+
+    Returns:
+        date: The calendar day.
+    """
+    if isinstance(day, datetime):
+        return day.date()
+    if isinstance(day, date_cls):
+        return day
+    return ledger.to_datetime64(day).item()
+
+
+class Lot:
+    """
+    One purchase and the part of it that is still held.
+
+    Attributes:
+        lot_id (tuple): (ticker, buy trade number).
+        ticker (str): The stock ticker symbol.
+        date (date): Purchase date.
+        price (float): Purchase price per share.
+        amount (int): Shares bought.
+        remaining (int): Shares not sold yet.
+    """
+
+    __slots__ = ("lot_id", "ticker", "date", "price", "amount", "remaining")
+
+    def __init__(self, ticker: str, num: int, amount: int, price: float, date) -> None:
+        self.lot_id = (ticker, int(num))
+        self.ticker = ticker
+        self.date = to_date(date)
+        self.price = float(price)
+        self.amount = int(amount)
+        self.remaining = int(amount)
+
+    def __repr__(self) -> str:
+        return f"Lot({self.ticker} #{self.lot_id[1]}, {self.remaining}/{self.amount} @ {self.price}, {self.date})"
+
+
+class LotBook:
+    """
+    The open lots of one ticker, organized for the matching method.
+
+    Attributes:
+        ticker (str): The stock ticker symbol.
+        method (str): One of METHODS.
+        held (int): Total remaining shares of the open lots.
+    """
+
+    def __init__(self, ticker: str, method: str) -> None:
+        self.ticker = ticker
+        self.method = method
+        self.held = 0
+        self._lots = {}  # lot_id -> Lot, every open lot
+        self._queue = deque()  # fifo / lifo
+        self._heap = []  # hifo: (-price, sequence, lot)
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._lots)
+
+    def add(self, lot: Lot) -> None:
+        """Opens a lot."""
+        self._lots[lot.lot_id] = lot
+        self.held += lot.remaining
+
+        if self.method == "hifo":
+            # Ties keep purchase order
+            heapq.heappush(self._heap, (-lot.price, self._sequence, lot))
+            self._sequence += 1
+        elif self.method in ("fifo", "lifo"):
+            self._queue.append(lot)
+
+    def take(self, amount: int, lots: list = None) -> list:
+        """
+        Removes shares from the open lots.
+
+        Args:
+            amount (int): Shares to remove.
+            lots (list, optional): For the specific method, the (buy trade number, amount)
+                                   pairs naming the lots to sell from. Without them the
+                                   shares come from the oldest open lots (FIFO).
+
+        Returns:
+            list: (lot, shares taken) pairs in matching order.
+
+        Raises:
+            ValueError: If there are not enough shares or a named lot is unknown or too small.
+        """
+        if amount > self.held:
+            raise ValueError(f"Cannot sell {amount} shares, only {self.held} are held in open lots.")
+
+        if self.method == "specific":
+            return self._take_specific(amount, lots)
+
+        taken = []
+        while amount > 0:
+            lot = self._next_lot()
+            shares = min(amount, lot.remaining)
+            lot.remaining -= shares
+            amount -= shares
+            taken.append((lot, shares))
+
+            if lot.remaining == 0:
+                self._pop_lot()
+                del self._lots[lot.lot_id]
+
+        self.held -= sum(shares for _, shares in taken)
+        return taken
+
+    def open_lots(self) -> list:
+        """Returns the open lots in purchase order."""
+        return sorted(self._lots.values(), key=lambda lot: (lot.date, lot.lot_id[1]))
+
+    def _next_lot(self) -> Lot:
+        if self.method == "fifo":
+            return self._queue[0]
+        if self.method == "lifo":
+            return self._queue[-1]
+        return self._heap[0][2]
+
+    def _pop_lot(self) -> None:
+        if self.method == "fifo":
+            self._queue.popleft()
+        elif self.method == "lifo":
+            self._queue.pop()
+        else:
+            heapq.heappop(self._heap)
+
+    def _take_specific(self, amount: int, lots: list) -> list:
+        if not lots:
+            # A sale that names no lots is matched FIFO; lots are kept in the order they were opened
+            lots = []
+            needed = amount
+            for lot in self._lots.values():
+                if needed == 0:
+                    break
+                shares = min(needed, lot.remaining)
+                lots.append((lot.lot_id[1], shares))
+                needed -= shares
+
+        if sum(shares for _, shares in lots) != amount:
+            raise ValueError(f"The named lots add up to {sum(s for _, s in lots)} shares, not {amount}.")
+
+        # A lot named more than once is validated (and matched) against its total
+        per_lot = Counter()
+        for num, shares in lots:
+            per_lot[int(num)] += int(shares)
+
+        taken = []
+        for num, shares in per_lot.items():
+            lot = self._lots.get((self.ticker, num))
+            if shares <= 0 or lot is None or lot.remaining < shares:
+                raise ValueError(f"Lot #{num} is not open or holds fewer than {shares} shares.")
+            taken.append((lot, shares))
+
+        for lot, shares in taken:
+            lot.remaining -= shares
+            if lot.remaining == 0:
+                del self._lots[lot.lot_id]
+
+        self.held -= amount
+        return taken
+
+
+class TaxLotEngine:
+    """
+    Lot books of every ticker plus the realized matches.
+
+    Attributes:
+        method (str): One of METHODS.
+        books (dict): ticker -> LotBook.
+        realized (list): One dict per matched (sell, lot) pair, see sell().
+    """
+
+    def __init__(self, method: str = "fifo") -> None:
+        """
+        Args:
+            method (str, optional): Lot matching method, one of METHODS. Defaults to "fifo".
+
+        Raises:
+            ValueError: If the method is unknown.
+        """
+        method = method.lower()
+        if method not in METHODS:
+            raise ValueError(f"Unknown lot matching method: {method}. Use one of {', '.join(METHODS)}.")
+
+        self.method = method
+        self.books = {}
+        self.realized = []
+
+    def __repr__(self) -> str:
+        return f"TaxLotEngine(method={self.method}, tickers={len(self.books)}, realized={len(self.realized)})"
+
+    def buy(self, ticker: str, num: int, amount: int, price: float, date) -> Lot:
+        """Opens a lot for a purchase and returns it."""
+        if ticker not in self.books:
+            self.books[ticker] = LotBook(ticker, self.method)
+        lot = Lot(ticker, num, amount, price, date)
+        self.books[ticker].add(lot)
+        return lot
+
+    def sell(self, ticker: str, amount: int, price: float, date, lots: list = None) -> list:
+        """
+        Matches a sale against the open lots of a ticker.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            amount (int): Shares sold.
+            price (float): Sale price per share.
+            date (str | date | datetime): Sale date.
+            lots (list, optional): (buy trade number, amount) pairs for specific-lot matching.
+                Sales that name no lots are matched FIFO.
+
+        Returns:
+            list: The realized rows of this sale, each a dict with "ticker", "lot",
+                  "amount", "buy date", "sell date", "buy price", "sell price",
+                  "holding days" and "realized".
+
+        Raises:
+            ValueError: If the ticker has no open lots or the lots cannot cover the sale.
+        """
+        if ticker not in self.books:
+            raise ValueError(f"There are no open lots of {ticker}.")
+
+        sell_date = to_date(date)
+        rows = []
+        for lot, shares in self.books[ticker].take(amount, lots):
+            rows.append({
+                "ticker": ticker,
+                "lot": lot.lot_id[1],
+                "amount": shares,
+                "buy date": str(lot.date),
+                "sell date": str(sell_date),
+                "buy price": lot.price,
+                "sell price": float(price),
+                "holding days": (sell_date - lot.date).days,
+                "realized": (float(price) - lot.price) * shares,
+            })
+
+        self.realized.extend(rows)
+        return rows
+
+    def unrealized(self, prices: dict, as_of) -> list:
+        """
+        Values every open lot at the given prices.
+
+        Args:
+            prices (dict): ticker -> current price (tickers without a price are skipped).
+            as_of (str | date | datetime): Date the holding periods run to.
+
+        Returns:
+            list: One dict per open lot with "ticker", "lot", "amount", "buy date",
+                  "buy price", "current price", "holding days" and "unrealized".
+        """
+        as_of = to_date(as_of)
+        rows = []
+        for ticker, book in self.books.items():
+            price = prices.get(ticker)
+            if price is None:
+                continue
+            for lot in book.open_lots():
+                rows.append({
+                    "ticker": ticker,
+                    "lot": lot.lot_id[1],
+                    "amount": lot.remaining,
+                    "buy date": str(lot.date),
+                    "buy price": lot.price,
+                    "current price": float(price),
+                    "holding days": (as_of - lot.date).days,
+                    "unrealized": (float(price) - lot.price) * lot.remaining,
+                })
+        return rows
+
+    def summary(self, prices: dict, as_of) -> dict:
+        """
+        Aggregates realized and unrealized P&L per ticker.
+
+        Open lots and amounts are counted for every ticker; tickers without a price have no
+        unrealized P&L (None), and the 'total' unrealized P&L only covers the priced ones.
+
+        Args:
+            prices (dict): ticker -> current price.
+            as_of (str | date | datetime): Date the holding periods run to.
+
+        Returns:
+            dict: ticker -> {"open lots", "open amount", "realized", "short-term realized",
+                  "long-term realized", "unrealized"}, plus a 'total' entry.
+        """
+        result = {}
+
+        def entry(ticker: str) -> dict:
+            if ticker not in result:
+                result[ticker] = dict.fromkeys(SUMMARY_FIELDS, 0)
+            return result[ticker]
+
+        for row in self.realized:
+            metrics = entry(row["ticker"])
+            metrics["realized"] += row["realized"]
+            term = "long-term realized" if row["holding days"] > LONG_TERM_DAYS else "short-term realized"
+            metrics[term] += row["realized"]
+
+        for ticker, book in self.books.items():
+            if len(book):
+                metrics = entry(ticker)
+                metrics["open lots"] = len(book)
+                metrics["open amount"] = book.held
+                if prices.get(ticker) is None:
+                    metrics["unrealized"] = None
+
+        for row in self.unrealized(prices, as_of):
+            entry(row["ticker"])["unrealized"] += row["unrealized"]
+
+        result["total"] = {
+            field: sum(metrics[field] for metrics in result.values() if metrics[field] is not None)
+            for field in SUMMARY_FIELDS
+        }
+        return result
+
+
+@instrumentation.timed()
+def build_engine(tickers_buy_dict: dict, tickers_sell_dict: dict, method: str = "fifo",
+                 specific_lots: dict = None) -> TaxLotEngine:
+    """
+    Replays the whole trade history into a tax-lot engine.
+
+    Trades are ordered by date, buys before sells on the same day, then by trade number.
+
+    Args:
+        tickers_buy_dict (dict): Global purchase history (Ledger or legacy dict).
+        tickers_sell_dict (dict): Global sales history (Ledger or legacy dict).
+        method (str, optional): Lot matching method, one of METHODS. Defaults to "fifo".
+        specific_lots (dict, optional): For the specific method, (ticker, sell trade number)
+            -> list of (buy trade number, amount) pairs. Sales missing from it are matched FIFO.
+
+    Returns:
+        TaxLotEngine: The engine with every sale matched.
+
+    Raises:
+        ValueError: If the method is unknown or a sale cannot be matched.
+    """
+    engine = TaxLotEngine(method)
+    specific_lots = specific_lots or {}
+
+    # Flat, chronologically sorted event arrays across tickers and sides
+    columns = {"ticker": [], "kind": [], "num": [], "amount": [], "price": [], "date": []}
+    for kind, tickers_dict in ((0, tickers_buy_dict), (1, tickers_sell_dict)):
+        for ticker in tickers_dict:
+            history = ledger.get_ticker_ledger(tickers_dict, ticker)
+            count = len(history)
+            columns["ticker"].append(np.full(count, ticker, dtype=object))
+            columns["kind"].append(np.full(count, kind))
+            columns["num"].append(history.nums)
+            columns["amount"].append(history.amounts)
+            columns["price"].append(history.prices)
+            columns["date"].append(history.dates)
+
+    if not columns["kind"]:
+        return engine
+
+    tickers, kinds, nums, amounts, prices, dates = (
+        np.concatenate(columns[name]) for name in ("ticker", "kind", "num", "amount", "price", "date")
+    )
+    order = np.lexsort((nums, kinds, dates))
+
+    # Plain Python values for the matching loop (NumPy scalars are slow one at a time)
+    events = zip(*(column[order].tolist() for column in (tickers, kinds, nums, amounts, prices, dates)))
+
+    for ticker, kind, num, amount, price, day in events:
+        if kind == 0:
+            engine.buy(ticker, num, amount, price, day)
+        else:
+            engine.sell(ticker, amount, price, day, specific_lots.get((ticker, num)))
+
+    return engine
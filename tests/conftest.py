@@ -0,0 +1,41 @@
+"""
+Shared pytest fixtures.
+
+Every on-disk cache of the application (trading calendar, bar store, symbol cache) is
+redirected to a throwaway folder before any module of the repository is imported, and
+market data is served from generated LocalFileProvider fixtures, so the suite never
+touches the network or the user's ~/.moneyer folder.
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("MONEYER_CACHE_DIR", tempfile.mkdtemp(prefix="moneyer-tests-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+import market_data  # noqa: E402
+from benchmarks import synthetic  # noqa: E402
+
+FIXTURE_TICKERS = ["AAA", "BBB", "CCC", "DDD"]
+FIXTURE_START = "2022-01-03"
+FIXTURE_END = "2023-12-29"
+
+
+@pytest.fixture(scope="session")
+def fixture_provider(tmp_path_factory):
+    """LocalFileProvider over two years of random-walk bars for FIXTURE_TICKERS."""
+    root = synthetic.generate_fixtures(
+        str(tmp_path_factory.mktemp("market")), FIXTURE_TICKERS, FIXTURE_START, FIXTURE_END
+    )
+    return market_data.LocalFileProvider(root)
+
+
+@pytest.fixture
+def local_market(fixture_provider):
+    """Activates the fixture provider for one test and restores the previous one."""
+    previous = market_data.get_provider()
+    market_data.set_provider(fixture_provider)
+    yield fixture_provider
+    market_data.set_provider(previous)
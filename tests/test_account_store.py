@@ -0,0 +1,142 @@
+"""Persistence and crash recovery of AccountStore (snapshot + journal)."""
+import os
+
+import pytest
+
+import account_store
+import ledger
+import positions
+
+TRADES = [
+    ("buy", "AAA", 1, 10, 100.0, "2023-01-03"),
+    ("buy", "BBB", 2, 5, 50.0, "2023-01-04"),
+    ("sell", "AAA", 3, 4, 120.0, "2023-02-01"),
+    ("buy", "AAA", 4, 2, 90.0, "2023-03-01"),
+]
+
+
+class AccountState:
+    """An account's ledgers and positions, journaled to a store like user.Account does."""
+
+    def __init__(self, store: account_store.AccountStore) -> None:
+        self.store = store
+        self.buys, self.sells, self.table = store.load()
+
+    def trade(self, side: str, ticker: str, num: int, amount: int, price: float, date: str) -> None:
+        book = self.buys if side == "buy" else self.sells
+        book.add_ticker(ticker).append(num, amount, price, date)
+        self.table.apply_trade(side == "buy", ticker, amount, price)
+        self.store.record(side, ticker, (num, amount, price, date))
+
+    def compact(self) -> None:
+        self.store.compact(self.buys, self.sells, self.table)
+
+
+def holdings(table: positions.PositionTable) -> dict:
+    return {ticker: (data["amount"], round(data["initial price"], 9)) for ticker, data in table.items()}
+
+
+def trade_nums(book: ledger.Ledger) -> dict:
+    return {ticker: list(book[ticker]["num"]) for ticker in book}
+
+
+def reopen(path: str, **kwargs) -> tuple:
+    store = account_store.AccountStore(path, **kwargs)
+    return store, store.load()
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = AccountState(account_store.AccountStore(str(tmp_path / "account")))
+    yield state
+    state.store.close()
+
+
+def test_reopen_replays_the_journal(state):
+    for trade in TRADES:
+        state.trade(*trade)
+    state.store.close()
+
+    store, (buys, sells, table) = reopen(state.store.path)
+
+    assert holdings(table) == {"AAA": (8, 97.5), "BBB": (5, 50.0)}
+    assert trade_nums(buys) == {"AAA": [1, 4], "BBB": [2]}
+    assert trade_nums(sells) == {"AAA": [3]}
+    assert store.pending == len(TRADES)
+
+
+def test_reopen_after_compaction_replays_only_the_tail(state):
+    for trade in TRADES[:2]:
+        state.trade(*trade)
+    state.compact()
+    for trade in TRADES[2:]:
+        state.trade(*trade)
+    state.store.close()
+
+    store, (buys, sells, table) = reopen(state.store.path)
+
+    assert store.generation == 1
+    assert store.pending == 2
+    assert holdings(table) == holdings(state.table)
+    assert trade_nums(buys) == trade_nums(state.buys)
+    assert trade_nums(sells) == trade_nums(state.sells)
+
+
+def test_torn_last_record_is_dropped_and_cut_off(state):
+    for trade in TRADES[:2]:
+        state.trade(*trade)
+    state.store.close()
+    journal = state.store.journal_path
+    intact_size = os.path.getsize(journal)
+    with open(journal, "a", encoding="utf-8") as f:
+        f.write('{"side": "buy", "ticker": "CCC", "num": 3, "amo')
+
+    store, (buys, _, table) = reopen(state.store.path)
+
+    assert set(table) == {"AAA", "BBB"}
+    assert "CCC" not in buys
+    assert os.path.getsize(journal) == intact_size
+
+    # Later records are appended after the last intact line
+    store.record("buy", "CCC", (3, 1, 10.0, "2023-04-03"))
+    store.close()
+    _, (_, _, table) = reopen(state.store.path)
+    assert set(table) == {"AAA", "BBB", "CCC"}
+
+
+def test_journal_of_an_interrupted_compaction_is_not_replayed_twice(state):
+    for trade in TRADES:
+        state.trade(*trade)
+    state.store.close()
+    with open(state.store.journal_path, "rb") as f:
+        old_journal = f.read()
+
+    # Crash after the new snapshot replaced the old one, before the fresh journal was written
+    state.compact()
+    state.store.close()
+    with open(state.store.journal_path, "wb") as f:
+        f.write(old_journal)
+
+    store, (buys, _, table) = reopen(state.store.path)
+
+    assert store.pending == 0
+    assert holdings(table) == holdings(state.table)
+    assert trade_nums(buys) == trade_nums(state.buys)
+
+
+def test_read_only_store_skips_damage_without_repairing_it(state):
+    for trade in TRADES[:2]:
+        state.trade(*trade)
+    state.store.close()
+    with open(state.store.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"side": "sell"')
+    with open(state.store.journal_path, "rb") as f:
+        damaged = f.read()
+
+    store, (_, _, table) = reopen(state.store.path, read_only=True)
+
+    assert set(table) == {"AAA", "BBB"}
+    with open(state.store.journal_path, "rb") as f:
+        assert f.read() == damaged
+    with pytest.raises(ValueError):
+        store.record("buy", "CCC", (3, 1, 10.0, "2023-04-03"))
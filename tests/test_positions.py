@@ -0,0 +1,44 @@
+"""Portfolio weights of a PositionTable and its running totals."""
+import pytest
+
+import portfolio_totals
+import positions
+
+
+def column_weights(table: positions.PositionTable) -> dict:
+    total = table.market_value()
+    return {ticker: value / total * 100 for ticker, value in zip(table, table.market_values())}
+
+
+def test_weights_follow_every_change_of_the_table():
+    table = positions.PositionTable()
+    totals = portfolio_totals.PortfolioTotals(table)
+
+    table.apply_trade(True, "AAA", 10, 10.0)
+    table.apply_trade(True, "BBB", 5, 40.0)
+    table.reprice("AAA", 30.0)
+    table.apply_trade(False, "BBB", 2, 50.0)
+    table.apply_trade(True, "CCC", 1, 100.0)
+    table.reprice_many({"CCC": 200.0})
+    table.apply_trade(False, "AAA", 10, 30.0)
+
+    assert table.totals is totals
+    assert totals.market_value == pytest.approx(table.market_value())
+    for ticker, weight in column_weights(table).items():
+        assert table[ticker]["percentage portfolio"] == pytest.approx(weight)
+        assert totals.weight(ticker) == pytest.approx(weight)
+
+
+def test_copy_without_totals_sums_its_own_column():
+    table = positions.PositionTable.from_dict({
+        "AAA": {"amount": 10, "initial price": 10.0, "current price": 20.0},
+        "BBB": {"amount": 10, "initial price": 20.0},
+    })
+    portfolio_totals.PortfolioTotals(table)
+
+    copy = table.copy()
+    copy.reprice("BBB", 60.0)
+
+    assert copy.totals is None
+    assert copy["BBB"]["percentage portfolio"] == pytest.approx(75.0)
+    assert table["BBB"]["percentage portfolio"] == pytest.approx(50.0)
@@ -0,0 +1,74 @@
+"""Parity of the vectorized profit engine with the legacy per-ticker profit()."""
+import math
+
+import pytest
+
+import calculate_func
+import ledger
+import profit_engine
+from benchmarks import synthetic
+from conftest import FIXTURE_END, FIXTURE_START, FIXTURE_TICKERS
+
+PROFIT_KEYS = [
+    "initial amount", "final amount", "initial price", "final price",
+    "initial stock value in Portfolio", "final stock value in Portfolio",
+    "profit", "percentage change",
+]
+
+
+def build_ledgers(n_trades: int, seed: int) -> tuple:
+    trades = synthetic.generate_trades(n_trades, FIXTURE_TICKERS, FIXTURE_START, "2023-06-30", seed=seed)
+    buys, sells = ledger.Ledger(), ledger.Ledger()
+    for num, (side, ticker, amount, price, date) in enumerate(
+            zip(trades["side"], trades["ticker"], trades["amount"], trades["price"], trades["date"]), 1):
+        book = buys if side == "buy" else sells
+        book.setdefault(ticker, ledger.TickerLedger()).append(num, int(amount), float(price), date)
+    return buys, sells
+
+
+def legacy_profit(start_date: str, end_date: str, buys, sells) -> dict:
+    profit_dict = {}
+    for ticker in FIXTURE_TICKERS:
+        profit_dict = calculate_func.profit(ticker, start_date, end_date, buys, sells, {}, profit_dict)
+    return profit_dict
+
+
+def assert_same_report(engine: dict, legacy: dict) -> None:
+    assert set(engine) == set(legacy)
+    for ticker, row in legacy.items():
+        for key in PROFIT_KEYS:
+            assert engine[ticker][key] == pytest.approx(row[key], rel=1e-9, abs=1e-6), (ticker, key)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("start_date, end_date", [
+    ("2022-01-03", "2023-12-29"),
+    ("2022-06-01", "2023-03-15"),
+    ("2023-01-03", "2023-01-03"),
+])
+def test_batch_profit_matches_legacy_profit(local_market, seed, start_date, end_date):
+    buys, sells = build_ledgers(300, seed)
+
+    engine = profit_engine.batch_profit(FIXTURE_TICKERS, start_date, end_date, buys, sells)
+
+    assert_same_report(engine, legacy_profit(start_date, end_date, buys, sells))
+
+
+def test_profit_windows_match_batch_profit(local_market):
+    buys, sells = build_ledgers(300, 3)
+    end_date = "2023-09-29"
+
+    reports = profit_engine.profit_windows(
+        FIXTURE_TICKERS, ["1W", "1M", "YTD", "ALL"], end_date, buys.first_date(), buys, sells
+    )
+
+    for start_date, report in reports.values():
+        assert_same_report(report, legacy_profit(start_date, end_date, buys, sells))
+
+
+def test_end_price_needs_a_close_on_the_end_date(local_market):
+    closes = profit_engine.closes_for_ticker("AAA", ["2023-06-30", "2024-01-05"], exact_dates={"2024-01-05"})
+
+    # The start date is found inside the lookback, the end date after the last bar is not
+    assert not math.isnan(closes[0])
+    assert math.isnan(closes[1])
@@ -0,0 +1,111 @@
+"""Lot matching of the tax-lot engine (FIFO, LIFO, HIFO and specific lots)."""
+import pytest
+
+import ledger
+import tax_lots
+
+# (num, amount, price, date) purchases of one ticker
+BUYS = [
+    (1, 10, 100.0, "2022-01-03"),
+    (2, 10, 150.0, "2022-02-01"),
+    (3, 10, 120.0, "2023-03-01"),
+]
+
+
+def engine_with_buys(method: str) -> tax_lots.TaxLotEngine:
+    engine = tax_lots.TaxLotEngine(method)
+    for num, amount, price, date in BUYS:
+        engine.buy("AAA", num, amount, price, date)
+    return engine
+
+
+def matched(rows: list) -> list:
+    return [(row["lot"], row["amount"]) for row in rows]
+
+
+@pytest.mark.parametrize("method, expected", [
+    ("fifo", [(1, 10), (2, 5)]),
+    ("lifo", [(3, 10), (2, 5)]),
+    ("hifo", [(2, 10), (3, 5)]),
+    ("specific", [(1, 10), (2, 5)]),  # no lots named: FIFO
+])
+def test_sell_matches_lots_in_method_order(method, expected):
+    engine = engine_with_buys(method)
+
+    rows = engine.sell("AAA", 15, 130.0, "2023-06-01")
+
+    assert matched(rows) == expected
+    assert engine.books["AAA"].held == 15
+    assert sum(row["realized"] for row in rows) == pytest.approx(
+        sum((130.0 - BUYS[lot - 1][2]) * shares for lot, shares in expected)
+    )
+
+
+def test_specific_sell_takes_the_named_lots():
+    engine = engine_with_buys("specific")
+
+    rows = engine.sell("AAA", 7, 130.0, "2023-06-01", lots=[(3, 4), (1, 3)])
+
+    assert sorted(matched(rows)) == [(1, 3), (3, 4)]
+    assert [(lot.lot_id[1], lot.remaining) for lot in engine.books["AAA"].open_lots()] == [(1, 7), (2, 10), (3, 6)]
+
+
+def test_specific_sell_adds_up_a_lot_named_twice():
+    engine = engine_with_buys("specific")
+
+    rows = engine.sell("AAA", 10, 130.0, "2023-06-01", lots=[(1, 4), (1, 6)])
+
+    assert matched(rows) == [(1, 10)]
+    assert len(engine.books["AAA"]) == 2
+    assert engine.books["AAA"].held == 20
+
+
+@pytest.mark.parametrize("amount, lots", [
+    (16, [(1, 8), (1, 8)]),  # one lot named twice for more than it holds
+    (16, [(4, 5), (1, 11)]),  # unknown lot
+    (10, [(1, 5), (2, 4)]),  # does not add up to the sale
+])
+def test_specific_sell_rejects_bad_lots_without_changing_the_book(amount, lots):
+    engine = engine_with_buys("specific")
+
+    with pytest.raises(ValueError):
+        engine.sell("AAA", amount, 130.0, "2023-06-01", lots=lots)
+
+    book = engine.books["AAA"]
+    assert book.held == 30
+    assert [lot.remaining for lot in book.open_lots()] == [10, 10, 10]
+
+
+def test_cannot_sell_more_than_the_open_lots():
+    engine = engine_with_buys("fifo")
+
+    with pytest.raises(ValueError):
+        engine.sell("AAA", 31, 130.0, "2023-06-01")
+
+
+def test_summary_splits_short_and_long_term_realized():
+    engine = engine_with_buys("fifo")
+    engine.sell("AAA", 15, 130.0, "2023-06-01")
+
+    summary = engine.summary({"AAA": 140.0}, "2023-06-01")
+
+    # Lots 1 and 2 were held for more than a year; lot 3 is still fully open
+    assert summary["AAA"]["long-term realized"] == pytest.approx(10 * 30.0 + 5 * -20.0)
+    assert summary["AAA"]["short-term realized"] == 0
+    assert summary["AAA"]["open lots"] == 2
+    assert summary["AAA"]["unrealized"] == pytest.approx(5 * -10.0 + 10 * 20.0)
+
+
+def test_build_engine_replays_ledgers_with_specific_lots():
+    buys, sells = ledger.Ledger(), ledger.Ledger()
+    buys["AAA"] = ledger.TickerLedger()
+    for num, amount, price, date in BUYS:
+        buys["AAA"].append(num, amount, price, date)
+    sells["AAA"] = ledger.TickerLedger()
+    sells["AAA"].append(4, 12, 130.0, "2023-06-01")
+    sells["AAA"].append(5, 3, 130.0, "2023-06-02")
+
+    engine = tax_lots.build_engine(buys, sells, "specific", {("AAA", 4): [(2, 10), (3, 2)]})
+
+    assert matched(engine.realized) == [(2, 10), (3, 2), (1, 3)]
+    assert engine.books["AAA"].held == 15
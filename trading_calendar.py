@@ -0,0 +1,275 @@
+"""
+Precomputed NASDAQ trading-day index.
+
+The NASDAQ session list from the founding date up to a year ahead is built once with
+pandas_market_calendars, kept in memory and cached on disk. Every calendar day of that
+span is mapped to an ordinal offset, so open/closed checks, previous/next trading day
+and trading-day distances are plain array lookups instead of a schedule rebuild.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from datetime import date as date_cls, datetime, timedelta
+
+import instrumentation
+import lazy_import
+from market_data import CACHE_DIR
+
+np = lazy_import.module("numpy")
+mcal = lazy_import.module("pandas_market_calendars")
+
+# NASDAQ founding date: February 8, 1971
+NASDAQ_FOUNDING_DATE = "1971-02-08"
+
+# How far past today the session list is built (rebuilt when less than a month is left)
+HORIZON_DAYS = 366
+REBUILD_MARGIN_DAYS = 30
+
+CALENDAR_CACHE_FILE = os.path.join(CACHE_DIR, "nasdaq_sessions.npz")
+
+
+def _to_ordinal(day) -> int:
+    """
+    Converts a 'YYYY-MM-DD' string, date or datetime to a proleptic Gregorian ordinal.
+
+    Args:
+        day (str | date | datetime): The day to convert.
+
+    Returns:
+        int: The ordinal of the day.
+    """
+    if isinstance(day, str):
+        return date_cls.fromisoformat(day).toordinal()
+    return day.toordinal()
+
+
+class TradingCalendar:
+    """
+    Constant-time trading-day arithmetic over a fixed list of sessions.
+
+    Attributes:
+        sessions (list[str]): All trading days in 'YYYY-MM-DD' format, sorted.
+        first_ordinal (int): Ordinal of the first calendar day covered by the index.
+        last_ordinal (int): Ordinal of the last calendar day covered by the index.
+    """
+
+    def __init__(self, sessions: np.ndarray, horizon: str) -> None:
+        """
+        Builds the ordinal index from an array of session dates.
+
+        Args:
+            sessions (np.ndarray): Sorted datetime64[D] array of trading days.
+            horizon (str): Last calendar day ('YYYY-MM-DD') the session list is complete for.
+        """
+        self.sessions = np.datetime_as_string(sessions, unit='D').tolist()
+        self.first_ordinal = _to_ordinal(NASDAQ_FOUNDING_DATE)
+        self.last_ordinal = _to_ordinal(horizon)
+
+        span = self.last_ordinal - self.first_ordinal + 1
+        session_offsets = np.array(
+            [_to_ordinal(day) - self.first_ordinal for day in self.sessions], dtype=np.int64
+        )
+
+        self._is_open = np.zeros(span, dtype=bool)
+        self._is_open[session_offsets] = True
+
+        # Number of sessions on or before each calendar day
+        self._open_count = np.cumsum(self._is_open, dtype=np.int64)
+
+    def __repr__(self) -> str:
+        return f"TradingCalendar(sessions={len(self.sessions)}, horizon={self.horizon})"
+
+    @property
+    def horizon(self) -> str:
+        """Last calendar day covered by the index."""
+        return date_cls.fromordinal(self.last_ordinal).isoformat()
+
+    def _offset(self, day) -> int:
+        offset = _to_ordinal(day) - self.first_ordinal
+        if offset > self.last_ordinal - self.first_ordinal:
+            raise ValueError(f"The date {day} is beyond the trading calendar horizon ({self.horizon}).")
+        return offset
+
+    def is_open(self, day) -> bool:
+        """
+        Checks whether NASDAQ was (or will be) open on a given day.
+
+        Args:
+            day (str | date | datetime): The day to check.
+
+        Returns:
+            bool: True if the day is a trading session.
+        """
+        offset = self._offset(day)
+        return offset >= 0 and bool(self._is_open[offset])
+
+    def previous_open(self, day, inclusive: bool = True) -> str | None:
+        """
+        Finds the latest trading day on or before (or strictly before) a given day.
+
+        Args:
+            day (str | date | datetime): The reference day.
+            inclusive (bool, optional): Whether the day itself may be returned. Defaults to True.
+
+        Returns:
+            str | None: The trading day in 'YYYY-MM-DD' format, or None before the founding date.
+        """
+        offset = self._offset(day)
+        if offset < 0:
+            return None
+
+        # Sessions counted up to the day (or up to the day before it)
+        index = int(self._open_count[offset]) - 1
+        if not inclusive and self._is_open[offset]:
+            index -= 1
+
+        return self.sessions[index] if index >= 0 else None
+
+    def next_open(self, day, inclusive: bool = True) -> str | None:
+        """
+        Finds the earliest trading day on or after (or strictly after) a given day.
+
+        Args:
+            day (str | date | datetime): The reference day.
+            inclusive (bool, optional): Whether the day itself may be returned. Defaults to True.
+
+        Returns:
+            str | None: The trading day in 'YYYY-MM-DD' format, or None past the calendar horizon.
+        """
+        offset = self._offset(day)
+        if offset < 0:
+            return self.sessions[0]
+
+        index = int(self._open_count[offset])
+        if inclusive and self._is_open[offset]:
+            index -= 1
+
+        return self.sessions[index] if index < len(self.sessions) else None
+
+    def previous_trading_day(self, day) -> str | None:
+        """Returns the trading day strictly before the given day."""
+        return self.previous_open(day, inclusive=False)
+
+    def next_trading_day(self, day) -> str | None:
+        """Returns the trading day strictly after the given day."""
+        return self.next_open(day, inclusive=False)
+
+    def trading_days_between(self, start_day, end_day) -> int:
+        """
+        Counts the trading sessions in the half-open interval (start_day, end_day].
+
+        Args:
+            start_day (str | date | datetime): The starting day (excluded).
+            end_day (str | date | datetime): The ending day (included).
+
+        Returns:
+            int: The number of sessions, negative if end_day is before start_day.
+        """
+        return self._count_until(end_day) - self._count_until(start_day)
+
+    def shift(self, day, sessions: int) -> str | None:
+        """
+        Moves a number of trading sessions away from the latest session on or before a day.
+
+        Args:
+            day (str | date | datetime): The reference day.
+            sessions (int): Sessions to move (negative values move backwards).
+
+        Returns:
+            str | None: The resulting trading day, or None if it falls outside the index.
+        """
+        index = self._count_until(day) - 1 + sessions
+        if 0 <= index < len(self.sessions):
+            return self.sessions[index]
+        return None
+
+    def sessions_between(self, start_day, end_day) -> list:
+        """
+        Lists every trading session in the inclusive interval [start_day, end_day].
+
+        Args:
+            start_day (str | date | datetime): The first day.
+            end_day (str | date | datetime): The last day.
+
+        Returns:
+            list: Trading days in 'YYYY-MM-DD' format.
+        """
+        # Sessions strictly before start_day are skipped
+        first = self._count_until(start_day) - int(self.is_open(start_day))
+        return self.sessions[first:self._count_until(end_day)]
+
+    def _count_until(self, day) -> int:
+        offset = self._offset(day)
+        return int(self._open_count[offset]) if offset >= 0 else 0
+
+
+@instrumentation.timed()
+def build_sessions(horizon: str) -> np.ndarray:
+    """
+    Builds the NASDAQ session list from the founding date up to a horizon.
+
+    Args:
+        horizon (str): The last day ('YYYY-MM-DD') to include.
+
+    Returns:
+        np.ndarray: Sorted datetime64[D] array of trading days.
+    """
+    nasdaq_calendar = mcal.get_calendar('NASDAQ')
+    schedule = nasdaq_calendar.schedule(start_date=NASDAQ_FOUNDING_DATE, end_date=horizon)
+    return schedule.index.values.astype('datetime64[D]')
+
+
+def load_calendar(cache_file: str = CALENDAR_CACHE_FILE) -> TradingCalendar:
+    """
+    Loads the trading calendar from disk, rebuilding it when missing or close to expiring.
+
+    Args:
+        cache_file (str, optional): Path of the on-disk session cache.
+
+    Returns:
+        TradingCalendar: The ready-to-use calendar index.
+    """
+    today = datetime.now()
+    min_horizon = (today + timedelta(days=REBUILD_MARGIN_DAYS)).strftime("%Y-%m-%d")
+
+    try:
+        with np.load(cache_file) as cached:
+            horizon = str(cached["horizon"])
+            if horizon >= min_horizon:
+                instrumentation.record_cache("trading_calendar", True)
+                return TradingCalendar(cached["sessions"], horizon)
+    except (OSError, KeyError, ValueError):
+        pass
+
+    instrumentation.record_cache("trading_calendar", False)
+
+    horizon = (today + timedelta(days=HORIZON_DAYS)).strftime("%Y-%m-%d")
+    sessions = build_sessions(horizon)
+
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        np.savez(cache_file, sessions=sessions, horizon=np.array(horizon))
+    except OSError as e:
+        print(f"Could not cache the trading calendar: {e}")
+
+    return TradingCalendar(sessions, horizon)
+
+
+_calendar = None
+_calendar_lock = threading.Lock()
+
+
+def get_calendar() -> TradingCalendar:
+    """
+    Returns the process-wide NASDAQ trading calendar, loading it on first use.
+
+    Returns:
+        TradingCalendar: The shared calendar index.
+    """
+    global _calendar
+
+    with _calendar_lock:
+        if _calendar is None or _calendar.horizon < datetime.now().strftime("%Y-%m-%d"):
+            _calendar = load_calendar()
+        return _calendar
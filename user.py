@@ -1,9 +1,27 @@
-import calculate_func
-from colorama import Fore, Style, init
-from tabulate import tabulate
+from __future__ import annotations
+
+import contextlib
+from datetime import datetime, timedelta
 
-# אתחול הצבעים
-init(autoreset=True)
+import account_store
+import calculate_func
+import equity_curve
+import lazy_import
+import ledger
+import order_history
+import portfolio_totals
+import positions
+import profit_engine
+import risk
+import tax_lots
+
+pd = lazy_import.module("pandas")
+# asyncio + websockets, only needed by the streaming mode
+quote_stream = lazy_import.module("quote_stream")
+tabulate = lazy_import.attribute("tabulate", "tabulate")
+
+# אתחול הצבעים (בטעינה הראשונה של colorama)
+colorama = lazy_import.module("colorama", on_load=lambda module: module.init(autoreset=True))
 
 class Account:
     """
@@ -13,8 +31,10 @@ class Account:
         __type__ (str): Identifies the class as "Account".
         name (str): The name of the account holder.
         password (str): The password for the account.
-        tickers_buy_dict (dict): A dictionary containing details about purchased tickers.
-            Structure:
+        max_workers (int): Size of the thread pool used to fetch market data in reports.
+        store (AccountStore | None): Snapshot + journal persistence, or None for an in-memory account.
+        tickers_buy_dict (ledger.Ledger): A dictionary containing details about purchased tickers.
+            Each ticker is a date-sorted columnar ledger that still supports this layout:
                 {
                     ticker (str): {
                         "num" (list[int]): List of trade numbers.
@@ -23,8 +43,8 @@ class Account:
                         "date" (list[str]): List of purchase dates.
                     }
                 }
-        tickers_sell_dict (dict): A dictionary containing details about sold tickers.
-            Structure:
+        tickers_sell_dict (ledger.Ledger): A dictionary containing details about sold tickers.
+            Each ticker is a date-sorted columnar ledger that still supports this layout:
                 {
                     ticker (str): {
                         "num" (list[int]): List of trade numbers.
@@ -33,8 +53,8 @@ class Account:
                         "date" (list[str]): List of sale dates.
                     }
                 }
-        account_dict (dict): A dictionary tracking the account's portfolio details.
-            Structure:
+        account_dict (positions.PositionTable): The account's positions, stored as compact
+            array rows and read through this read-only dictionary layout:
                 {
                     ticker (str): {
                         "amount" (int): Total amount of stock held.
@@ -43,9 +63,12 @@ class Account:
                         "stock value in Portfolio" (float): Current value of the stock in the portfolio.
                         "Price Change" (float): Difference between current and initial stock value.
                         "percentage change" (float): Percentage change in stock value from initial price.
-                        "percentage portfolio" (float): Percentage of the portfolio's total value represented by this stock.
+                        "percentage portfolio" (float): Percentage of the portfolio's total value represented by this stock
+                            (read from totals, so always current).
                     }
                 }
+        totals (PortfolioTotals): Running shares, cost basis and market value of account_dict,
+            updated in O(1) by every trade; the 'total' row and the weights are read from it.
         profit_dict (dict): A dictionary tracking profit and historical performance metrics.
             Structure:
                 {
@@ -63,23 +86,50 @@ class Account:
                 }
     """
 
-    def __init__(self, name: str, password: str) -> None:
+    def __init__(self, name: str, password: str,
+                 max_workers: int = profit_engine.DEFAULT_MAX_WORKERS, storage: str = None,
+                 read_only: bool = False) -> None:
         """
         Initializes an Account object.
 
+        Market data comes from the process-wide provider (Yahoo Finance unless another one
+        was selected with market_data.set_provider), shared by every Account.
+
         Args:
             name (str): The name of the account holder.
             password (str): The password for the account.
+            max_workers (int, optional): Number of tickers whose market data is fetched
+                concurrently in reports.
+            storage (str, optional): Folder where the account is persisted (see
+                account_store.default_path). Its saved state is loaded, without any
+                market-data request, and every later trade is journaled. Defaults to
+                an in-memory account.
+            read_only (bool, optional): Load the storage folder without writing to it, e.g.
+                while another process has the account open. Trades and save() then raise
+                ValueError.
         """
         self.__type__ = "Account"
         self.name = name
         self.password = password
+        self.max_workers = max_workers
 
-        self.tickers_buy_dict = {}
-        self.tickers_sell_dict = {}
-        self.account_dict = {}
+        self.tickers_buy_dict = ledger.Ledger()
+        self.tickers_sell_dict = ledger.Ledger()
+        self.account_dict = positions.PositionTable()
         self.profit_dict = {}
 
+        # Nesting depth of batch() blocks; per-trade recomputation is deferred while > 0
+        self._batch_depth = 0
+        # Whether trades were imported inside a batch and are not in a snapshot yet
+        self._unsaved_import = False
+
+        self.store = None
+        if storage is not None:
+            self.store = account_store.AccountStore(storage, read_only=read_only)
+            self.tickers_buy_dict, self.tickers_sell_dict, self.account_dict = self.store.load()
+
+        self.totals = portfolio_totals.PortfolioTotals(self.account_dict)
+
     def __repr__(self) -> str:
         """
         Returns a string representation of the Account object.
@@ -116,21 +166,14 @@ class Account:
 
         date = calculate_func.check_date(date)
 
-        if ticker not in self.tickers_buy_dict:
-            self.tickers_buy_dict[ticker] = {
-                "num": [],
-                "amount": [],
-                "price": [],
-                "date": []
-            }
+        self.tickers_buy_dict.add_ticker(ticker)
 
         # Update the ticker buy dict
         calculate_func.super_update(self.tickers_buy_dict, ticker, amount, price_per_stock, date)
 
         # Update the account dict
-        self.account_dict = calculate_func.update_account_dict(
-            True, ticker, self.account_dict, self.tickers_sell_dict, self.tickers_buy_dict
-        )
+        self._update_position(True, ticker)
+        self._record_trade("buy", ticker)
 
     def sell_stock(self, ticker: str, amount: int, price_per_stock: float = None, date: str = None) -> None:
         """
@@ -154,13 +197,7 @@ class Account:
 
         date = calculate_func.check_date(date)
 
-        if ticker not in self.tickers_sell_dict:
-            self.tickers_sell_dict[ticker] = {
-                "num": [],
-                "amount": [],
-                "price": [],
-                "date": []
-            }
+        self.tickers_sell_dict.add_ticker(ticker)
 
         # Check if selling more than owned
         if amount > self.account_dict[ticker]["amount"]:
@@ -173,17 +210,189 @@ class Account:
         calculate_func.super_update(self.tickers_sell_dict, ticker, amount, price_per_stock, date)
 
         # Update the account dict
+        self._update_position(False, ticker)
+        self._record_trade("sell", ticker)
+
+    def import_trades(self, source) -> int:
+        """
+        Imports a batch of trades from a CSV file, a DataFrame or an iterable of records.
+
+        Distinct tickers and dates are validated once, missing prices are fetched with one
+        ranged lookup per ticker, every trade is appended to the ledgers in a single pass
+        and the portfolio is re-priced once at the end. Nothing is imported if any record
+        is invalid.
+
+        Args:
+            source (str | pd.DataFrame | iterable): The trades, with the columns 'ticker',
+                'side' ('buy' or 'sell'), 'amount' and optionally 'price' and 'date'.
+
+        Returns:
+            int: The number of imported trades.
+
+        Raises:
+            ValueError: If a ticker, date, price or sell amount is invalid.
+        """
+        trades = calculate_func.read_trades(source)
+
+        count = calculate_func.import_trades(
+            trades, self.tickers_buy_dict, self.tickers_sell_dict, self.account_dict, self.max_workers
+        )
+
+        if count:
+            if self._batch_depth:
+                # Snapshotted when the outermost batch exits
+                self._unsaved_import = True
+            else:
+                self.refresh_prices()
+                # A bulk import goes straight into a new snapshot instead of the journal
+                self.save()
+        return count
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Defers portfolio recomputation for a block of trades.
+
+        Inside the block buy_stock, sell_stock and import_trades only update the ledgers
+        and the share amounts and average costs; no quote is requested and the portfolio
+        weights are left as they are. When the outermost block exits, the whole portfolio
+        is re-priced with a single bulk quote request and the metrics and weights are
+        recomputed once. Single trades are journaled as they happen; trades imported
+        inside the block are written to a new snapshot when the outermost block exits.
+
+        Example:
+            with account.batch():
+                for ticker, amount, price, date in trades:
+                    account.buy_stock(ticker, amount, price, date)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.refresh_prices()
+                if self._unsaved_import:
+                    self.save()
+
+    def _update_position(self, order_type_buy: bool, ticker: str) -> None:
+        """Applies the trade just added to the ledger to account_dict (deferred metrics in a batch)."""
+        if self._batch_depth:
+            tickers_dict = self.tickers_buy_dict if order_type_buy else self.tickers_sell_dict
+            _, amount, price, _ = tickers_dict[ticker].last_trade()
+            calculate_func.apply_position_change(order_type_buy, ticker, self.account_dict, amount, price)
+            self.totals.update(ticker, self.account_dict.get(ticker))
+            return
+
         self.account_dict = calculate_func.update_account_dict(
-            False, ticker, self.account_dict, self.tickers_sell_dict, self.tickers_buy_dict
+            order_type_buy, ticker, self.account_dict, self.tickers_sell_dict, self.tickers_buy_dict, self.totals
         )
 
-    def show_buy_info(self) -> None:
-        """Displays detailed buy order information."""
-        calculate_func.show_order_info(self.tickers_buy_dict, order="buy")
+    def save(self) -> None:
+        """Compacts the persisted journal into a fresh snapshot (no-op for in-memory accounts)."""
+        if self.store is not None:
+            self.store.compact(self.tickers_buy_dict, self.tickers_sell_dict, self.account_dict)
+        self._unsaved_import = False
+
+    def close(self) -> None:
+        """Flushes the persisted journal to disk and closes it."""
+        if self.store is not None:
+            self.store.close()
+
+    def _record_trade(self, side: str, ticker: str) -> None:
+        """Journals the trade just added to the ledger, compacting when the journal gets long."""
+        if self.store is None:
+            return
+
+        tickers_dict = self.tickers_buy_dict if side == "buy" else self.tickers_sell_dict
+        position = self.account_dict.get(ticker, {})
+        self.store.record(side, ticker, tickers_dict[ticker].last_trade(), position.get("current price"))
+
+        if self.store.needs_compaction():
+            self.save()
+
+    def refresh_prices(self) -> None:
+        """
+        Re-prices the whole portfolio with a single bulk quote request and updates
+        values, gains and weights of every holding.
+        """
+        self.account_dict = calculate_func.refresh_account_dict(self.account_dict, self.totals)
+
+    def stream_quotes(self, url: str = None, duration: float = None,
+                      max_ticks: int = None, refresh_every: float = None) -> quote_stream.LivePortfolio:
+        """
+        Keeps the portfolio priced from a live quote stream until it ends.
+
+        Each tick re-prices only the affected holding and moves the running portfolio
+        value, so the cost of a tick does not depend on the size of the book.
+
+        Args:
+            url (str, optional): The stream server, e.g. a local quote_stream.ReplayServer.
+                Defaults to the Yahoo Finance streamer.
+            duration (float, optional): Seconds to stream. Defaults to no limit.
+            max_ticks (int, optional): Stop after this many ticks. Defaults to no limit.
+            refresh_every (float, optional): Seconds between two portfolio displays while
+                streaming. Defaults to displaying only at the end.
+
+        Returns:
+            quote_stream.LivePortfolio: The live positions and their running totals.
+
+        Raises:
+            ValueError: If the stream server rejects or cannot take the connection (see quote_stream.stream).
+            OSError: If the server cannot be reached.
+        """
+        if not self.account_dict:
+            print("\n[!] Portfolio is empty.")
+            return None
+
+        def show(portfolio: quote_stream.LivePortfolio) -> None:
+            self.show_account_info()
+
+        portfolio = quote_stream.stream(
+            self.account_dict, url or quote_stream.YAHOO_STREAM_URL, duration=duration, max_ticks=max_ticks,
+            refresh_every=refresh_every, on_refresh=show if refresh_every else None, totals=self.totals
+        )
+        self.show_account_info()
+        return portfolio
+
+    def order_history(self, **filters) -> order_history.OrderQuery:
+        """
+        Queries the buy and sell history of the account.
+
+        Args:
+            **filters: ticker, side, start_date, end_date, min_amount, max_amount,
+                min_price, max_price, newest_first and page_size (see order_history.query).
+
+        Returns:
+            order_history.OrderQuery: The matching orders, read lazily page by page.
+        """
+        return order_history.query(self.tickers_buy_dict, self.tickers_sell_dict, **filters)
+
+    def show_buy_info(self, **kwargs) -> int:
+        """
+        Displays detailed buy order information, newest first, one page at a time.
+
+        Args:
+            **kwargs: ticker, start_date, end_date, page, page_size, pause and the amount
+                and price filters (see calculate_func.show_order_info).
+
+        Returns:
+            int: The number of orders printed.
+        """
+        return calculate_func.show_order_info(self.tickers_buy_dict, order_type="buy", **kwargs)
+
+    def show_sell_info(self, **kwargs) -> int:
+        """
+        Displays detailed sell order information, newest first, one page at a time.
 
-    def show_sell_info(self) -> None:
-        """Displays detailed sell order information."""
-        calculate_func.show_order_info(self.tickers_sell_dict, order="sell")
+        Args:
+            **kwargs: ticker, start_date, end_date, page, page_size, pause and the amount
+                and price filters (see calculate_func.show_order_info).
+
+        Returns:
+            int: The number of orders printed.
+        """
+        return calculate_func.show_order_info(self.tickers_sell_dict, order_type="sell", **kwargs)
 
     def show_account_info(self):
         """מציגה את תיק ההשקעות בפורמט מקצועי וצבעוני לטרמינל"""
@@ -193,7 +402,10 @@ class Account:
 
         table_data = []
 
-        for ticker, info in self.account_dict.items():
+        positions = {ticker: info for ticker, info in self.account_dict.items() if ticker.lower() != "total"}
+        positions["total"] = self.totals.total_row()
+
+        for ticker, info in positions.items():
             # שימוש ב-.get() מאפשר לנו למשוך נתונים בלי שהקוד יקרוס אם השם מעט שונה
             amount = info.get('amount', 0)
             init_price = info.get('initial price', 0)
@@ -202,11 +414,12 @@ class Account:
             # כאן היה ה-KeyError: שינינו ל-lowercase 'price change'
             price_change = info.get('price change', 0)
             change_pct = info.get('percentage change', 0)
-            weight = info.get('percentage portfolio', 0)
+            # המשקל נקרא מהסכומים הרצים, כך שהוא נכון גם אחרי עסקאות
+            weight = 100.0 if ticker == "total" else self.totals.weight(ticker)
 
             # בחירת צבע: ירוק לרווח, אדום להפסד
-            color = Fore.GREEN if change_pct >= 0 else Fore.RED
-            reset = Style.RESET_ALL
+            color = colorama.Fore.GREEN if change_pct >= 0 else colorama.Fore.RED
+            reset = colorama.Style.RESET_ALL
             sign = "+" if change_pct >= 0 else ""
 
             row = [
@@ -229,35 +442,191 @@ class Account:
         print(tabulate(table_data, headers=headers, tablefmt="fancy_grid", stralign="center"))
         print(f"{'=' * 61}\n")
 
-    def show_profit(self, ticker: str = "all", start_date: str = "first buy time", end_date: str = "now") -> None:
+    def show_profit(self, ticker: str = "all", start_date: str = "first buy time", end_date: str = "now",
+                    max_workers: int = None) -> None:
         """
         Calculates and displays the profit/loss for a specific ticker or the entire portfolio.
 
+        All requested tickers are evaluated together by the vectorized profit engine, and
+        their prices are fetched concurrently on a bounded thread pool, so the wall time
+        follows the slowest ticker rather than the sum of all of them.
+
         Args:
             ticker (str, optional): The stock ticker, or "all" for the whole portfolio. Defaults to "all".
             start_date (str, optional): The starting date for calculation. Defaults to "first buy time".
             end_date (str, optional): The ending date for calculation. Defaults to "now".
+            max_workers (int, optional): Overrides the account's thread pool size for this report.
         """
         ticker = ticker.upper()
         self.profit_dict = {}
 
+        if start_date == "first buy time":
+            start_date = self.tickers_buy_dict.first_date(None if ticker == "ALL" else ticker)
+            if start_date is None:
+                print("\n[!] There are no trades to report on.")
+                return
+
         start_date, end_date = calculate_func.sub_date(start_date, end_date)
 
-        if ticker == "ALL":
-            for t in self.tickers_buy_dict:
-                self.profit_dict = calculate_func.profit(
-                    t, start_date, end_date, self.tickers_buy_dict,
-                    self.tickers_sell_dict, self.account_dict, self.profit_dict
-                )
-        else:
-            calculate_func.profit(
-                ticker, start_date, end_date, self.tickers_buy_dict,
-                self.tickers_sell_dict, self.account_dict, self.profit_dict
-            )
+        tickers = list(self.tickers_buy_dict) if ticker == "ALL" else [ticker]
+        self.profit_dict = profit_engine.batch_profit(
+            tickers, start_date, end_date, self.tickers_buy_dict, self.tickers_sell_dict,
+            max_workers=max_workers or self.max_workers
+        )
 
         self.profit_dict = calculate_func.create_all_profit_dict(self.profit_dict)
         calculate_func.make_account_table(self.profit_dict)
 
+    def profit_windows(self, windows: list = None, ticker: str = "all", end_date: str = "now",
+                       max_workers: int = None) -> dict:
+        """
+        Calculates and displays the profit of several windows (1D, 1W, ..., since inception) at once.
+
+        All window start dates are planned up front, the closes of every distinct date are
+        fetched in a single price matrix and each window is computed from that shared
+        state, then everything is rendered as one combined table.
+
+        Args:
+            windows (list, optional): Window names among profit_engine.WINDOWS.
+                Defaults to all of them.
+            ticker (str, optional): The stock ticker, or "all" for the whole portfolio. Defaults to "all".
+            end_date (str, optional): The common end date. Defaults to "now".
+            max_workers (int, optional): Overrides the account's thread pool size for this report.
+
+        Returns:
+            dict: window -> (start_date, profit_dict), each profit_dict including its 'total' row.
+        """
+        ticker = ticker.upper()
+        inception_date = self.tickers_buy_dict.first_date(None if ticker == "ALL" else ticker)
+        if inception_date is None:
+            print("\n[!] There are no trades to report on.")
+            return {}
+
+        end_date = calculate_func.sub_date(inception_date, end_date)[1]
+        tickers = list(self.tickers_buy_dict) if ticker == "ALL" else [ticker]
+
+        reports = profit_engine.profit_windows(
+            tickers, windows or list(profit_engine.WINDOWS), end_date, inception_date,
+            self.tickers_buy_dict, self.tickers_sell_dict, max_workers=max_workers or self.max_workers
+        )
+        for _, profit_dict in reports.values():
+            calculate_func.create_all_profit_dict(profit_dict)
+
+        calculate_func.make_profit_windows_table(reports)
+        return reports
+
+    def risk_report(self, start_date: str = None, end_date: str = "now",
+                    benchmark: str = risk.DEFAULT_BENCHMARK, risk_free_rate: float = 0.0,
+                    max_workers: int = None) -> tuple:
+        """
+        Computes volatility, Sharpe, Sortino, max drawdown and beta of the held positions and
+        of the whole portfolio, plus the correlation matrix of the positions.
+
+        Args:
+            start_date (str, optional): First day. Defaults to one year before end_date.
+            end_date (str, optional): Last day. Defaults to "now".
+            benchmark (str, optional): Benchmark symbol for beta, or None. Defaults to "SPY".
+            risk_free_rate (float, optional): Annual risk-free rate for Sharpe and Sortino.
+            max_workers (int, optional): Overrides the account's thread pool size.
+
+        Returns:
+            tuple: (risk_dict, correlation DataFrame), see risk.portfolio_risk.
+
+        Raises:
+            ValueError: If the portfolio is empty or the window is too short.
+        """
+        holdings = {ticker: info["amount"] for ticker, info in self.account_dict.items() if ticker.lower() != "total"}
+        if not holdings:
+            raise ValueError("The portfolio is empty.")
+
+        if end_date == "now":
+            end_date = calculate_func.now_date()
+        if start_date is None:
+            start_date = (datetime.strptime(calculate_func.fix_date_format(end_date), "%Y-%m-%d")
+                          - timedelta(days=365)).strftime("%Y-%m-%d")
+        start_date, end_date = calculate_func.sub_date(start_date, end_date)
+
+        return risk.portfolio_risk(
+            holdings, start_date, end_date, benchmark, risk_free_rate, max_workers=max_workers or self.max_workers
+        )
+
+    def show_risk(self, **kwargs) -> None:
+        """Displays the portfolio table followed by the risk report (arguments as in risk_report)."""
+        if not self.account_dict:
+            print("\n[!] Portfolio is empty.")
+            return
+
+        self.show_account_info()
+        calculate_func.make_risk_table(*self.risk_report(**kwargs))
+
+    def tax_lots(self, method: str = "fifo", specific_lots: dict = None) -> tax_lots.TaxLotEngine:
+        """
+        Replays the trade history into a tax-lot engine.
+
+        Args:
+            method (str, optional): "fifo", "lifo", "hifo" (highest cost first) or "specific".
+            specific_lots (dict, optional): For "specific", (ticker, sell trade number) ->
+                list of (buy trade number, amount) pairs naming the lots each sale came from;
+                sales that are not named are matched FIFO.
+
+        Returns:
+            tax_lots.TaxLotEngine: Open lots per ticker and the realized matches with their
+                holding periods.
+
+        Raises:
+            ValueError: If the method is unknown or a sale cannot be matched.
+        """
+        return tax_lots.build_engine(self.tickers_buy_dict, self.tickers_sell_dict, method, specific_lots)
+
+    def show_tax_lots(self, method: str = "fifo", specific_lots: dict = None) -> dict:
+        """
+        Displays realized (short/long-term) and unrealized P&L per ticker under a lot matching method.
+
+        Open lots are valued at the current prices of account_dict.
+
+        Returns:
+            dict: The summary shown in the table, see tax_lots.TaxLotEngine.summary.
+        """
+        engine = self.tax_lots(method, specific_lots)
+        prices = {
+            ticker: info["current price"] for ticker, info in self.account_dict.items()
+            if ticker.lower() != "total" and "current price" in info
+        }
+
+        summary = engine.summary(prices, calculate_func.now_date())
+        calculate_func.make_tax_lot_table(summary, engine.method)
+        return summary
+
+    def value_history(self, start_date: str = "first buy time", end_date: str = "now",
+                      max_workers: int = None) -> pd.DataFrame:
+        """
+        Returns the daily value of the portfolio (equity curve).
+
+        Each ticker's closes come from one ranged bar lookup and the holdings and cost
+        basis of every day are computed from the ledgers at once.
+
+        Args:
+            start_date (str, optional): First day. Defaults to "first buy time".
+            end_date (str, optional): Last day. Defaults to "now".
+            max_workers (int, optional): Overrides the account's thread pool size.
+
+        Returns:
+            pd.DataFrame: One row per trading day and (ticker, field) columns, with the
+                fields "holdings", "market value", "cost basis" and "pnl" for every traded
+                ticker and for the "total" of the portfolio. Empty if there are no trades.
+        """
+        if start_date == "first buy time":
+            start_date = self.tickers_buy_dict.first_date()
+            if start_date is None:
+                return pd.DataFrame()
+
+        start_date, end_date = calculate_func.sub_date(start_date, end_date)
+
+        return equity_curve.value_history(
+            list(self.tickers_buy_dict), start_date, end_date, self.tickers_buy_dict, self.tickers_sell_dict,
+            max_workers=max_workers or self.max_workers
+        )
+
 def main():
     calculate_func.setup_pd()
 